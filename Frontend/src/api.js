@@ -0,0 +1,11 @@
+// Base URL of the research service (research_service/app.py)
+export const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
+
+// Share of the progress bar given to each pipeline stage
+export const STAGE_WEIGHTS = {
+  search: 10,
+  fetch_extract: 40,
+  rank: 5,
+  summarize: 40,
+  report: 5
+};
@@ -1,21 +1,31 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
+import { API_URL, STAGE_WEIGHTS } from '../api';
 
 const OutputPage = () => {
   const navigate = useNavigate();
   const [researchData, setResearchData] = useState(null);
   const [isGenerating, setIsGenerating] = useState(true);
   const [progress, setProgress] = useState(0);
+  const [stageMessage, setStageMessage] = useState('Analyzing sources and generating insights...');
+  const [liveSources, setLiveSources] = useState(null);
+  const [liveFindings, setLiveFindings] = useState([]);
+  const [jobError, setJobError] = useState(null);
 
   useEffect(() => {
     const storedData = localStorage.getItem('researchData');
-    if (storedData) {
-      setResearchData(JSON.parse(storedData));
+    const data = storedData ? JSON.parse(storedData) : null;
+    if (data) {
+      setResearchData(data);
     } else {
       navigate('/');
     }
 
-    // Simulate research generation
+    if (data && data.jobId) {
+      return followJob(data.jobId);
+    }
+
+    // No research service available: simulate research generation
     const interval = setInterval(() => {
       setProgress(prev => {
         if (prev >= 100) {
@@ -30,14 +40,92 @@ const OutputPage = () => {
     return () => clearInterval(interval);
   }, [navigate]);
 
+  // Follows the job's server-sent events; returns a cleanup function
+  const followJob = (jobId) => {
+    const source = new EventSource(`${API_URL}/jobs/${jobId}/events`);
+    const completed = {};
+    const partial = {};
+
+    const updateProgress = () => {
+      let total = 0;
+      Object.entries(STAGE_WEIGHTS).forEach(([stage, weight]) => {
+        total += completed[stage] ? weight : weight * (partial[stage] || 0);
+      });
+      setProgress(Math.min(100, Math.round(total)));
+    };
+
+    source.addEventListener('stage', (e) => {
+      const event = JSON.parse(e.data);
+      if (event.status === 'started') {
+        setStageMessage(`Running ${event.stage.replace('_', ' & ')}...`);
+        return;
+      }
+      completed[event.stage] = true;
+      if (event.stage === 'rank') {
+        setLiveSources(event.sources);
+      }
+      updateProgress();
+    });
+
+    source.addEventListener('progress', (e) => {
+      const event = JSON.parse(e.data);
+      partial[event.stage] = event.total ? event.done / event.total : 0;
+      setStageMessage(`${event.stage.replace('_', ' & ')}: ${event.done} of ${event.total}`);
+      updateProgress();
+    });
+
+    source.addEventListener('summary', (e) => {
+      const event = JSON.parse(e.data);
+      setLiveFindings(prev => [...prev, event]);
+    });
+
+    source.addEventListener('job', (e) => {
+      const event = JSON.parse(e.data);
+      if (event.status === 'done') {
+        setProgress(100);
+        setIsGenerating(false);
+        source.close();
+      } else if (event.status === 'failed') {
+        setJobError(event.error);
+        setIsGenerating(false);
+        source.close();
+      }
+    });
+
+    return () => source.close();
+  };
+
   const handleNewResearch = () => {
     localStorage.removeItem('researchData');
     navigate('/');
   };
 
-  const handleDownload = () => {
-    // This will be integrated with your FastAPI backend
-    alert('Download feature will be integrated with FastAPI backend');
+  const handleDownload = async () => {
+    if (!researchData.jobId) {
+      alert('Download requires the research service (research_service/app.py)');
+      return;
+    }
+    try {
+      const response = await fetch(`${API_URL}/download/${researchData.jobId}`, {
+        method: 'GET',
+      });
+      if (!response.ok) {
+        alert(isGenerating ? 'The report is still being generated' : 'The report is not available');
+        return;
+      }
+
+      const blob = await response.blob();
+      const url = window.URL.createObjectURL(blob);
+      const a = document.createElement('a');
+      a.href = url;
+      a.download = `research-report.${researchData.outputFormat}`;
+      document.body.appendChild(a);
+      a.click();
+      window.URL.revokeObjectURL(url);
+      a.remove();
+    } catch (error) {
+      console.error('Error downloading report:', error);
+    }
   };
 
   if (!researchData) {
@@ -52,6 +140,12 @@ const OutputPage = () => {
     maintaining market leadership while new entrants disrupt traditional business models through innovative approaches.
   `;
 
+  const sources = liveSources ? liveSources.map(source => ({
+    name: source.title || new URL(source.url).hostname,
+    relevance: Math.round(source.relevance_score * 100),
+    type: new URL(source.url).hostname
+  })) : null;
+
   const mockSources = [
     { name: 'TechCrunch', relevance: 95, type: 'Technology News' },
     { name: 'Harvard Business Review', relevance: 92, type: 'Academic Journal' },
@@ -102,11 +196,18 @@ const OutputPage = () => {
             />
           </div>
           <p style={{ marginTop: '10px', color: 'rgba(255, 255, 255, 0.7)' }}>
-            {progress}% complete - Analyzing sources and generating insights...
+            {progress}% complete - {stageMessage}
           </p>
         </div>
       )}
 
+      {jobError && (
+        <div className="card" style={{ marginBottom: '30px' }}>
+          <h3 style={{ color: '#ef4444', marginBottom: '15px' }}>Research Failed</h3>
+          <p style={{ color: 'rgba(255, 255, 255, 0.7)' }}>{jobError}</p>
+        </div>
+      )}
+
       {/* Research Metadata */}
       <div className="card" style={{ marginBottom: '30px' }}>
         <h3 style={{ color: '#9333ea', marginBottom: '15px' }}>Research Details</h3>
@@ -157,17 +258,28 @@ const OutputPage = () => {
       <div className="card" style={{ marginBottom: '30px' }}>
         <h3 style={{ color: '#9333ea', marginBottom: '15px' }}>Executive Summary</h3>
         <div style={{ lineHeight: '1.6', color: 'rgba(255, 255, 255, 0.8)' }}>
-          {mockSummary}
+          {researchData.jobId ? (
+            liveFindings.length > 0 ? (
+              liveFindings.map((finding, index) => (
+                <p key={index}>
+                  {finding.summary}{' '}
+                  <a href={finding.url} target="_blank" rel="noreferrer" style={{ color: '#a855f7' }}>
+                    [source]
+                  </a>
+                </p>
+              ))
+            ) : 'Waiting for the first summaries...'
+          ) : mockSummary}
         </div>
       </div>
 
       {/* Sources */}
       <div className="card" style={{ marginBottom: '30px' }}>
         <h3 style={{ color: '#9333ea', marginBottom: '15px' }}>
-          Sources Analyzed ({mockSources.length})
+          Sources Analyzed ({(sources || mockSources).length})
         </h3>
         <div style={{ display: 'grid', gap: '10px' }}>
-          {mockSources.map((source, index) => (
+          {(sources || mockSources).map((source, index) => (
             <div 
               key={index} 
               style={{ 
@@ -8,10 +8,13 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0"
 }
 
+# Seconds a page fetch may take in total (connect, redirects and body)
+FETCH_TIMEOUT = 20
+
 
 async def fetch(session, url):
     try:
-        async with session.get(url, headers=HEADERS, timeout=20) as resp:
+        async with session.get(url, headers=HEADERS, timeout=FETCH_TIMEOUT) as resp:
             if resp.status == 200:
                 return await resp.text()
             else:
@@ -41,11 +44,13 @@ def extract_main_text(html: str) -> str:
     return text
 
 
-async def extract_content_batch(results):
+async def extract_content_batch(results, session=None):
     """
     results: list of dicts like:
     [{"url": "https://example.com"}, ...]
 
+    session: optional shared aiohttp session; a new one is created otherwise
+
     returns:
     [{"url": "...", "raw_text": "..."}]
     """
@@ -53,9 +58,12 @@ async def extract_content_batch(results):
     urls = [r["url"] for r in results]
     output = []
 
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch(session, url) for url in urls]
-        pages = await asyncio.gather(*tasks)
+    if session is None:
+        async with aiohttp.ClientSession() as own_session:
+            return await extract_content_batch(results, own_session)
+
+    tasks = [fetch(session, url) for url in urls]
+    pages = await asyncio.gather(*tasks)
 
     for url, html in zip(urls, pages):
         raw_text = extract_main_text(html)
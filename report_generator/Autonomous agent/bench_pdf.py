@@ -0,0 +1,94 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from fpdf import FPDF
+from reporting.pdf_export import render_pdf, render_pdf_in_worker
+from reporting.report_generator import build_report
+
+WORDS = (
+    "research shows that modern systems improve results across many domains while costs "
+    "fall and adoption grows as teams learn to apply new methods to real problems"
+).split()
+
+
+# Words outside Latin-1, which need the embedded Unicode font
+UNICODE_WORDS = ["исследование", "研究", "δεδομένα", "données"]
+
+
+def make_report(findings, unicode=False, seed=0):
+    rng = random.Random(seed)
+    words = WORDS + UNICODE_WORDS if unicode else WORDS
+    summaries = [
+        {
+            "url": f"https://example.com/articles/{i}",
+            "summary": " ".join(rng.choice(words) for _ in range(rng.randint(60, 160))) + ".",
+            "confidence_score": 0.85,
+        }
+        for i in range(findings)
+    ]
+    return build_report("Benchmark topic", summaries)
+
+
+def render_legacy(report, file_path):
+    """The original exporter: core font and one multi_cell call per line."""
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.cell(0, 10, report["title"], ln=True)
+    pdf.ln(5)
+    pdf.multi_cell(0, 8, f"Topic: {report['topic']}")
+    pdf.multi_cell(0, 8, f"Date: {report['date']}")
+    pdf.ln(5)
+    pdf.multi_cell(0, 8, "Introduction")
+    pdf.multi_cell(0, 8, report["introduction"])
+    pdf.ln(5)
+    pdf.multi_cell(0, 8, "Key Findings")
+    for item in report["findings"]:
+        pdf.multi_cell(0, 8, f"- {item['summary']}")
+    pdf.ln(5)
+    pdf.multi_cell(0, 8, "Conclusion")
+    pdf.multi_cell(0, 8, report["conclusion"])
+    pdf.output(file_path)
+
+
+def measure(label, render, report, directory, repeat):
+    timings = []
+    for i in range(repeat):
+        path = os.path.join(directory, f"{label}-{i}.pdf")
+        start = time.perf_counter()
+        render(report, path)
+        timings.append(time.perf_counter() - start)
+    size = os.path.getsize(path)
+
+    # Memory is traced in a separate run; tracemalloc slows rendering down considerably
+    tracemalloc.start()
+    render(report, os.path.join(directory, f"{label}-traced.pdf"))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(f"{label:<22} first {timings[0]*1000:8.1f} ms   best {min(timings)*1000:8.1f} ms   "
+          f"peak {peak / 1e6:6.1f} MB   file {size / 1e3:7.1f} kB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PDF export benchmark")
+    parser.add_argument("--findings", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for findings in args.findings:
+            report = make_report(findings)
+            print(f"\n{findings} findings")
+            measure("legacy", render_legacy, report, directory, args.repeat)
+            measure("render_pdf", render_pdf, report, directory, args.repeat)
+            # Peak memory here is the calling process only; rendering happens in the worker
+            measure("worker process", render_pdf_in_worker, report, directory, args.repeat)
+
+            # The legacy exporter cannot render this at all (core fonts are Latin-1 only)
+            measure("render_pdf (unicode)", render_pdf, make_report(findings, unicode=True), directory, args.repeat)
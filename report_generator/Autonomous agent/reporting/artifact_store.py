@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+# Default retention: keep at most this many bytes of artifacts, none older than max_age
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+# Artifacts served or rendered this recently are never removed: their path may just
+# have been handed to a caller that is still streaming the file
+DEFAULT_GRACE = 10 * 60
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for rendered report files.
+
+    Each artifact is named by a hash of the report content, the output format and the
+    renderer version, so concurrent jobs never write to the same path unless they are
+    producing the identical file, and an artifact that already exists is served
+    without rendering again. Files are rendered to a unique temporary name and moved
+    into place atomically, so readers never observe a partially written report.
+    After each new artifact, files older than `max_age` seconds are removed, then the
+    least recently used ones until the store fits in `max_bytes`. Files used within the
+    last `grace` seconds are kept either way, so the store can briefly exceed its size.
+    """
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE, grace=DEFAULT_GRACE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.grace = grace
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key_for(report, format, version=1):
+        """Returns the content hash identifying `report` rendered as `format`."""
+        canonical = json.dumps(report, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha256()
+        digest.update(f"{format}\0{version}\0".encode("utf-8"))
+        digest.update(canonical.encode("utf-8"))
+        return digest.hexdigest()
+
+    def path_for(self, key, extension):
+        return os.path.join(self.root, f"report-{key[:32]}.{extension}")
+
+    def get_or_render(self, report, format, render, version=1, extension=None):
+        """
+        Returns the path of the artifact for `report` in `format`, rendering it first
+        if it does not exist yet.
+
+        Args:
+            report (dict): The report being exported.
+            format (str): Output format of the artifact.
+            render (callable): Called with a file path; must write the artifact there.
+            version (int): Renderer version; bump it when the output of `render` changes.
+            extension (str, optional): File extension, if different from `format`.
+        """
+        path = self.path_for(self.key_for(report, format, version), extension or format)
+
+        if os.path.exists(path):
+            # Refresh the access time used by the retention policy
+            os.utime(path)
+            return path
+
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            render(temp_path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        self.enforce_retention(keep=path)
+        return path
+
+    def enforce_retention(self, keep=None):
+        """
+        Deletes expired artifacts, then the least recently used ones while over the size
+        budget, sparing those used within the grace window.
+        """
+        with self._lock:
+            now = time.time()
+            artifacts = []
+            for entry in os.scandir(self.root):
+                if not entry.is_file() or not entry.name.startswith("report-") or entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                artifacts.append((stat.st_mtime, stat.st_size, entry.path))
+
+            artifacts.sort()
+            total = sum(size for _, size, _ in artifacts)
+
+            for mtime, size, path in artifacts:
+                if now - mtime <= self.max_age and total <= self.max_bytes:
+                    break
+                if path == keep or now - mtime < self.grace:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
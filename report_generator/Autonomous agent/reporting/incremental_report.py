@@ -0,0 +1,105 @@
+import heapq
+from itertools import count
+
+from reporting.report_generator import FINDING_LIMITS, build_report
+
+
+class IncrementalReportBuilder:
+    """
+    Builds a report while findings are still arriving.
+
+    Findings are kept in a bounded min-heap so the current best top-N by relevance is
+    always available without re-sorting everything seen so far. A provisional report
+    can be taken at any moment; the final report has the same shape as the one from
+    `generate_report`, plus 'status' and 'sources_processed'.
+    """
+
+    def __init__(self, topic, length="short"):
+        self.topic = topic
+        self.limit = FINDING_LIMITS.get(length)
+        self.sources_processed = 0
+        self._heap = []
+        self._order = count()
+
+    def add(self, finding, relevance=None):
+        """
+        Offers a finding to the report.
+
+        Args:
+            finding (dict | str): A summary record or plain text.
+            relevance (float, optional): Ranking score. Defaults to the finding's
+                         'relevance_score', then its 'confidence_score', then 0.
+
+        Returns:
+            bool: True if the finding is currently part of the top-N.
+        """
+        if relevance is None:
+            relevance = _relevance_of(finding)
+
+        self.sources_processed += 1
+
+        # Ties keep the earlier finding: on equal scores the later sequence number sorts lower
+        entry = (relevance, -next(self._order), finding)
+        if self.limit is None or len(self._heap) < self.limit:
+            heapq.heappush(self._heap, entry)
+            return True
+
+        return heapq.heappushpop(self._heap, entry) is not entry
+
+    def findings(self):
+        """Returns the current top findings, most relevant first."""
+        return [finding for _, _, finding in sorted(self._heap, key=lambda e: (e[0], e[1]), reverse=True)]
+
+    def provisional_report(self):
+        """Report built from the findings received so far."""
+        return self._report("provisional")
+
+    def final_report(self):
+        """Report to publish once no more findings will arrive."""
+        return self._report("final")
+
+    def _report(self, status):
+        report = build_report(self.topic, self.findings())
+        report["status"] = status
+        report["sources_processed"] = self.sources_processed
+        return report
+
+
+async def generate_report_incremental(findings, topic, length="short", on_update=None):
+    """
+    Builds a report from an async iterator of findings.
+
+    Args:
+        findings: Async iterator of summary records or strings, e.g. the completed
+                  records of `summarize_sources_stream`.
+        topic: research topic
+        length: short | medium | long
+        on_update: Optional callback (sync or async) receiving a provisional report
+                   whenever the top findings change.
+
+    Returns:
+        dict: The final report.
+    """
+    builder = IncrementalReportBuilder(topic, length)
+
+    async for finding in findings:
+        if isinstance(finding, dict) and ("chunk" in finding or finding.get("reset")) and not finding.get("done"):
+            # Partial text (or a retraction of it) from a streaming summarizer; wait for the complete record
+            continue
+        if isinstance(finding, dict):
+            finding = {key: value for key, value in finding.items() if key != "done"}
+
+        if builder.add(finding) and on_update is not None:
+            result = on_update(builder.provisional_report())
+            if hasattr(result, "__await__"):
+                await result
+
+    return builder.final_report()
+
+
+def _relevance_of(finding):
+    if isinstance(finding, dict):
+        for key in ("relevance_score", "confidence_score"):
+            if finding.get(key) is not None:
+                return float(finding[key])
+    return 0.0
@@ -0,0 +1,88 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+# Report keys written in the NDJSON header line; findings and sources get their own lines
+HEADER_KEYS = ("title", "topic", "date", "introduction", "conclusion", "status", "sources_processed")
+
+
+def dumps(obj, pretty=False):
+    """
+    Serializes to UTF-8 JSON bytes, using orjson when it is installed.
+
+    Compact output has no whitespace; pretty output is indented.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=str, option=option)
+
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=str).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def write_json(report, file_path, pretty=True):
+    with open(file_path, "wb") as f:
+        f.write(dumps(report, pretty=pretty))
+
+
+def iter_ndjson(report, findings=None, sources=None):
+    """
+    Yields the report as newline-delimited JSON, one encoded line at a time.
+
+    The first line holds the report metadata ('type': 'report'), followed by one
+    'finding' line per finding and one 'source' line per source. `findings` and
+    `sources` may be any iterables (e.g. generators over a very large job), in which
+    case they are used instead of the lists in `report` and never materialized.
+    """
+    header = {key: report[key] for key in HEADER_KEYS if key in report}
+    header["type"] = "report"
+    yield dumps(header) + b"\n"
+
+    seen_urls = set()
+    findings = report.get("findings", []) if findings is None else findings
+    for rank, finding in enumerate(findings, 1):
+        record = dict(finding) if isinstance(finding, dict) else {"summary": str(finding)}
+        record["type"] = "finding"
+        record["rank"] = rank
+        if record.get("url"):
+            seen_urls.add(record["url"])
+        yield dumps(record) + b"\n"
+
+    sources = report.get("sources") if sources is None else sources
+    if sources is None:
+        # Reports without a source list: cite the URLs the findings came from
+        sources = ({"url": url} for url in sorted(seen_urls))
+    for source in sources:
+        record = dict(source) if isinstance(source, dict) else {"url": str(source)}
+        record["type"] = "source"
+        yield dumps(record) + b"\n"
+
+
+async def aiter_ndjson(report, findings):
+    """
+    Async variant of `iter_ndjson` for findings that are still being produced,
+    e.g. to stream a report to an API client as summaries complete.
+    """
+    header = {key: report[key] for key in HEADER_KEYS if key in report}
+    header["type"] = "report"
+    yield dumps(header) + b"\n"
+
+    rank = 0
+    async for finding in findings:
+        rank += 1
+        record = dict(finding) if isinstance(finding, dict) else {"summary": str(finding)}
+        record["type"] = "finding"
+        record["rank"] = rank
+        yield dumps(record) + b"\n"
+
+
+def write_ndjson(report, file_path, findings=None, sources=None):
+    """Streams the report to `file_path` as NDJSON without building it in memory."""
+    with open(file_path, "wb") as f:
+        f.writelines(iter_ndjson(report, findings, sources))
@@ -1,78 +1,174 @@
-import json
+import csv
 import os
-from fpdf import FPDF
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from reporting import json_export
+from reporting.artifact_store import ArtifactStore
+from reporting.report_ir import ReportIR
 
 OUTPUT_DIR = "outputs"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Bump when the rendered output of any format changes, so stored artifacts are re-rendered
+RENDER_VERSION = 4
 
-def format_report(report, format="md"):
+# File extension per output format
+EXTENSIONS = {
+    "md": "md",
+    "json": "json",
+    "json-compact": "json",
+    "ndjson": "ndjson",
+    "pdf": "pdf",
+    "csv": "csv",
+    "essay": "txt",
+}
+
+default_store = ArtifactStore(OUTPUT_DIR)
+
+
+def format_report(report, format="md", store=None):
     if format == "json":
-        return export_json(report)
+        return export_json(report, store)
+    elif format == "json-compact":
+        return export_json(report, store, compact=True)
+    elif format == "ndjson":
+        return export_ndjson(report, store)
     elif format == "pdf":
-        return export_pdf(report)
+        return export_pdf(report, store)
+    elif format == "csv":
+        return export_csv(report, store)
+    elif format == "essay":
+        return export_essay(report, store)
     else:
-        return export_markdown(report)
+        return export_markdown(report, store)
+
+
+def export_all(report, formats=("pdf", "md", "essay", "json", "csv"), store=None):
+    """
+    Exports a report to several formats in one pass.
+
+    The report is normalized into a ReportIR once and all formats are rendered
+    concurrently, so the total time is close to that of the slowest format (PDF).
+
+    Returns:
+        dict: Artifact path per requested format.
+    """
+    ir = ReportIR.from_report(report)
+    writers = {
+        "md": partial(write_markdown, ir),
+        "json": partial(write_json, report),
+        "json-compact": partial(json_export.write_json, report, pretty=False),
+        "ndjson": partial(json_export.write_ndjson, report),
+        "pdf": partial(write_pdf, ir, in_worker=True),
+        "csv": partial(write_csv, ir),
+        "essay": partial(write_essay, ir),
+    }
+
+    unknown = [fmt for fmt in formats if fmt not in writers]
+    if unknown:
+        raise ValueError(f"Unsupported report format(s): {', '.join(unknown)}")
+
+    with ThreadPoolExecutor(max_workers=len(formats) or 1) as executor:
+        futures = {fmt: executor.submit(_export, report, fmt, writers[fmt], store) for fmt in formats}
+        return {fmt: future.result() for fmt, future in futures.items()}
+
+
+def export_markdown(report, store=None):
+    return _export(report, "md", partial(write_markdown, report), store)
+
+
+def export_json(report, store=None, compact=False):
+    if compact:
+        return _export(report, "json-compact", partial(json_export.write_json, report, pretty=False), store)
+    return _export(report, "json", partial(write_json, report), store)
 
 
-def export_markdown(report):
-    file_path = os.path.join(OUTPUT_DIR, "report.md")
+def export_ndjson(report, store=None):
+    return _export(report, "ndjson", partial(json_export.write_ndjson, report), store)
 
-    md = f"# {report['title']}\n\n"
-    md += f"**Topic:** {report['topic']}\n\n"
-    md += f"**Date:** {report['date']}\n\n"
+
+def export_pdf(report, store=None):
+    return _export(report, "pdf", partial(write_pdf, report), store)
+
+
+def export_csv(report, store=None):
+    return _export(report, "csv", partial(write_csv, report), store)
+
+
+def export_essay(report, store=None):
+    return _export(report, "essay", partial(write_essay, report), store)
+
+
+def _export(report, format, render, store):
+    store = store or default_store
+    return store.get_or_render(report, format, render, version=RENDER_VERSION,
+                               extension=EXTENSIONS[format])
+
+
+def write_markdown(report, file_path):
+    ir = ReportIR.from_report(report)
+
+    md = f"# {ir.title}\n\n"
+    md += f"**Topic:** {ir.topic}\n\n"
+    md += f"**Date:** {ir.date}\n\n"
 
     md += "## Introduction\n"
-    md += report["introduction"] + "\n\n"
+    md += ir.introduction + "\n\n"
 
     md += "## Key Findings\n"
-    for i, item in enumerate(report["findings"], 1):
-        md += f"- **Finding {i}:** {item}\n"
+    for i, finding in enumerate(ir.findings, 1):
+        md += f"- **Finding {i}:** {finding['text']}"
+        if finding["url"]:
+            md += f" ([source]({finding['url']}))"
+        md += "\n"
 
     md += "\n## Conclusion\n"
-    md += report["conclusion"]
+    md += ir.conclusion
 
     with open(file_path, "w", encoding="utf-8") as f:
         f.write(md)
 
-    return file_path
 
+def write_json(report, file_path):
+    json_export.write_json(report, file_path)
 
-def export_json(report):
-    file_path = os.path.join(OUTPUT_DIR, "report.json")
 
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(report, f, indent=4)
+def write_csv(report, file_path):
+    ir = ReportIR.from_report(report)
 
-    return file_path
+    with open(file_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank", "finding", "url", "confidence_score", "relevance_score"])
+        for i, finding in enumerate(ir.findings, 1):
+            writer.writerow([i, finding["text"], finding["url"] or "", _blank(finding["confidence"]),
+                             _blank(finding["relevance"])])
 
 
-def export_pdf(report):
-    file_path = os.path.join(OUTPUT_DIR, "report.pdf")
+def write_essay(report, file_path):
+    ir = ReportIR.from_report(report)
+    texts = ir.finding_texts()
 
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
+    paragraphs = [ir.title, f"{ir.topic} ({ir.date})", ir.introduction]
+    if texts:
+        paragraphs.append(f"The research surfaced {len(texts)} key findings.")
+        for i, text in enumerate(texts):
+            opener = "First," if i == 0 else ("Finally," if i == len(texts) - 1 else "In addition,")
+            paragraphs.append(f"{opener} {text}")
+    paragraphs.append(ir.conclusion)
 
-    pdf.cell(0, 10, report["title"], ln=True)
-    pdf.ln(5)
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write("\n\n".join(paragraphs) + "\n")
 
-    pdf.multi_cell(0, 8, f"Topic: {report['topic']}")
-    pdf.multi_cell(0, 8, f"Date: {report['date']}")
-    pdf.ln(5)
 
-    pdf.multi_cell(0, 8, "Introduction")
-    pdf.multi_cell(0, 8, report["introduction"])
-    pdf.ln(5)
+def write_pdf(report, file_path, in_worker=False):
+    # fpdf is only loaded once a PDF is asked for
+    from reporting.pdf_export import render_pdf, render_pdf_in_worker
 
-    pdf.multi_cell(0, 8, "Key Findings")
-    for item in report["findings"]:
-        pdf.multi_cell(0, 8, f"- {item}")
+    if in_worker:
+        render_pdf_in_worker(report, file_path)
+    else:
+        render_pdf(report, file_path)
 
-    pdf.ln(5)
-    pdf.multi_cell(0, 8, "Conclusion")
-    pdf.multi_cell(0, 8, report["conclusion"])
 
-    pdf.output(file_path)
-    return file_path
+def _blank(value):
+    return "" if value is None else value
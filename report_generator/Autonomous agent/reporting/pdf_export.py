@@ -0,0 +1,321 @@
+import logging
+import multiprocessing
+import os
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+import fpdf
+from fpdf import FPDF
+from reporting.report_ir import ReportIR
+
+# Unicode TrueType font used for reports with text outside Latin-1; set REPORT_PDF_FONT
+# to override. Latin-1 reports use the (much cheaper) core Arial font, as does every
+# report when no TrueType font is found, in which case other characters are replaced.
+FONT_CANDIDATES = [
+    os.getenv("REPORT_PDF_FONT", ""),
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "C:\\Windows\\Fonts\\arial.ttf",
+]
+
+# The font caching below works on fpdf internals and is only enabled on the version it
+# was written for (pinned in pyproject.toml); others embed fonts the stock way
+FONT_CACHING = getattr(fpdf, "__version__", None) == "1.7.2"
+
+# Parsed TTF metrics are pickled here and reused by every later report (and process)
+FONT_CACHE_DIR = os.getenv("REPORT_PDF_FONT_CACHE", os.path.join(".cache", "pdf-fonts"))
+
+# Embedded font subsets kept per (font file, used characters)
+SUBSET_CACHE_SIZE = 32
+
+PAGE_MARGIN = 15
+LINE_HEIGHT = 6
+BODY_SIZE = 11
+HEADING_SIZE = 14
+TITLE_SIZE = 18
+
+logger = logging.getLogger(__name__)
+
+# Word widths per (font, size), shared across reports rendered by this process
+_WIDTHS = {}
+_WIDTHS_LOCK = threading.Lock()
+_FONT_PATH = None
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+if FONT_CACHING:
+    class _CachedSubsetFont(fpdf.fpdf.TTFontFile):
+        """
+        TTFontFile that remembers the font subsets it builds.
+
+        Reports mostly use the same characters, so the subset embedded in one PDF can
+        be reused by the next instead of re-parsing the TrueType file every time.
+        """
+
+        _subsets = {}
+        _lock = threading.Lock()
+
+        def makeSubset(self, file, subset):
+            key = (file, os.path.getmtime(file), tuple(sorted(subset)))
+            with self._lock:
+                cached = self._subsets.get(key)
+
+            if cached is None:
+                stream = super().makeSubset(file, subset)
+                cached = (stream, dict(self.codeToGlyph), self.maxUni)
+                with self._lock:
+                    if len(self._subsets) >= SUBSET_CACHE_SIZE:
+                        self._subsets.pop(next(iter(self._subsets)))
+                    self._subsets[key] = cached
+
+            stream, code_to_glyph, self.maxUni = cached
+            self.codeToGlyph = dict(code_to_glyph)
+            return stream
+
+
+def _with_fpdf_globals(function, **overrides):
+    """
+    Copy of an FPDF method that sees `overrides` in place of fpdf's module globals, so
+    `_ReportPDF` can change how fonts are cached without affecting any other FPDF.
+    """
+    namespace = dict(function.__globals__, **overrides)
+    return types.FunctionType(function.__code__, namespace, function.__name__,
+                              function.__defaults__, function.__closure__)
+
+
+def render_pdf(report, file_path):
+    """
+    Renders a report to PDF.
+
+    Paragraphs are wrapped with cached word widths and written as whole lines, rather
+    than measured character by character through `multi_cell`, which keeps large
+    reports (hundreds of findings) fast.
+    """
+    ir = ReportIR.from_report(report)
+    pdf = _ReportPDF()
+    pdf.set_auto_page_break(auto=True, margin=PAGE_MARGIN)
+    pdf.set_margins(PAGE_MARGIN, PAGE_MARGIN)
+    family = _set_up_font(pdf, _needs_unicode(ir))
+    writer = _TextWriter(pdf, family)
+
+    pdf.add_page()
+    writer.paragraph(ir.title, TITLE_SIZE, line_height=9)
+    writer.paragraph(f"Topic: {ir.topic}", BODY_SIZE)
+    writer.paragraph(f"Date: {ir.date}", BODY_SIZE)
+    writer.gap()
+
+    writer.paragraph("Introduction", HEADING_SIZE, line_height=8)
+    writer.paragraph(ir.introduction, BODY_SIZE)
+    writer.gap()
+
+    writer.paragraph("Key Findings", HEADING_SIZE, line_height=8)
+    for finding in ir.findings:
+        writer.paragraph(f"- {finding['text']}", BODY_SIZE)
+        if finding["url"]:
+            writer.paragraph(f"  Source: {finding['url']}", BODY_SIZE - 2, line_height=5)
+
+    writer.gap()
+    writer.paragraph("Conclusion", HEADING_SIZE, line_height=8)
+    writer.paragraph(ir.conclusion, BODY_SIZE)
+
+    pdf.output(file_path)
+
+
+def render_pdf_in_worker(report, file_path):
+    """
+    Renders a report to PDF in a worker process and waits for it.
+
+    Worker processes are reused, so their font and width caches stay warm, and the
+    calling process's GIL stays free for other exports. Set REPORT_PDF_WORKERS to
+    control the number of worker processes (one per CPU by default, 0 renders in the
+    calling process).
+    """
+    executor = _get_executor()
+    if executor is None:
+        return render_pdf(report, file_path)
+
+    # Normalized here so the worker is sent the compact IR rather than the raw report
+    ir = ReportIR.from_report(report)
+    executor.submit(render_pdf, ir, file_path).result()
+
+
+def _get_executor():
+    global _executor
+    workers = int(os.getenv("REPORT_PDF_WORKERS", str(os.cpu_count() or 1)))
+    if workers <= 0:
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            # Spawned, not forked: the calling process runs an event loop and threads
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+class _ReportPDF(FPDF):
+    """
+    FPDF with the per-report cost of embedding a Unicode font cached (see FONT_CACHING):
+    parsed metrics are pickled to FONT_CACHE_DIR, and subsets and width tables are
+    reused. Only the renderer in this module uses it; plain FPDF instances behave as
+    shipped.
+    """
+
+    if FONT_CACHING:
+        add_font = _with_fpdf_globals(FPDF.add_font, FPDF_CACHE_MODE=2, FPDF_CACHE_DIR=FONT_CACHE_DIR)
+        _putfonts = _with_fpdf_globals(FPDF._putfonts, TTFontFile=_CachedSubsetFont)
+
+        _width_tables = {}
+        _width_tables_lock = threading.Lock()
+
+        def _putTTfontwidths(self, font, maxUni):
+            # The width table only depends on the font and the characters used
+            key = (font.get('ttffile'), maxUni, tuple(sorted(font['subset'])))
+            with self._width_tables_lock:
+                table = self._width_tables.get(key)
+
+            if table is None:
+                lines = []
+                subset = font['subset']
+                # FPDF tests membership in this list once per code point; give it a set
+                font['subset'] = _SubsetList(subset)
+                self._out = lines.append
+                try:
+                    super()._putTTfontwidths(font, maxUni)
+                finally:
+                    del self._out
+                    font['subset'] = subset
+                table = lines
+                with self._width_tables_lock:
+                    if len(self._width_tables) >= SUBSET_CACHE_SIZE:
+                        self._width_tables.pop(next(iter(self._width_tables)))
+                    self._width_tables[key] = table
+
+            for line in table:
+                self._out(line)
+
+
+class _SubsetList(list):
+    """List with constant-time membership tests."""
+
+    def __init__(self, items):
+        super().__init__(items)
+        self._members = set(items)
+
+    def __contains__(self, item):
+        return item in self._members
+
+
+def _needs_unicode(ir):
+    parts = [ir.title, ir.topic, ir.date, ir.introduction, ir.conclusion]
+    for finding in ir.findings:
+        parts.append(finding["text"])
+        parts.append(finding["url"] or "")
+    try:
+        "".join(parts).encode("latin-1")
+    except UnicodeEncodeError:
+        return True
+    return False
+
+
+def _set_up_font(pdf, needs_unicode):
+    global _FONT_PATH
+    if not needs_unicode:
+        return "Arial"
+
+    if _FONT_PATH is None:
+        _FONT_PATH = next((path for path in FONT_CANDIDATES if path and os.path.exists(path)), "")
+
+    if _FONT_PATH:
+        try:
+            os.makedirs(FONT_CACHE_DIR, exist_ok=True)
+            pdf.add_font("ReportSans", "", _FONT_PATH, uni=True)
+            return "ReportSans"
+        except Exception as e:
+            logger.warning("Could not load PDF font %s: %s; using Arial", _FONT_PATH, e)
+            _FONT_PATH = ""
+
+    return "Arial"
+
+
+class _TextWriter:
+    """Wraps and writes paragraphs using per-word width caching."""
+
+    def __init__(self, pdf, family):
+        self.pdf = pdf
+        self.family = family
+        self.unicode = family != "Arial"
+        self.width = pdf.w - 2 * PAGE_MARGIN
+
+    def gap(self):
+        self.pdf.ln(4)
+
+    def paragraph(self, text, size, line_height=LINE_HEIGHT):
+        self.pdf.set_font(self.family, size=size)
+        if not self.unicode:
+            # Core fonts only cover Latin-1
+            text = text.encode("latin-1", "replace").decode("latin-1")
+
+        for line in self._wrap(text, size):
+            self.pdf.cell(0, line_height, line, ln=1)
+
+    def _wrap(self, text, size):
+        widths = self._widths(size)
+        space = self._width_of(" ", widths)
+        lines = []
+
+        for raw_line in text.splitlines() or [""]:
+            current = []
+            current_width = 0.0
+            for word in raw_line.split(" "):
+                width = self._width_of(word, widths)
+
+                if width > self.width:
+                    # A single word wider than the page (e.g. a long URL) is hard-split
+                    if current:
+                        lines.append(" ".join(current))
+                        current, current_width = [], 0.0
+                    pieces = self._split_word(word, widths)
+                    lines.extend(pieces[:-1])
+                    word = pieces[-1]
+                    width = self._width_of(word, widths)
+
+                added = width if not current else current_width + space + width
+                if current and added > self.width:
+                    lines.append(" ".join(current))
+                    current, current_width = [word], width
+                else:
+                    current.append(word)
+                    current_width = added
+
+            lines.append(" ".join(current))
+
+        return lines
+
+    def _split_word(self, word, widths):
+        pieces = []
+        current = ""
+        for char in word:
+            if current and self._width_of(current + char, widths) > self.width:
+                pieces.append(current)
+                current = ""
+            current += char
+        pieces.append(current)
+        return pieces
+
+    def _widths(self, size):
+        key = (self.family, size)
+        with _WIDTHS_LOCK:
+            return _WIDTHS.setdefault(key, {})
+
+    def _width_of(self, word, widths):
+        width = widths.get(word)
+        if width is None:
+            width = self.pdf.get_string_width(word)
+            # Bound the cache: very rare words are not worth remembering forever
+            if len(widths) < 200000:
+                widths[word] = width
+        return width
@@ -1,6 +1,12 @@
 # report_generator.py
 from datetime import datetime
 
+# Number of findings kept per report length (None keeps all of them)
+FINDING_LIMITS = {
+    "short": 3,
+    "medium": 5,
+}
+
 async def generate_report(summaries, topic, length="short", format="md"):
     """
     summaries: list of dicts or strings
@@ -9,22 +15,23 @@ async def generate_report(summaries, topic, length="short", format="md"):
     format: md | pdf | json
     """
 
-    date = datetime.now().strftime("%Y-%m-%d")
-
     # Adjust number of points based on length
-    if length == "short":
-        selected = summaries[:3]
-    elif length == "medium":
-        selected = summaries[:5]
-    else:
-        selected = summaries
+    limit = FINDING_LIMITS.get(length)
+    selected = summaries[:limit] if limit is not None else summaries
+
+    return build_report(topic, selected)
+
+
+def build_report(topic, findings):
+    """Assembles the report dictionary shared by all report builders."""
+    date = datetime.now().strftime("%Y-%m-%d")
 
     report = {
         "title": f"Autonomous Web Research Report",
         "topic": topic,
         "date": date,
         "introduction": f"This report presents automated research findings on the topic: {topic}.",
-        "findings": selected,
+        "findings": findings,
         "conclusion": f"The research highlights key insights related to {topic} based on web data."
     }
 
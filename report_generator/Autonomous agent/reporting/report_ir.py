@@ -0,0 +1,46 @@
+class ReportIR:
+    """
+    Format-independent representation of a report.
+
+    Built once from the report dictionary (normalizing findings that may be plain
+    strings or summary records) and shared by every renderer, so exporting several
+    formats does not redo that work per format.
+    """
+
+    def __init__(self, title, topic, date, introduction, findings, conclusion):
+        self.title = title
+        self.topic = topic
+        self.date = date
+        self.introduction = introduction
+        self.findings = findings
+        self.conclusion = conclusion
+
+    @classmethod
+    def from_report(cls, report):
+        if isinstance(report, cls):
+            return report
+
+        return cls(
+            title=report["title"],
+            topic=report["topic"],
+            date=report["date"],
+            introduction=report["introduction"],
+            findings=[_normalize_finding(item) for item in report["findings"]],
+            conclusion=report["conclusion"],
+        )
+
+    def finding_texts(self):
+        return [finding["text"] for finding in self.findings]
+
+
+def _normalize_finding(item):
+    """Turns a finding (string or summary record) into a uniform dictionary."""
+    if isinstance(item, dict):
+        return {
+            "text": str(item.get("summary") or item.get("text") or ""),
+            "url": item.get("url"),
+            "confidence": item.get("confidence_score"),
+            "relevance": item.get("relevance_score"),
+        }
+
+    return {"text": str(item), "url": None, "confidence": None, "relevance": None}
@@ -0,0 +1 @@
+"""Long-running research service exposing the full pipeline over HTTP."""
@@ -0,0 +1,3 @@
+from research_service.cli import main
+
+main()
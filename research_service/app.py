@@ -0,0 +1,264 @@
+"""
+ASGI research service.
+
+Run with:
+    uvicorn research_service.app:app --host 0.0.0.0 --port 8000
+
+Every request is served on one long-lived event loop and shares the pipeline's
+connection pool, model concurrency controller and summary cache. Research requests
+run as persistent jobs, so a job interrupted by a restart resumes where it stopped.
+
+Set RESEARCH_PROCESSES to run jobs in that many worker processes instead of this one
+(see research_service.workers); RESEARCH_WORKERS is the number of jobs each process
+runs at a time.
+
+GET /metrics serves per-stage latency histograms, error and cache counters in the
+Prometheus text format, and GET /jobs/{id}/trace a job's trace for chrome://tracing
+(see research_service.telemetry). Jobs submitted with "profile": true (or a
+fraction RESEARCH_PROFILE of all jobs) are profiled; GET /jobs/{id}/profile/cpu and
+/jobs/{id}/profile/memory serve the results (see research_service.profiling).
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+
+from research_service import logs, profiling, telemetry
+from research_service.events import EventBus, sse_stream
+from research_service.jobs import DONE, FAILED, JobStore, JobWorkerPool
+from research_service.pipeline import ResearchPipeline, ResearchRequest
+from research_service.scheduler import PRIORITIES, AdmissionController, Overloaded
+from research_service.workers import DEFAULT_PROCESSES, WorkerProcesses
+
+# Origins allowed to call the API from a browser (the React dev server by default)
+CORS_ORIGINS = os.getenv("RESEARCH_CORS_ORIGINS", "http://localhost:3000").split(",")
+
+# Jobs run concurrently per process
+WORKERS = int(os.getenv("RESEARCH_WORKERS", "8"))
+
+pipeline = ResearchPipeline()
+store = JobStore()
+events = EventBus()
+# With worker processes, this process only queues jobs and relays their events
+workers = JobWorkerPool(pipeline, store, workers=0 if DEFAULT_PROCESSES else WORKERS, events=events)
+processes = WorkerProcesses(events, DEFAULT_PROCESSES, WORKERS) if DEFAULT_PROCESSES else None
+admission = AdmissionController(store)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    logs.configure()
+    await pipeline.start()
+    workers.start()
+    if processes is not None:
+        processes.start()
+    try:
+        yield
+    finally:
+        if processes is not None:
+            await processes.close()
+        await workers.close()
+        await pipeline.close()
+        store.close()
+        logs.shutdown()
+
+
+def _parse_request(data):
+    try:
+        return ResearchRequest.from_dict(data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _submit(data):
+    """
+    Validates and admits a request, and queues it. An identical request that is
+    already queued or running is joined instead of starting a second pipeline run.
+    The job store is shared with other processes, so it is only used from threads.
+
+    Returns:
+        dict: 'id', 'status', 'estimated_wait' and 'coalesced' (whether an existing
+              job was joined).
+    """
+    research_request = _parse_request(data)
+    job_id = await asyncio.to_thread(store.attach, research_request.dedupe_key())
+    if job_id is not None:
+        job = await asyncio.to_thread(store.get, job_id)
+        wait = 0.0
+        if job["status"] == "queued":
+            wait = await asyncio.to_thread(admission.estimate_wait, job["priority"])
+        return {"id": job_id, "status": job["status"], "estimated_wait": round(wait, 1), "coalesced": True}
+
+    try:
+        priority, cost, wait = await asyncio.to_thread(admission.admit, research_request)
+    except Overloaded as e:
+        raise HTTPException(status_code=429,
+                            detail={"error": str(e), "estimated_wait": round(e.estimated_wait),
+                                    "retry_after": e.retry_after},
+                            headers={"Retry-After": str(e.retry_after)})
+    job_id = await workers.submit(research_request, priority=priority, cost=cost)
+    return {"id": job_id, "status": "queued", "estimated_wait": round(wait, 1), "coalesced": False}
+
+
+def _job_result(job):
+    result = dict(job["result"])
+    result.pop("artifact", None)
+    result["download_url"] = f"/download/{job['id']}"
+    return result
+
+
+app = FastAPI(title="Autonomous Web Research Service", lifespan=lifespan)
+app.add_middleware(CORSMiddleware, allow_origins=CORS_ORIGINS, allow_methods=["*"], allow_headers=["*"],
+                   expose_headers=["Retry-After"])
+
+
+@app.post("/research")
+async def research(request: Request):
+    """Runs a research job and waits for its report."""
+    job_id = (await _submit(await request.json()))["id"]
+    # The job's event stream ends when it is done or has failed for good
+    async for _ in events.subscribe(job_id):
+        pass
+    job = await asyncio.to_thread(store.get, job_id)
+    if job["status"] == FAILED:
+        raise HTTPException(status_code=500, detail=job["error"])
+    return _job_result(job)
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: Request):
+    """
+    Queues a research job and returns its id and estimated wait without waiting for
+    it. Responds 429 with a Retry-After header when the service is overloaded.
+    """
+    submitted = await _submit(await request.json())
+    submitted["status_url"] = f"/jobs/{submitted['id']}"
+    return submitted
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = await asyncio.to_thread(store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    if job["status"] == DONE:
+        job["result"] = _job_result(job)
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Streams the job's progress as server-sent events: 'job' (status changes),
+    'stage' (a stage started or finished, with its partial results), 'progress'
+    (coalesced counters) and 'summary' (each summary as soon as it is ready).
+    """
+    job = await asyncio.to_thread(store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+
+    if not events.has(job_id) and job["status"] in (DONE, FAILED):
+        # Finished before this process started (or too long ago); report the outcome only
+        events.publish(job_id, {"type": "job", "status": job["status"], "error": job["error"]})
+        events.close(job_id)
+
+    try:
+        after = int(request.headers.get("last-event-id", "0"))
+    except ValueError:
+        after = 0
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(sse_stream(events, job_id, after), media_type="text/event-stream", headers=headers)
+
+
+@app.get("/jobs/{job_id}/trace")
+async def job_trace(job_id: str):
+    """The job's spans in the Chrome trace-event format, written when the job ends."""
+    path = telemetry.trace_path(job_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="No trace for this job id")
+    return FileResponse(path, media_type="application/json", filename=f"trace-{job_id}.json")
+
+
+@app.get("/jobs/{job_id}/profile/{kind}")
+async def job_profile(job_id: str, kind: str):
+    """
+    The profile of a job run with profiling on: 'cpu' gives the sampled stacks in the
+    collapsed (folded) format flame graph tools read, 'memory' the top allocations
+    per stage.
+    """
+    paths = {"cpu": profiling.folded_path(job_id), "memory": profiling.memory_path(job_id)}
+    if kind not in paths:
+        raise HTTPException(status_code=404, detail="Profile kind must be 'cpu' or 'memory'")
+    if not os.path.exists(paths[kind]):
+        raise HTTPException(status_code=404, detail="No profile for this job id")
+    media_type = "text/plain" if kind == "cpu" else "application/json"
+    return FileResponse(paths[kind], media_type=media_type, filename=os.path.basename(paths[kind]))
+
+
+@app.post("/jobs/{job_id}/retry")
+async def retry_job(job_id: str):
+    """Queues a failed job again; completed stages are not repeated."""
+    if not await asyncio.to_thread(store.retry, job_id):
+        return JSONResponse(status_code=409, content={"detail": "Job is not in the failed state"})
+    events.reopen(job_id)
+    events.publish(job_id, {"type": "job", "status": "queued"})
+    workers.submit_wakeup()
+    return {"id": job_id, "status": "queued"}
+
+
+@app.get("/download/{report_id}")
+async def download(report_id: str):
+    job = await asyncio.to_thread(store.get, report_id)
+    path = job["result"]["artifact"] if job is not None and job["status"] == DONE else None
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Unknown or expired report id")
+
+    extension = os.path.splitext(path)[1]
+    return FileResponse(path, filename=f"research-report{extension}")
+
+
+@app.post("/search")
+async def search(request: Request):
+    """Search only; same response shape as the Flask demo in team -2/web_demo.py."""
+    data = await request.json()
+    queries = data.get("queries", []) if isinstance(data, dict) else []
+    if not queries:
+        raise HTTPException(status_code=400, detail="No queries provided")
+
+    start_time = time.time()
+    results = await pipeline.search(queries)
+    return {
+        "queries_searched": len(queries),
+        "total_results": len(results),
+        "search_time": time.time() - start_time,
+        "results": results,
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Metrics of this process and of its worker processes, for Prometheus to scrape."""
+    return PlainTextResponse(telemetry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health")
+async def health():
+    shared_cache, throughput, backlog = await asyncio.gather(
+        asyncio.to_thread(pipeline.shared_cache.stats),
+        asyncio.to_thread(admission.throughput),
+        asyncio.to_thread(store.backlog, max(PRIORITIES.values())),
+    )
+    return {
+        "status": "ok",
+        "worker_processes": DEFAULT_PROCESSES,
+        "model_concurrency": pipeline.controller.metrics(),
+        "shared_cache": shared_cache,
+        "throughput": throughput,
+        "backlog": backlog,
+    }
@@ -0,0 +1,343 @@
+"""
+Offline benchmark suite with regression gates.
+
+Times each pipeline component, and the whole pipeline, on recorded fixtures (see
+research_service.replay) and a stand-in model server, so results do not depend on
+the network or on live search rankings:
+
+    python -m research_service.bench                  # run everything
+    python -m research_service.bench --filter parse   # only cases whose name matches
+
+Every run is appended to a history file. The median time and peak traced memory of
+each case are compared with a baseline (or --baseline FILE); a case more than
+--max-slowdown slower or --max-memory-growth larger is reported as a regression and
+the exit status is 1. The first run on a machine becomes its baseline, and the
+baseline stays pinned until --update-baseline makes a later run the new one, so
+small slowdowns that each pass the gate cannot add up unnoticed.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import aiohttp
+
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+from concurrency import AdaptiveConcurrencyController
+from content_extractor import extract_main_text
+from data_processor import clean_text
+from fake_ollama import FakeOllama, start_server
+from relevance_ranker import rank_documents
+from reporting.artifact_store import ArtifactStore
+from reporting.output_controller import format_report
+from reporting.report_generator import build_report
+import summarizer
+from summary_cache import SummaryCache
+from web_search import WebSearchModule, search_multiple_queries
+
+from research_service.pipeline import ResearchPipeline, ResearchRequest
+from research_service.replay import Fixtures, ReplaySession
+from research_service.shared_cache import SharedCache
+
+HISTORY_PATH = os.getenv("RESEARCH_BENCH_HISTORY", os.path.join(".cache", "bench", "history.jsonl"))
+
+# Default regression thresholds, relative to the baseline
+MAX_SLOWDOWN = 0.15
+MAX_MEMORY_GROWTH = 0.20
+
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS_DELTA = 0.002
+MIN_MEMORY_DELTA = 256 * 1024
+
+# Documents ranked and summarized per run (fixture pages are repeated to reach it)
+RANKED_DOCUMENTS = 100
+SUMMARIZED_DOCUMENTS = 40
+
+SEARCH_PROVIDERS = {
+    "scraping": {},
+    "serpapi": {"SERPAPI_KEY": "replay"},
+    "bing": {"BING_API_KEY": "replay"},
+}
+
+
+class Case:
+    """
+    One benchmark: `run` is a callable or coroutine function processing `items`
+    units of work (pages, documents, bytes...) per call.
+    """
+
+    def __init__(self, name, run, items, unit):
+        self.name = name
+        self.run = run
+        self.items = items
+        self.unit = unit
+
+
+def build_cases(fixtures):
+    pages = fixtures.of_kind("page")
+    texts = [extract_main_text(html) for html in pages]
+    cleaned = [clean_text(text) for text in texts]
+    documents = [
+        {"url": f"https://bench.local/{i}", "title": f"Document {i}", "content": cleaned[i % len(cleaned)]}
+        for i in range(RANKED_DOCUMENTS)
+    ]
+    topic = fixtures.queries[0]
+    ranked = rank_documents([dict(doc) for doc in documents], topic)
+    report = build_report(topic, [
+        {"url": doc["url"], "summary": doc["content"][:600], "confidence_score": 0.85} for doc in ranked
+    ])
+    searcher = WebSearchModule()
+    cases = []
+
+    for engine in ("duckduckgo", "brave", "google"):
+        serps = fixtures.of_kind(f"serp:{engine}")
+        parse = getattr(searcher, f"_parse_{engine}")
+        cases.append(Case(f"parse.{engine}", lambda serps=serps, parse=parse: [parse(html) for html in serps],
+                          len(serps), "pages"))
+
+    for provider, env in SEARCH_PROVIDERS.items():
+        async def search(env=env):
+            with _environment(env):
+                return await search_multiple_queries(fixtures.queries, ReplaySession(fixtures))
+        cases.append(Case(f"search.{provider}", search, len(fixtures.queries), "queries"))
+
+    cases.append(Case("extract_main_text", lambda: [extract_main_text(html) for html in pages],
+                      sum(len(html) for html in pages), "bytes"))
+    cases.append(Case("clean_text", lambda: [clean_text(text) for text in texts],
+                      sum(len(text) for text in texts), "bytes"))
+    cases.append(Case("rank_documents", lambda: rank_documents([dict(doc) for doc in documents], topic),
+                      len(documents), "docs"))
+
+    async def summarize():
+        controller = AdaptiveConcurrencyController(initial_limit=16, max_limit=16)
+        async with aiohttp.ClientSession() as session:
+            return await summarizer.summarize_sources(documents[:SUMMARIZED_DOCUMENTS], topic, controller,
+                                                      session=session)
+    cases.append(Case("summarize_sources", summarize, SUMMARIZED_DOCUMENTS, "docs"))
+
+    for output_format in ("md", "json", "csv", "essay", "pdf"):
+        def render(output_format=output_format):
+            # A fresh store each time, so the artifact is rendered rather than reused
+            with tempfile.TemporaryDirectory() as directory:
+                return format_report(report, output_format, ArtifactStore(directory))
+        cases.append(Case(f"format_report.{output_format}", render, len(report["findings"]), "findings"))
+
+    async def pipeline():
+        with tempfile.TemporaryDirectory() as directory:
+            research = ResearchPipeline(cache=SummaryCache(os.path.join(directory, "summaries.sqlite3")),
+                                        shared_cache=SharedCache(os.path.join(directory, "shared.sqlite3")))
+            await research.start()
+            passthrough = research.session
+            research.session = ReplaySession(fixtures, passthrough=passthrough)
+            try:
+                request = ResearchRequest(fixtures.queries[0], keywords=_keywords(fixtures),
+                                          number_of_sources=20, output_format="md")
+                return await research.run(request)
+            finally:
+                research.session = passthrough
+                await research.close()
+    cases.append(Case("pipeline", pipeline, 1, "jobs"))
+
+    return cases
+
+
+def _keywords(fixtures):
+    """Keywords that turn the first fixture query into the others."""
+    first = fixtures.queries[0]
+    return [query[len(first):].strip() for query in fixtures.queries[1:] if query.startswith(first)]
+
+
+class _environment:
+    """Sets environment variables for the duration of a `with` block."""
+
+    def __init__(self, values):
+        self.values = values
+        self.saved = {}
+
+    def __enter__(self):
+        for name, value in self.values.items():
+            self.saved[name] = os.environ.get(name)
+            os.environ[name] = value
+
+    def __exit__(self, exc_type, exc, tb):
+        for name, value in self.saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        return False
+
+
+async def _call(run):
+    result = run()
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result
+
+
+async def measure(case, repeat):
+    """Returns median and best seconds, throughput and peak traced memory of a case."""
+    await _call(case.run)  # warm-up: imports, caches, connection set-up
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await _call(case.run)
+        timings.append(time.perf_counter() - start)
+
+    # Memory is traced in a separate run; tracemalloc slows everything down considerably
+    tracemalloc.start()
+    await _call(case.run)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    median = statistics.median(timings)
+    return {
+        "median": median,
+        "best": min(timings),
+        "items": case.items,
+        "unit": case.unit,
+        "per_sec": case.items / median if median else None,
+        "peak_bytes": peak,
+    }
+
+
+def find_regressions(results, baseline, max_slowdown=MAX_SLOWDOWN, max_memory_growth=MAX_MEMORY_GROWTH):
+    """Returns a list of (case, message) for cases that got slower or bigger than allowed."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        slower = result["median"] - base["median"]
+        if slower > MIN_SECONDS_DELTA and result["median"] > base["median"] * (1 + max_slowdown):
+            regressions.append((name, f"median {base['median'] * 1000:.1f} -> {result['median'] * 1000:.1f} ms "
+                                      f"(+{slower / base['median']:.0%})"))
+        bigger = result["peak_bytes"] - base["peak_bytes"]
+        if bigger > MIN_MEMORY_DELTA and result["peak_bytes"] > base["peak_bytes"] * (1 + max_memory_growth):
+            regressions.append((name, f"peak memory {base['peak_bytes'] / 1e6:.1f} -> "
+                                      f"{result['peak_bytes'] / 1e6:.1f} MB (+{bigger / base['peak_bytes']:.0%})"))
+    return regressions
+
+
+def load_baseline(path=None, history=HISTORY_PATH):
+    """
+    Returns the results of a saved run: the file at `path`, or else the run in `history`
+    from this machine and Python version that was last made the baseline (None if
+    there is none).
+    """
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    if not os.path.exists(history):
+        return None
+    environment = _environment_info()
+    baseline = None
+    with open(history, encoding="utf-8") as f:
+        for line in f:
+            run = json.loads(line)
+            if run.get("environment") == environment and run.get("baseline"):
+                baseline = run
+    return baseline
+
+
+def save_run(run, history=HISTORY_PATH):
+    directory = os.path.dirname(history)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(history, "a", encoding="utf-8") as f:
+        f.write(json.dumps(run) + "\n")
+
+
+def _environment_info():
+    return {"machine": platform.node(), "python": platform.python_version(), "cpus": os.cpu_count()}
+
+
+def print_table(results, baseline):
+    print(f"{'case':<24} {'median ms':>10} {'best ms':>9} {'throughput':>18} {'peak MB':>8} {'vs base':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        change = f"{result['median'] / base['median'] - 1:+.0%}" if base and base["median"] else "-"
+        throughput = f"{result['per_sec']:.1f} {result['unit']}/s" if result["per_sec"] else "-"
+        print(f"{name:<24} {result['median'] * 1000:10.1f} {result['best'] * 1000:9.1f} {throughput:>18} "
+              f"{result['peak_bytes'] / 1e6:8.1f} {change:>8}")
+
+
+async def main(args):
+    fixtures = Fixtures.load(args.fixtures) if args.fixtures else Fixtures.load()
+    model = FakeOllama(latency=args.model_latency_ms / 1000, jitter=0.0, tokens=60, tokens_per_sec=1e6,
+                       parallel=64, seed=0)
+    runner, summarizer.OLLAMA_API_URL = await start_server(model)
+
+    results = {}
+    try:
+        cases = build_cases(fixtures)
+        for case in cases:
+            if args.filter and not any(pattern in case.name for pattern in args.filter):
+                continue
+            print(f"Running {case.name}...", file=sys.stderr)
+            results[case.name] = await measure(case, args.repeat)
+    finally:
+        await runner.cleanup()
+
+    run = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "environment": _environment_info(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    baseline_run = load_baseline(args.baseline)
+    baseline = baseline_run["results"] if baseline_run else {}
+
+    print()
+    print_table(results, baseline)
+    regressions = find_regressions(results, baseline, args.max_slowdown, args.max_memory_growth)
+    # Every run is kept in the history, but later runs are compared with the pinned
+    # baseline until one is explicitly made the new baseline
+    run["passed"] = not regressions
+    run["baseline"] = baseline_run is None or args.update_baseline
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+    if not args.no_save:
+        save_run(run)
+
+    if baseline_run is None:
+        print("\nNo baseline to compare with; this run is the baseline for the next ones.")
+    elif args.update_baseline:
+        print(f"\nThis run replaces the baseline of {baseline_run['timestamp']}.")
+    elif regressions:
+        print(f"\nRegressions against the run of {baseline_run['timestamp']}:")
+        for name, message in regressions:
+            print(f"  {name}: {message}")
+        return 1
+    else:
+        print(f"\nNo regressions against the run of {baseline_run['timestamp']}.")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the research pipeline")
+    parser.add_argument("--filter", nargs="+", help="Only run cases whose name contains one of these")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--fixtures", help="Fixture directory (default: research_service/fixtures)")
+    parser.add_argument("--baseline", help="Compare with this saved run (--json output) instead of the last one")
+    parser.add_argument("--max-slowdown", type=float, default=MAX_SLOWDOWN,
+                        help="Allowed relative increase of a case's median time")
+    parser.add_argument("--max-memory-growth", type=float, default=MAX_MEMORY_GROWTH,
+                        help="Allowed relative increase of a case's peak memory")
+    parser.add_argument("--model-latency-ms", type=float, default=0.0, help="Latency of the stand-in model")
+    parser.add_argument("--json", help="Also write this run to a JSON file (usable as --baseline)")
+    parser.add_argument("--no-save", action="store_true", help="Do not append this run to the history")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Make this run the baseline for later runs, even if it has regressions")
+    sys.exit(asyncio.run(main(parser.parse_args())))
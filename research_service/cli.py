@@ -0,0 +1,187 @@
+"""
+Command line interface to each pipeline stage and the whole pipeline.
+
+    nova-research search "AI in healthcare" > results.json
+    nova-research extract results.json > documents.json
+    nova-research rank --query "AI in healthcare" documents.json > ranked.json
+    nova-research summarize --topic "AI in healthcare" ranked.json > summaries.json
+    nova-research report --topic "AI in healthcare" --format pdf summaries.json
+    nova-research run "AI in healthcare" --format md
+    nova-research serve --port 8000
+
+Stages read JSON from a file (or stdin with "-") and write JSON to stdout, so they
+can be chained with pipes. Each subcommand imports its stage only when it runs, so
+`--help` and the light stages do not pay for scikit-learn, readability or fpdf.
+Also available as `python -m research_service`.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Stage logs go to stderr, as plain lines unless RESEARCH_LOG_FORMAT asks for JSON
+LOG_FORMAT = os.getenv("RESEARCH_LOG_FORMAT", "text")
+
+
+def read_json(path):
+    if path == "-":
+        return json.load(sys.stdin)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json(data):
+    json.dump(data, sys.stdout, indent=2, ensure_ascii=False)
+    sys.stdout.write("\n")
+
+
+async def search(args):
+    from research_service import stages  # noqa: F401
+    from web_search import search_multiple_queries
+
+    results = await search_multiple_queries(args.queries)
+    write_json(results[:args.limit] if args.limit else results)
+
+
+async def extract(args):
+    from research_service import stages  # noqa: F401
+    from content_extractor import extract_content_batch
+    from data_processor import clean_text
+
+    results = [{"url": url} for url in args.url] or read_json(args.input)
+    extracted = await extract_content_batch(results)
+    documents = []
+    for result, item in zip(results, extracted):
+        content = clean_text(item["raw_text"])
+        if content:
+            documents.append({"url": item["url"], "title": result.get("title", ""), "content": content})
+    write_json(documents)
+
+
+async def rank(args):
+    from research_service import stages  # noqa: F401
+    from relevance_ranker import rank_documents
+
+    write_json(rank_documents(read_json(args.input), args.query))
+
+
+async def summarize(args):
+    from research_service import stages  # noqa: F401
+    from summarizer import summarize_sources
+
+    documents = read_json(args.input)
+    write_json(await summarize_sources(documents, args.topic, map_reduce=args.map_reduce, batch=args.batch))
+
+
+async def report(args):
+    from research_service import stages  # noqa: F401
+    from reporting.output_controller import EXTENSIONS, format_report
+    from reporting.report_generator import generate_report
+
+    if args.format not in EXTENSIONS:
+        sys.exit(f"nova-research report: error: unsupported report format: {args.format}")
+    generated = await generate_report(read_json(args.input), args.topic, args.length, args.format)
+    print(format_report(generated, args.format))
+
+
+async def run(args):
+    from research_service.pipeline import ResearchPipeline, ResearchRequest
+
+    try:
+        request = ResearchRequest.from_dict({
+            "query": args.query,
+            "keywords": args.keywords,
+            "numberOfSources": args.sources,
+            "reportLength": args.length,
+            "outputFormat": args.format,
+        })
+    except ValueError as e:
+        sys.exit(f"nova-research run: error: {e}")
+    pipeline = ResearchPipeline()
+    await pipeline.start()
+    try:
+        result = await pipeline.run(request)
+    finally:
+        await pipeline.close()
+    if args.json:
+        write_json(result)
+    else:
+        print(result["artifact"])
+
+
+def serve(args):
+    import uvicorn
+
+    uvicorn.run("research_service.app:app", host=args.host, port=args.port)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="nova-research", description="Autonomous web research pipeline")
+    parser.add_argument("--log-level", default=os.getenv("RESEARCH_LOG_LEVEL", "WARNING"),
+                        help="Lowest level of stage logs written to stderr")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    command = subparsers.add_parser("search", help="Search the web for queries; prints the results")
+    command.add_argument("queries", nargs="+")
+    command.add_argument("--limit", type=int, help="Results printed at most")
+    command.set_defaults(handler=search)
+
+    command = subparsers.add_parser("extract", help="Fetch pages and extract their cleaned main text")
+    command.add_argument("input", nargs="?", default="-", help="Search results JSON file (default: stdin)")
+    command.add_argument("--url", action="append", default=[], help="Page to extract instead of the input")
+    command.set_defaults(handler=extract)
+
+    command = subparsers.add_parser("rank", help="Rank extracted documents by relevance to a query")
+    command.add_argument("input", nargs="?", default="-", help="Documents JSON file (default: stdin)")
+    command.add_argument("--query", required=True)
+    command.set_defaults(handler=rank)
+
+    command = subparsers.add_parser("summarize", help="Summarize documents with the model server")
+    command.add_argument("input", nargs="?", default="-", help="Documents JSON file (default: stdin)")
+    command.add_argument("--topic", required=True)
+    command.add_argument("--map-reduce", action="store_true", help="Summarize long documents chunk by chunk")
+    command.add_argument("--batch", action="store_true", help="Pack several short documents into one prompt")
+    command.set_defaults(handler=summarize)
+
+    command = subparsers.add_parser("report", help="Generate a report from summaries; prints its path")
+    command.add_argument("input", nargs="?", default="-", help="Summaries JSON file (default: stdin)")
+    command.add_argument("--topic", required=True)
+    command.add_argument("--length", default="short", choices=["short", "medium", "long"])
+    command.add_argument("--format", default="md", help="md, pdf, json, json-compact, ndjson, csv or essay")
+    command.set_defaults(handler=report)
+
+    command = subparsers.add_parser("run", help="Run the full pipeline; prints the report path")
+    command.add_argument("query")
+    command.add_argument("--keywords", nargs="*", default=[], help="Extra queries combined with the query")
+    command.add_argument("--sources", type=int, default=10, help="Search results used at most")
+    command.add_argument("--length", default="medium", help="brief, medium, detailed or comprehensive")
+    command.add_argument("--format", default="md", help="pdf, markdown, essay, json or csv")
+    command.add_argument("--json", action="store_true", help="Print the whole result instead of the report path")
+    command.set_defaults(handler=run)
+
+    command = subparsers.add_parser("serve", help="Run the HTTP service")
+    command.add_argument("--host", default="127.0.0.1")
+    command.add_argument("--port", type=int, default=8000)
+    command.set_defaults(handler=serve)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.handler is serve:
+        serve(args)
+        return
+
+    # Not needed to parse arguments or print help
+    import asyncio
+    from research_service import logs
+
+    logs.configure(level=args.log_level.upper(), fmt=LOG_FORMAT)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Per-job progress events, streamed to clients as server-sent events.
+
+The pipeline publishes two kinds of events:
+
+* milestones (a stage started or finished, a summary is ready, the report is done),
+  which every subscriber receives, in order;
+* progress counters (e.g. 37 of 100 pages fetched), which are coalesced: only the
+  newest counter per stage is kept, so a burst of fetches costs one message per
+  client per flush interval rather than one per page.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+from reporting.json_export import dumps
+
+# Milestones kept per job, so a client that connects late (or reconnects with
+# Last-Event-ID) can catch up
+MAX_EVENTS_PER_JOB = 1000
+
+# Finished jobs whose events are kept for late subscribers
+MAX_FINISHED_JOBS = 200
+
+# Minimum time between two messages to one client; events published in between
+# are sent together, with progress counters coalesced
+FLUSH_INTERVAL = 0.1
+
+# Comment line sent when a job has been quiet this long, so proxies keep the
+# connection open
+KEEPALIVE_SECONDS = 15
+
+
+class JobChannel:
+    """Event history of one job, with wake-ups for its subscribers."""
+
+    def __init__(self, max_events=MAX_EVENTS_PER_JOB):
+        self.max_events = max_events
+        self.events = []
+        self.progress = {}
+        self.seq = 0
+        self.closed = False
+        self._changed = asyncio.Event()
+
+    def publish(self, event, coalesce=False):
+        self.seq += 1
+        event = dict(event, seq=self.seq, time=time.time())
+        if coalesce:
+            self.progress[event.get("stage")] = event
+        else:
+            self.events.append(event)
+            if len(self.events) > self.max_events:
+                del self.events[:len(self.events) - self.max_events]
+        self._wake()
+
+    def close(self):
+        self.closed = True
+        self._wake()
+
+    def pending(self, after):
+        """Returns the events newer than sequence number `after`, in order."""
+        # Milestones are in sequence order; scan back from the newest
+        start = len(self.events)
+        while start > 0 and self.events[start - 1]["seq"] > after:
+            start -= 1
+        new = self.events[start:]
+
+        progress = [event for event in self.progress.values() if event["seq"] > after]
+        if progress:
+            new = sorted(new + progress, key=lambda event: event["seq"])
+        return new
+
+    def waiter(self):
+        """Returns an event that is set at the next publish (or close)."""
+        return self._changed
+
+    def _wake(self):
+        # Waiters hold the old event; replacing it makes later waiters block again
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class EventBus:
+    """Channels per job id. Must be used from the event loop that serves the clients."""
+
+    def __init__(self, max_finished=MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._channels = {}
+        self._finished = OrderedDict()
+
+    def channel(self, job_id):
+        channel = self._channels.get(job_id)
+        if channel is None:
+            channel = self._channels[job_id] = JobChannel()
+        return channel
+
+    def has(self, job_id):
+        return job_id in self._channels
+
+    def publish(self, job_id, event, coalesce=False):
+        self.channel(job_id).publish(event, coalesce)
+
+    def publisher(self, job_id):
+        """Returns a callback publishing events of `job_id`, for ResearchPipeline.run."""
+        channel = self.channel(job_id)
+        return channel.publish
+
+    def close(self, job_id):
+        """Marks a job's stream as finished; its history is kept for late subscribers."""
+        channel = self._channels.get(job_id)
+        if channel is None:
+            return
+        channel.close()
+        self._finished[job_id] = None
+        while len(self._finished) > self.max_finished:
+            old, _ = self._finished.popitem(last=False)
+            self._channels.pop(old, None)
+
+    def reopen(self, job_id):
+        """Resumes a finished job's stream, e.g. when the job is retried."""
+        self.channel(job_id).closed = False
+        self._finished.pop(job_id, None)
+
+    async def subscribe(self, job_id, after=0):
+        """
+        Yields batches of events for `job_id` as they are published, newest progress
+        counters only, until the job's channel is closed. Yields an empty batch when
+        the job has been quiet for KEEPALIVE_SECONDS.
+        """
+        channel = self.channel(job_id)
+        cursor = after
+        while True:
+            # Taken before reading, so nothing published while the batch is being
+            # sent is missed
+            changed = channel.waiter()
+            batch = channel.pending(cursor)
+            if batch:
+                cursor = batch[-1]["seq"]
+                yield batch
+            if channel.closed:
+                if not channel.pending(cursor):
+                    return
+                continue
+
+            try:
+                await asyncio.wait_for(changed.wait(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield []
+                continue
+            # Let a burst of events accumulate before sending them
+            await asyncio.sleep(FLUSH_INTERVAL)
+
+
+def format_sse(event):
+    """Encodes one event as a server-sent-events message."""
+    return (f"id: {event['seq']}\nevent: {event['type']}\n".encode("utf-8")
+            + b"data: " + dumps(event) + b"\n\n")
+
+
+async def sse_stream(bus, job_id, after=0):
+    """Yields the encoded SSE stream of a job, for a streaming HTTP response."""
+    # Tell EventSource how long to wait before reconnecting
+    yield b"retry: 2000\n\n"
+    async for batch in bus.subscribe(job_id, after):
+        if not batch:
+            yield b": keep-alive\n\n"
+            continue
+        yield b"".join(format_sse(event) for event in batch)
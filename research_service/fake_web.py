@@ -0,0 +1,370 @@
+"""
+Offline stand-in for the web the pipeline searches and fetches.
+
+`FakeWeb` serves synthetic search result pages (in DuckDuckGo, Brave and Google
+markup) and article pages for any host, with configurable page sizes, latency,
+error rates, redirects, hanging requests and per-host throttling, so the fetch path
+can be load tested at scale without the network. Every URL is served under its host
+name: `https://host-3.sim/articles/17` is `<server>/host-3.sim/articles/17`, and
+`SimulatedWebSession` rewrites the requests of the unchanged stage code that way:
+
+    runner, base_url = await start_server(FakeWeb())
+    session = SimulatedWebSession(base_url)
+    results = await search_multiple_queries(["solar storage"], session)
+
+The rewritten requests keep their host name, which resolves to the server, so the
+client's connection pool still limits connections per simulated host.
+
+Run it standalone (e.g. on another core than the load driver) with
+
+    python -m research_service.fake_web --port 8900
+"""
+
+import argparse
+import asyncio
+import hashlib
+import html
+import random
+import socket
+import time
+
+import aiohttp
+from aiohttp import web
+from aiohttp.abc import AbstractResolver
+from yarl import URL
+
+_WORDS = (
+    "research shows that modern systems improve results across many domains while costs fall and "
+    "adoption grows as teams learn to apply new methods to real problems in energy health climate "
+    "markets software policy security data networks hardware science education transport"
+).split()
+
+# Search hosts and the markup their result pages are rendered in
+SEARCH_HOSTS = {
+    "duckduckgo.com": "duckduckgo",
+    "html.duckduckgo.com": "duckduckgo",
+    "search.brave.com": "brave",
+    "www.google.com": "google",
+}
+
+# Paragraphs generated at start-up; pages are assembled from them, so serving a large
+# page costs a join rather than generating text
+_PARAGRAPH_POOL = 256
+
+
+class FakeWeb:
+    """
+    Synthetic web server.
+
+    Every request waits a latency drawn from a log-normal distribution with median
+    `latency` seconds and shape `latency_sigma`; requests to the fraction `slow_hosts`
+    of hosts take `slow_factor` times longer and send their body in slow chunks. Article
+    pages are `page_kb` kB (log-normally spread), except a fraction `huge_rate` of
+    `huge_kb` kB. Of all article requests, `error_rate` fail with 500/503, `not_found_rate`
+    with 404, `redirect_rate` answer with a redirect first, and `hang_rate` never answer
+    within `hang_seconds` (client timeouts). Each host serves at most `host_concurrency`
+    requests at once (others queue) and admits `host_rate` requests per second with a
+    burst of as many; beyond that it answers 429 with Retry-After. Search engines return
+    `results_per_page` results spread over `hosts` article hosts.
+    """
+
+    def __init__(self, latency=0.1, latency_sigma=0.6, page_kb=60, huge_rate=0.01, huge_kb=5000,
+                 error_rate=0.02, not_found_rate=0.02, redirect_rate=0.05, hang_rate=0.005, hang_seconds=60.0,
+                 slow_hosts=0.05, slow_factor=10.0, hosts=50, host_concurrency=6, host_rate=20.0,
+                 results_per_page=10, seed=None):
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.page_kb = page_kb
+        self.huge_rate = huge_rate
+        self.huge_kb = huge_kb
+        self.error_rate = error_rate
+        self.not_found_rate = not_found_rate
+        self.redirect_rate = redirect_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.slow_hosts = slow_hosts
+        self.slow_factor = slow_factor
+        self.hosts = hosts
+        self.host_concurrency = host_concurrency
+        self.host_rate = host_rate
+        self.results_per_page = results_per_page
+        self.seed = seed
+        self.stats = {"requests": 0, "bytes": 0, "throttled": 0, "errors": 0, "redirects": 0, "hangs": 0}
+        self._random = random.Random(seed)
+        self._host_slots = {}
+        self._host_buckets = {}
+        paragraphs = random.Random(seed)
+        self._paragraphs = [
+            " ".join(paragraphs.choice(_WORDS) for _ in range(paragraphs.randint(40, 120))).capitalize() + "."
+            for _ in range(_PARAGRAPH_POOL)
+        ]
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_get("/{host}/{path:.*}", self.handle)
+        return app
+
+    async def handle(self, request):
+        host = request.match_info["host"]
+        path = "/" + request.match_info["path"]
+        self.stats["requests"] += 1
+
+        if not self._take_token(host):
+            self.stats["throttled"] += 1
+            return web.Response(status=429, headers={"Retry-After": "1"}, text="Too Many Requests")
+
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(self.host_concurrency)
+        async with slots:
+            slow = self._is_slow(host)
+            await asyncio.sleep(self._latency(slow))
+
+            if host in SEARCH_HOSTS:
+                body = self.search_page(SEARCH_HOSTS[host], request.query.get("q", ""))
+                return await self._send(request, body, slow)
+
+            outcome = self._random.random()
+            if outcome < self.hang_rate:
+                self.stats["hangs"] += 1
+                await asyncio.sleep(self.hang_seconds)
+                return web.Response(status=504, text="Gateway Timeout")
+            outcome -= self.hang_rate
+            if outcome < self.error_rate:
+                self.stats["errors"] += 1
+                return web.Response(status=self._random.choice((500, 503)), text="Server Error")
+            outcome -= self.error_rate
+            if outcome < self.not_found_rate:
+                return web.Response(status=404, text="Not Found")
+            outcome -= self.not_found_rate
+            if outcome < self.redirect_rate and "moved" not in request.query:
+                self.stats["redirects"] += 1
+                target = request.rel_url.update_query({"moved": "1"})
+                raise web.HTTPFound(location=str(target))
+
+            return await self._send(request, self.article_page(host, path), slow)
+
+    def search_page(self, engine, query):
+        """Renders a result page for `query` with result URLs spread over the article hosts."""
+        rng = random.Random(_stable_hash(query))
+        results = []
+        for _ in range(self.results_per_page):
+            host = f"host-{rng.randrange(self.hosts)}.sim"
+            url = f"https://{host}/articles/{rng.randrange(10 ** 6)}"
+            title = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(4, 9))).capitalize()
+            results.append((url, title))
+        return _SERP_RENDERERS[engine](query, results)
+
+    def article_page(self, host, path):
+        """Renders the article at `host` + `path`; the same URL always gives the same page."""
+        rng = random.Random(_stable_hash(host + path))
+        size_kb = self.huge_kb if rng.random() < self.huge_rate else rng.lognormvariate(0, 0.5) * self.page_kb
+        title = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(4, 9))).capitalize()
+
+        paragraphs = []
+        length = 0
+        while length < size_kb * 1024:
+            paragraph = f"<p>{self._paragraphs[rng.randrange(_PARAGRAPH_POOL)]}</p>\n"
+            paragraphs.append(paragraph)
+            length += len(paragraph)
+        nav = "".join(f'<li><a href="/section/{word}">{word}</a></li>' for word in _WORDS[:12])
+        return (
+            f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>"
+            f"<script>window.analytics=[];</script><style>nav ul{{display:flex}}</style></head><body>"
+            f"<header><nav><ul>{nav}</ul></nav></header>"
+            f"<div class=\"ad\"><iframe src=\"https://ads.sim/slot\"></iframe></div>"
+            f"<main><article><h1>{html.escape(title)}</h1>\n{''.join(paragraphs)}</article>"
+            f"<aside><h2>Related</h2><ul>{nav}</ul></aside></main>"
+            f"<footer><ul>{nav}</ul><p>&copy; {host}</p></footer></body></html>"
+        )
+
+    async def _send(self, request, body, slow):
+        data = body.encode("utf-8")
+        self.stats["bytes"] += len(data)
+        if not slow:
+            return web.Response(body=data, content_type="text/html", charset="utf-8")
+
+        # Slow hosts trickle the body out in chunks
+        response = web.StreamResponse(headers={"Content-Type": "text/html; charset=utf-8"})
+        response.content_length = len(data)
+        try:
+            await response.prepare(request)
+            chunk_size = 16 * 1024
+            for start in range(0, len(data), chunk_size):
+                await response.write(data[start:start + chunk_size])
+                await asyncio.sleep(self.latency / 4)
+            await response.write_eof()
+        except ConnectionResetError:  # the client gave up (timed out) part way
+            pass
+        return response
+
+    def _latency(self, slow):
+        latency = self._random.lognormvariate(0, self.latency_sigma) * self.latency
+        return latency * self.slow_factor if slow else latency
+
+    def _is_slow(self, host):
+        return random.Random(_stable_hash("slow:" + host)).random() < self.slow_hosts
+
+    def _take_token(self, host):
+        """Token bucket per host: `host_rate` tokens per second, at most `host_rate` saved up."""
+        now = time.monotonic()
+        tokens, last = self._host_buckets.get(host, (self.host_rate, now))
+        tokens = min(self.host_rate, tokens + (now - last) * self.host_rate)
+        if tokens < 1:
+            self._host_buckets[host] = (tokens, now)
+            return False
+        self._host_buckets[host] = (tokens - 1, now)
+        return True
+
+
+def _stable_hash(text):
+    return int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "big")
+
+
+def _render_duckduckgo(query, results):
+    items = "".join(
+        f'<div class="result results_links web-result"><h2 class="result__title">'
+        f'<a rel="nofollow" class="result__a" href="{html.escape(url)}">{html.escape(title)}</a></h2>'
+        f'<a class="result__snippet" href="{html.escape(url)}">{html.escape(title)}</a></div>\n'
+        for url, title in results
+    )
+    return f"<html><head><title>{html.escape(query)} at DuckDuckGo</title></head><body><div id=\"links\">{items}</div></body></html>"
+
+
+def _render_brave(query, results):
+    items = "".join(
+        f'<div class="snippet" data-type="web"><a href="{html.escape(url)}"><h3>{html.escape(title)}</h3></a></div>\n'
+        for url, title in results
+    )
+    return f"<html><head><title>{html.escape(query)} - Brave Search</title></head><body><main>{items}</main></body></html>"
+
+
+def _render_google(query, results):
+    items = "".join(
+        f'<div class="g"><a href="/url?q={html.escape(url)}&amp;sa=U"><h3>{html.escape(title)}</h3></a></div>\n'
+        for url, title in results
+    )
+    return f"<html><head><title>{html.escape(query)} - Google Search</title></head><body><div id=\"rso\">{items}</div></body></html>"
+
+
+_SERP_RENDERERS = {"duckduckgo": _render_duckduckgo, "brave": _render_brave, "google": _render_google}
+
+
+class LoopbackResolver(AbstractResolver):
+    """Resolves every host name to the FakeWeb server's address."""
+
+    def __init__(self, address):
+        self.address = address
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        return [{"hostname": host, "host": self.address, "port": port, "family": socket.AF_INET,
+                 "proto": 0, "flags": socket.AI_NUMERICHOST}]
+
+    async def close(self):
+        pass
+
+
+class SimulatedWebSession:
+    """
+    An aiohttp session whose requests all go to a FakeWeb server instead of the host
+    in their URL. Requests to local addresses (e.g. a model server) are not rewritten.
+
+    Args:
+        base_url (str): The FakeWeb server.
+        limit (int): Connections open at once.
+        limit_per_host (int): Connections open at once per simulated host.
+    """
+
+    def __init__(self, base_url, limit=100, limit_per_host=8, **session_options):
+        self.base_url = URL(base_url)
+        connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host,
+                                         resolver=LoopbackResolver(self.base_url.host))
+        self.session = aiohttp.ClientSession(connector=connector, **session_options)
+
+    def route(self, url):
+        url = URL(url)
+        if url.host in ("127.0.0.1", "localhost"):
+            return url
+        return URL.build(scheme="http", host=url.host, port=self.base_url.port,
+                         path=f"/{url.host}{url.path}", query=url.query)
+
+    def get(self, url, **kwargs):
+        return self.session.get(self.route(url), **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.session.post(self.route(url), **kwargs)
+
+    @property
+    def closed(self):
+        return self.session.closed
+
+    async def close(self):
+        await self.session.close()
+
+
+async def start_server(fake, host="127.0.0.1", port=0):
+    """
+    Starts `fake` on the running event loop.
+
+    Returns:
+        tuple: (AppRunner to clean up, base URL of the server)
+    """
+    runner = web.AppRunner(fake.make_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}"
+
+
+def add_server_arguments(parser):
+    parser.add_argument("--latency-ms", type=float, default=100, help="Median response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.6, help="Shape of the log-normal latency")
+    parser.add_argument("--page-kb", type=float, default=60, help="Median article size")
+    parser.add_argument("--huge-rate", type=float, default=0.01, help="Fraction of articles of --huge-kb")
+    parser.add_argument("--huge-kb", type=float, default=5000)
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Fraction of articles failing with 5xx")
+    parser.add_argument("--not-found-rate", type=float, default=0.02)
+    parser.add_argument("--redirect-rate", type=float, default=0.05)
+    parser.add_argument("--hang-rate", type=float, default=0.005, help="Fraction of articles never answered")
+    parser.add_argument("--hang-seconds", type=float, default=60)
+    parser.add_argument("--slow-hosts", type=float, default=0.05, help="Fraction of hosts that are slow")
+    parser.add_argument("--slow-factor", type=float, default=10)
+    parser.add_argument("--hosts", type=int, default=50, help="Article hosts results are spread over")
+    parser.add_argument("--host-concurrency", type=int, default=6, help="Requests a host serves at once")
+    parser.add_argument("--host-rate", type=float, default=20, help="Requests per second a host admits")
+    parser.add_argument("--results-per-page", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def fake_from_arguments(args):
+    return FakeWeb(
+        latency=args.latency_ms / 1000,
+        latency_sigma=args.latency_sigma,
+        page_kb=args.page_kb,
+        huge_rate=args.huge_rate,
+        huge_kb=args.huge_kb,
+        error_rate=args.error_rate,
+        not_found_rate=args.not_found_rate,
+        redirect_rate=args.redirect_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        slow_hosts=args.slow_hosts,
+        slow_factor=args.slow_factor,
+        hosts=args.hosts,
+        host_concurrency=args.host_concurrency,
+        host_rate=args.host_rate,
+        results_per_page=args.results_per_page,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline stand-in for search engines and article hosts")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    print(f"Fake web listening on http://{args.host}:{args.port}")
+    web.run_app(fake_from_arguments(args).make_app(), host=args.host, port=args.port, print=None)
@@ -0,0 +1,510 @@
+"""
+Persistent research job queue with resumable stage checkpoints.
+
+Jobs and the outputs of each completed pipeline stage are stored in SQLite, so a job
+interrupted by a crash or restart resumes from its last checkpoint instead of
+searching, fetching and summarizing everything again.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from research_service import telemetry
+from research_service.pipeline import ResearchRequest
+from research_service.scheduler import AGING_SECONDS, MAX_RUNNING_COST
+
+DEFAULT_JOBS_PATH = os.getenv("RESEARCH_JOBS_PATH", os.path.join(".cache", "jobs.sqlite3"))
+
+# A running job whose worker has not renewed its lease for this long is considered
+# abandoned (its process died) and is handed to another worker
+LEASE_SECONDS = 60
+
+# Attempts per job before it is marked as failed
+MAX_ATTEMPTS = 3
+
+# Error of a job whose lease expired on every attempt (its worker keeps dying)
+LOST_JOB_ERROR = "Worker lost the job on every attempt"
+
+# (name, definition) of columns added to the jobs table since it was introduced
+ADDED_COLUMNS = [
+    ("priority", "INTEGER NOT NULL DEFAULT 1"),
+    ("cost", "REAL NOT NULL DEFAULT 1"),
+    ("dedupe_key", "TEXT"),
+    ("attached", "INTEGER NOT NULL DEFAULT 0"),
+    ("started", "REAL"),
+]
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+logger = logging.getLogger(__name__)
+
+
+class JobStore:
+    """
+    SQLite-backed job queue and checkpoint store.
+
+    Workers claim queued jobs (or ones whose lease has expired) atomically, so several
+    workers, in one process or many, can share the same database. Jobs are handed out
+    by priority, a job moving up one class per `aging` seconds in the queue, and only
+    while the total cost of the running jobs stays within `max_running_cost`. Stage
+    checkpoints are kept per (job, stage, key), where the key identifies an item
+    within the stage (e.g. the URL of a fetched page), and are deleted once the job
+    is done.
+    """
+
+    def __init__(self, path=DEFAULT_JOBS_PATH, lease=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS,
+                 aging=AGING_SECONDS, max_running_cost=MAX_RUNNING_COST):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.aging = aging
+        self.max_running_cost = max_running_cost
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                request TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_until REAL,
+                error TEXT,
+                result TEXT,
+                priority INTEGER NOT NULL DEFAULT 1,
+                cost REAL NOT NULL DEFAULT 1,
+                dedupe_key TEXT,
+                attached INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+            """
+        )
+        # Columns added after the first release, for existing databases
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, definition in ADDED_COLUMNS:
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_dedupe_key ON jobs (dedupe_key, status)")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                job_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (job_id, stage, key)
+            )
+            """
+        )
+
+    def submit(self, request, job_id=None, priority=1, cost=1.0, dedupe_key=None):
+        """
+        Queues a job for `request` (a JSON-serializable dict) and returns its id.
+
+        `dedupe_key` identifies requests that produce the same result; see `attach`.
+        """
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, request, status, priority, cost, dedupe_key, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(request), QUEUED, priority, cost, dedupe_key, now, now),
+            )
+        return job_id
+
+    def attach(self, dedupe_key):
+        """
+        Looks for a queued or running job submitted with `dedupe_key` and, if there is
+        one, counts another caller waiting on it.
+
+        Returns:
+            str: The id of that job, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN (?, ?) ORDER BY created LIMIT 1",
+                (dedupe_key, QUEUED, RUNNING),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE jobs SET attached = attached + 1 WHERE id = ?", (row[0],))
+        return row[0]
+
+    def claim(self, worker):
+        """
+        Claims the next job for `worker`. Jobs whose lease expired on their last
+        attempt are marked as failed on the way.
+
+        Returns:
+            tuple: (claimed, expired): the claimed (job id, request dict), or None if
+                   no job is waiting, and the ids of the jobs marked as failed.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A job whose lease keeps expiring crashes its worker: give up on it
+                # rather than handing it out forever
+                expired = [row[0] for row in self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                    (RUNNING, now, self.max_attempts),
+                )]
+                self._conn.executemany(
+                    "UPDATE jobs SET status = ?, error = ?, worker = NULL, lease_until = NULL, updated = ? "
+                    "WHERE id = ?",
+                    [(FAILED, LOST_JOB_ERROR, now, job_id) for job_id in expired],
+                )
+                candidates = self._conn.execute(
+                    "SELECT id, request, cost, created FROM jobs "
+                    "WHERE status = ? OR (status = ? AND lease_until < ? AND attempts < ?) "
+                    "ORDER BY priority - (? - created) / ?, created LIMIT 100",
+                    (QUEUED, RUNNING, now, self.max_attempts, now, self.aging),
+                ).fetchall()
+                running_cost = self._conn.execute(
+                    "SELECT COALESCE(SUM(cost), 0) FROM jobs WHERE status = ? AND lease_until >= ?",
+                    (RUNNING, now),
+                ).fetchone()[0]
+                row = self._pick(candidates, running_cost, now)
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1, "
+                        "started = ?, updated = ? WHERE id = ?",
+                        (RUNNING, worker, now + self.lease, now, now, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None, expired
+        return (row[0], json.loads(row[1])), expired
+
+    def _pick(self, candidates, running_cost, now):
+        for row in candidates:
+            job_id, request, cost, created = row
+            if not running_cost or running_cost + cost <= self.max_running_cost:
+                return row
+            if now - created > self.aging * 3:
+                # Waited long enough: hold capacity for it rather than letting
+                # smaller jobs keep overtaking it
+                return None
+        return None
+
+    def backlog(self, priority):
+        """
+        Returns the estimated cost queued at `priority` or higher (lower numbers), and
+        the cost and number of all running jobs.
+        """
+        now = time.time()
+        with self._lock:
+            queued_cost = self._conn.execute(
+                "SELECT COALESCE(SUM(cost), 0) FROM jobs WHERE status = ? AND priority - (? - created) / ? <= ?",
+                (QUEUED, now, self.aging, priority),
+            ).fetchone()[0]
+            running_cost, running_jobs = self._conn.execute(
+                "SELECT COALESCE(SUM(cost), 0), COUNT(*) FROM jobs WHERE status = ?", (RUNNING,)
+            ).fetchone()
+        return {"queued_cost": queued_cost, "running_cost": running_cost, "running_jobs": running_jobs}
+
+    def completed_cost(self, since):
+        """
+        Returns the total cost of the jobs completed since `since`, the seconds they
+        spent running (their last attempt) and how many there were.
+        """
+        with self._lock:
+            total, busy, count = self._conn.execute(
+                "SELECT COALESCE(SUM(cost), 0), COALESCE(SUM(updated - started), 0), COUNT(*) FROM jobs "
+                "WHERE status = ? AND updated >= ? AND started IS NOT NULL",
+                (DONE, since),
+            ).fetchone()
+        return total, busy, count
+
+    def renew(self, job_id, worker):
+        """Extends the lease on a running job; returns False if the worker lost it."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_until = ?, updated = ? WHERE id = ? AND worker = ? AND status = ?",
+                (now + self.lease, now, job_id, worker, RUNNING),
+            )
+        return cursor.rowcount == 1
+
+    def release(self, job_id, worker):
+        """Puts a running job back in the queue, e.g. when its worker shuts down."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, lease_until = NULL, attempts = attempts - 1, "
+                "updated = ? WHERE id = ? AND worker = ? AND status = ?",
+                (QUEUED, time.time(), job_id, worker, RUNNING),
+            )
+
+    def complete(self, job_id, result, worker=None):
+        """
+        Marks a job as done with its result and drops its checkpoints. With `worker`,
+        only if that worker still holds the job; returns whether it was marked.
+        """
+        with self._lock:
+            if worker is None:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_until = NULL, updated = ? "
+                    "WHERE id = ?",
+                    (DONE, json.dumps(result, default=str), time.time(), job_id),
+                )
+            else:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_until = NULL, updated = ? "
+                    "WHERE id = ? AND worker = ? AND status = ?",
+                    (DONE, json.dumps(result, default=str), time.time(), job_id, worker, RUNNING),
+                )
+            if cursor.rowcount != 1:
+                return False
+            self._conn.execute("DELETE FROM checkpoints WHERE job_id = ?", (job_id,))
+        return True
+
+    def fail(self, job_id, error):
+        """
+        Records a failed attempt. The job is queued again until it has used
+        `max_attempts`, keeping its checkpoints either way.
+
+        Returns:
+            str: The job's new status.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            status = QUEUED if row is not None and row[0] < self.max_attempts else FAILED
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, worker = NULL, lease_until = NULL, updated = ? WHERE id = ?",
+                (status, error, time.time(), job_id),
+            )
+        return status
+
+    def retry(self, job_id):
+        """Queues a failed job again; it resumes from its checkpoints."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, error = NULL, updated = ? WHERE id = ? AND status = ?",
+                (QUEUED, time.time(), job_id, FAILED),
+            )
+        return cursor.rowcount == 1
+
+    def get(self, job_id):
+        """Returns the job's status record, or None if there is no such job."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, request, attempts, error, result, priority, cost, attached, created, updated "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            stages = [stage for (stage,) in self._conn.execute(
+                "SELECT DISTINCT stage FROM checkpoints WHERE job_id = ?", (job_id,))]
+
+        status, request, attempts, error, result, priority, cost, attached, created, updated = row
+        return {
+            "id": job_id,
+            "status": status,
+            "request": json.loads(request),
+            "priority": priority,
+            "cost": cost,
+            "attached_callers": attached,
+            "attempts": attempts,
+            "error": error,
+            "result": json.loads(result) if result else None,
+            "checkpointed_stages": sorted(stages),
+            "created": created,
+            "updated": updated,
+        }
+
+    def put_checkpoint(self, job_id, stage, key, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (job_id, stage, key, value) VALUES (?, ?, ?, ?)",
+                (job_id, stage, key, json.dumps(value)),
+            )
+
+    def get_checkpoint(self, job_id, stage, key=""):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM checkpoints WHERE job_id = ? AND stage = ? AND key = ?",
+                (job_id, stage, key),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_checkpoints(self, job_id, stage):
+        """Returns all checkpointed items of a stage as {key: value}."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM checkpoints WHERE job_id = ? AND stage = ?", (job_id, stage)
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobCheckpoints:
+    """Checkpoints of one job, in the form the pipeline expects."""
+
+    def __init__(self, store, job_id):
+        self.store = store
+        self.job_id = job_id
+
+    def get(self, stage, key=""):
+        return self.store.get_checkpoint(self.job_id, stage, key)
+
+    def put(self, stage, key, value):
+        self.store.put_checkpoint(self.job_id, stage, key, value)
+
+    def items(self, stage):
+        return self.store.get_checkpoints(self.job_id, stage)
+
+
+class JobWorkerPool:
+    """
+    Runs queued jobs on the current event loop with `workers` concurrent workers.
+
+    Each worker claims a job, runs it through the pipeline with the job's
+    checkpoints, and renews the job's lease while it runs. Jobs left running by a
+    process that died are picked up again once their lease expires. If `events` (an
+    EventBus) is given, job and pipeline progress is published to it.
+    """
+
+    def __init__(self, pipeline, store, workers=4, poll_interval=0.5, events=None):
+        self.pipeline = pipeline
+        self.store = store
+        self.events = events
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks = []
+        self._wakeup = None
+        self._finished = {}
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self._tasks = [asyncio.create_task(self._work(f"{prefix}-{i}")) for i in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, request, priority=1, cost=1.0):
+        """Queues a ResearchRequest and returns the job id."""
+        job_id = await asyncio.to_thread(self.store.submit, request.as_dict(), priority=priority, cost=cost,
+                                         dedupe_key=request.dedupe_key())
+        self._publish(job_id, {"type": "job", "status": QUEUED})
+        self.submit_wakeup()
+        return job_id
+
+    def submit_wakeup(self):
+        """Tells idle workers that a job was queued."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def wait(self, job_id):
+        """Waits until the job is done or has failed for good, and returns its record."""
+        while True:
+            job = await asyncio.to_thread(self.store.get, job_id)
+            if job is None or job["status"] in (DONE, FAILED):
+                return job
+
+            finished = self._finished.setdefault(job_id, asyncio.Event())
+            try:
+                # Jobs may also be finished by workers in other processes; poll as well
+                await asyncio.wait_for(finished.wait(), timeout=self.poll_interval * 4)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _work(self, worker):
+        while True:
+            # The store is shared with other processes; its lock waits must not stall the loop
+            claimed, expired = await asyncio.to_thread(self.store.claim, worker)
+            for job_id in expired:
+                telemetry.count("research_jobs_total", status=FAILED)
+                logger.error("Job %s failed (%s): %s", job_id, FAILED, LOST_JOB_ERROR)
+                self._publish(job_id, {"type": "job", "status": FAILED, "error": LOST_JOB_ERROR}, close=True)
+                self._notify_finished(job_id)
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            job_id, request = claimed
+            self._publish(job_id, {"type": "job", "status": RUNNING})
+            on_event = self.events.publisher(job_id) if self.events is not None else None
+            job = asyncio.create_task(self.pipeline.run(ResearchRequest.from_dict(request),
+                                                        checkpoints=JobCheckpoints(self.store, job_id),
+                                                        job_id=job_id, on_event=on_event))
+            heartbeat = asyncio.create_task(self._renew(job_id, worker, job))
+            try:
+                result = await job
+                if await asyncio.to_thread(self.store.complete, job_id, result, worker):
+                    telemetry.count("research_jobs_total", status=DONE)
+                    self._publish(job_id, {"type": "job", "status": DONE}, close=True)
+                else:
+                    logger.warning("Job %s finished after its lease was lost; result dropped", job_id)
+            except asyncio.CancelledError:
+                if heartbeat.done() and not heartbeat.cancelled():
+                    # The lease was lost and the job cancelled: another worker has it now
+                    telemetry.count("research_jobs_total", status="lease_lost")
+                    continue
+                await asyncio.to_thread(self.store.release, job_id, worker)
+                raise
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                status = await asyncio.to_thread(self.store.fail, job_id, error)
+                telemetry.count("research_jobs_total", status="retried" if status == QUEUED else status)
+                logger.error("Job %s failed (%s): %s", job_id, status, error)
+                self._publish(job_id, {"type": "job", "status": status, "error": error}, close=status == FAILED)
+            finally:
+                heartbeat.cancel()
+                self._notify_finished(job_id)
+
+    def _notify_finished(self, job_id):
+        finished = self._finished.pop(job_id, None)
+        if finished is not None:
+            finished.set()
+
+    def _publish(self, job_id, event, close=False):
+        if self.events is not None:
+            self.events.publish(job_id, event)
+            if close:
+                self.events.close(job_id)
+
+    async def _renew(self, job_id, worker, job):
+        """Renews the job's lease while it runs; cancels the job if the lease was lost."""
+        while True:
+            await asyncio.sleep(self.store.lease / 3)
+            if not await asyncio.to_thread(self.store.renew, job_id, worker):
+                logger.warning("Lost the lease on job %s; cancelling it", job_id)
+                job.cancel()
+                return
@@ -0,0 +1,211 @@
+"""
+Load driver for the search and fetch stages, against the FakeWeb simulator.
+
+Pushes `search_multiple_queries` and `extract_content_batch` through a synthetic web
+(see research_service.fake_web) and reports throughput, latency percentiles, status
+counts and memory per phase, fully offline:
+
+    python -m research_service.load_driver --queries 200 --pages 2000
+    python -m research_service.load_driver --url http://127.0.0.1:8900   # standalone simulator
+
+By default the simulator runs on the driver's event loop, which then shares one core
+between both sides; run it standalone for numbers closer to production.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+import content_extractor
+from content_extractor import extract_content_batch
+from web_search import search_multiple_queries
+
+from research_service.fake_web import SimulatedWebSession, add_server_arguments, fake_from_arguments, start_server
+from research_service.pipeline import MAX_CONNECTIONS, MAX_CONNECTIONS_PER_HOST
+
+_TOPICS = (
+    "solar storage", "battery recycling", "grid stability", "heat pumps", "carbon capture", "wind forecasting",
+    "hydrogen fuel", "smart meters", "ev charging", "nuclear fusion", "tidal power", "energy policy",
+)
+
+
+class MeasuredSession(SimulatedWebSession):
+    """
+    SimulatedWebSession recording, per request, the time from the call to the end of
+    the `async with` block (so including the body read) and its status or error.
+    """
+
+    def __init__(self, base_url, **options):
+        super().__init__(base_url, **options)
+        self.samples = []
+
+    def get(self, url, **kwargs):
+        return _MeasuredRequest(super().get(url, **kwargs), self.samples)
+
+    def reset(self):
+        samples, self.samples = self.samples, []
+        return samples
+
+
+class _MeasuredRequest:
+    def __init__(self, request, samples):
+        self._request = request
+        self._samples = samples
+        self._start = time.perf_counter()
+        self._response = None
+
+    async def __aenter__(self):
+        try:
+            self._response = await self._request.__aenter__()
+        except BaseException as e:
+            self._record(type(e).__name__)
+            raise
+        return self._response
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._record(exc_type.__name__ if exc_type is not None else self._response.status)
+        return await self._request.__aexit__(exc_type, exc, tb)
+
+    def _record(self, outcome):
+        self._samples.append((time.perf_counter() - self._start, outcome))
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize_phase(name, samples, seconds, items, item_unit):
+    latencies = sorted(latency for latency, _ in samples)
+    outcomes = {}
+    for _, outcome in samples:
+        outcomes[str(outcome)] = outcomes.get(str(outcome), 0) + 1
+    return {
+        "phase": name,
+        "seconds": seconds,
+        "requests": len(samples),
+        "requests_per_sec": len(samples) / seconds if seconds else None,
+        "items": items,
+        "item_unit": item_unit,
+        "items_per_sec": items / seconds if seconds else None,
+        "outcomes": dict(sorted(outcomes.items())),
+        "p50": percentile(latencies, 0.50),
+        "p90": percentile(latencies, 0.90),
+        "p99": percentile(latencies, 0.99),
+        "max": latencies[-1] if latencies else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_queries(count):
+    return [f"{_TOPICS[i % len(_TOPICS)]} {i // len(_TOPICS)}" for i in range(count)]
+
+
+async def run(base_url, queries, pages, limit, limit_per_host, trace_memory=False):
+    """Runs the search phase, then the fetch and extract phase; returns one summary per phase."""
+    session = MeasuredSession(base_url, limit=limit, limit_per_host=limit_per_host)
+    phases = []
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        results = await search_multiple_queries(queries, session)
+        phases.append(summarize_phase("search", session.reset(), time.perf_counter() - start,
+                                      len(results), "results"))
+
+        targets = results[:pages]
+        start = time.perf_counter()
+        extracted = await extract_content_batch(targets, session)
+        fetched = sum(1 for item in extracted if item["raw_text"])
+        phases.append(summarize_phase("fetch_extract", session.reset(), time.perf_counter() - start,
+                                      fetched, "pages"))
+        if trace_memory:
+            phases[-1]["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        del extracted
+        gc.collect()
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        await session.close()
+    return phases
+
+
+def print_report(phases, server_stats=None):
+    print(f"{'phase':<14} {'secs':>7} {'reqs':>6} {'req/s':>7} {'items':>13} {'items/s':>8} "
+          f"{'p50':>6} {'p90':>6} {'p99':>6} {'max':>6} {'rss MB':>7}")
+    for phase in phases:
+        latencies = " ".join(
+            f"{phase[q]:6.2f}" if phase[q] is not None else f"{'-':>6}" for q in ("p50", "p90", "p99", "max")
+        )
+        rss = f"{phase['peak_rss_mb']:7.0f}" if phase["peak_rss_mb"] is not None else f"{'-':>7}"
+        items = f"{phase['items']} {phase['item_unit']}"
+        print(f"{phase['phase']:<14} {phase['seconds']:7.2f} {phase['requests']:>6} "
+              f"{phase['requests_per_sec'] or 0:7.1f} {items:>13} {phase['items_per_sec'] or 0:8.1f} "
+              f"{latencies} {rss}")
+    for phase in phases:
+        outcomes = ", ".join(f"{outcome}: {count}" for outcome, count in phase["outcomes"].items())
+        print(f"{phase['phase']} outcomes: {outcomes}")
+        if "traced_peak_mb" in phase:
+            print(f"{phase['phase']} traced peak: {phase['traced_peak_mb']:.1f} MB")
+    if server_stats:
+        print("simulator: " + ", ".join(f"{name} {value}" for name, value in server_stats.items()))
+
+
+async def main(args):
+    content_extractor.FETCH_TIMEOUT = args.fetch_timeout
+    runner = None
+    fake = None
+    base_url = args.url
+    if base_url is None:
+        fake = fake_from_arguments(args)
+        runner, base_url = await start_server(fake)
+        print(f"Started simulated web at {base_url}")
+
+    try:
+        phases = await run(base_url, make_queries(args.queries), args.pages, args.limit, args.limit_per_host,
+                           args.trace_memory)
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+
+    print()
+    print_report(phases, fake.stats if fake is not None else None)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"phases": phases, "simulator": fake.stats if fake is not None else None}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test search and fetch against a simulated web")
+    parser.add_argument("--queries", type=int, default=100, help="Queries searched")
+    parser.add_argument("--pages", type=int, default=1000, help="Result pages fetched at most")
+    parser.add_argument("--limit", type=int, default=MAX_CONNECTIONS, help="Client connections open at once")
+    parser.add_argument("--limit-per-host", type=int, default=MAX_CONNECTIONS_PER_HOST,
+                        help="Client connections open at once per host")
+    parser.add_argument("--fetch-timeout", type=float, default=10, help="Seconds before a page fetch is abandoned")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Also report the peak of Python allocations (slows the run down)")
+    parser.add_argument("--url", help="Use an already running simulator (python -m research_service.fake_web)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    add_server_arguments(parser)
+
+    asyncio.run(main(parser.parse_args()))
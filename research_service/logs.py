@@ -0,0 +1,220 @@
+"""
+Structured, non-blocking logging for the service and the pipeline stages.
+
+`configure()` puts a queue handler on the root logger: a log call only fills in the
+record and appends it to a bounded queue, and a background thread formats and
+writes it. Messages are formatted in that thread too, so stage code logs with
+%-style arguments rather than f-strings:
+
+    logger.info("SerpAPI found %d results for: %s", len(results), query)
+
+When the queue is full (the output cannot keep up), records are dropped and counted
+in the `research_log_dropped_total` metric instead of blocking the event loop.
+
+Output is one JSON object per line, carrying the job and stage the record was
+logged from (see `log_context`) and any `extra` fields. High-volume events are
+logged with an `event` extra and can be sampled per event:
+
+    logger.info("Fetched %s", url, extra={"event": "fetch", "url": url, "ok": True})
+
+Configured with RESEARCH_LOG_LEVEL (INFO), RESEARCH_LOG_FORMAT ("json" or "text")
+and RESEARCH_LOG_SAMPLE, e.g. "fetch=0.05" keeps one fetch record in twenty.
+Warnings and errors are never sampled out.
+"""
+
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+
+from research_service import telemetry
+
+LOG_LEVEL = os.getenv("RESEARCH_LOG_LEVEL", "INFO").upper()
+
+LOG_FORMAT = os.getenv("RESEARCH_LOG_FORMAT", "json")
+
+# Records waiting to be written; more are dropped
+LOG_QUEUE_SIZE = int(os.getenv("RESEARCH_LOG_QUEUE_SIZE", "10000"))
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(job_id)s %(stage)s] %(message)s"
+
+# Argument types formatted in the writer thread; others are formatted when logged,
+# as they could be changed before the writer gets to them
+_IMMUTABLE_ARGS = (str, int, float, bool, bytes, type(None))
+
+# Attributes every LogRecord has; any other attribute came from `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_job_id = contextvars.ContextVar("log_job_id", default=None)
+_stage = contextvars.ContextVar("log_stage", default=None)
+
+_lock = threading.Lock()
+_listener = None
+
+
+def parse_sample_rates(value):
+    """Parses 'event=rate,...' into {event: rate}."""
+    rates = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            event, rate = item.split("=", 1)
+            rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+SAMPLE_RATES = parse_sample_rates(os.getenv("RESEARCH_LOG_SAMPLE", ""))
+
+
+@contextlib.contextmanager
+def log_context(job_id=None, stage=None):
+    """Tags records logged inside the block (and tasks and threads it starts) with a job and stage."""
+    tokens = []
+    if job_id is not None:
+        tokens.append((_job_id, _job_id.set(job_id)))
+    if stage is not None:
+        tokens.append((_stage, _stage.set(stage)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def set_stage(stage):
+    """Tags records logged from here on, in the current task, with `stage`."""
+    _stage.set(stage)
+
+
+class ContextFilter(logging.Filter):
+    """Adds the job and stage of the current context to each record."""
+
+    def filter(self, record):
+        record.job_id = _job_id.get()
+        record.stage = _stage.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a random fraction of the records of each sampled event, below WARNING."""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        rate = self.rates.get(getattr(record, "event", None))
+        if rate is None or record.levelno >= logging.WARNING:
+            return True
+        if random.random() >= rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queues records without formatting them, and drops them when the queue is full."""
+
+    def __init__(self, records):
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record):
+        if record.args and not _all_immutable(record.args):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            telemetry.count("research_log_dropped_total")
+
+
+def _all_immutable(args):
+    values = args.values() if isinstance(args, dict) else args
+    return all(isinstance(value, _IMMUTABLE_ARGS) for value in values)
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object: time, level, logger, message, job, stage and extras."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.job_id is not None:
+            entry["job_id"] = record.job_id
+        if record.stage is not None:
+            entry["stage"] = record.stage
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES and name not in ("job_id", "stage"):
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record):
+        record.job_id = record.job_id or "-"
+        record.stage = record.stage or "-"
+        return super().format(record)
+
+
+def configure(level=LOG_LEVEL, fmt=LOG_FORMAT, stream=None):
+    """
+    Routes the root logger through the background queue; safe to call more than once.
+
+    Args:
+        level (str): Lowest level logged.
+        fmt (str): "json" for one JSON object per line, "text" for plain lines.
+        stream (file, optional): Where records are written; stderr by default.
+
+    Returns:
+        logging.handlers.QueueListener: The running writer.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter() if fmt == "json" else _TextFormatter(TEXT_FORMAT))
+
+        handler = _QueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        handler.addFilter(ContextFilter())
+        if SAMPLE_RATES:
+            handler.addFilter(SamplingFilter(SAMPLE_RATES))
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown)
+        return _listener
+
+
+def shutdown():
+    """Writes out the records still queued and stops the writer thread."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
@@ -0,0 +1,439 @@
+"""
+End-to-end research pipeline: search, extract, clean, rank, summarize and report.
+
+One ResearchPipeline is created per process and shared by every request, so all
+requests reuse the same HTTP connection pool, model concurrency controller and
+summary cache instead of building them per call.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+import aiohttp
+
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+from content_extractor import extract_main_text, fetch
+from concurrency import AdaptiveConcurrencyController, default_controller
+from data_processor import clean_text
+from relevance_ranker import rank_documents
+from reporting.output_controller import format_report
+from reporting.report_generator import generate_report
+from summarizer import summarize_sources
+from summary_cache import SummaryCache
+from web_search import search_multiple_queries
+
+from research_service import logs, profiling, telemetry
+from research_service.scheduler import job_priority, slot_weight
+from research_service.shared_cache import PAGE_TTL, SEARCH_TTL, SharedCache
+
+# Frontend report lengths and output formats, mapped to the report generator's names
+REPORT_LENGTHS = {
+    "brief": "short",
+    "short": "short",
+    "medium": "medium",
+    "detailed": "long",
+    "comprehensive": "long",
+    "long": "long",
+}
+
+OUTPUT_FORMATS = {
+    "pdf": "pdf",
+    "markdown": "md",
+    "md": "md",
+    "essay": "essay",
+    "json": "json",
+    "csv": "csv",
+}
+
+DEFAULT_SOURCES = 10
+MAX_SOURCES = 100
+
+# Shared connection pool: total open connections, and per host so one slow site
+# cannot take all of them
+MAX_CONNECTIONS = 100
+MAX_CONNECTIONS_PER_HOST = 8
+
+# Write each job's trace (see research_service.telemetry) to the trace directory
+TRACE_JOBS = os.getenv("RESEARCH_TRACE_JOBS", "1") != "0"
+
+logger = logging.getLogger(__name__)
+
+
+class ResearchRequest:
+    """A validated research request, as submitted by the frontend's research page."""
+
+    def __init__(self, query, keywords=None, time_range=None, report_length="medium",
+                 number_of_sources=DEFAULT_SOURCES, output_format="markdown", profile=False):
+        self.query = query
+        self.keywords = keywords or []
+        self.time_range = time_range
+        self.report_length = report_length
+        self.number_of_sources = number_of_sources
+        self.output_format = output_format
+        # Run the job under the CPU and memory profiler (see research_service.profiling)
+        self.profile = profile
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Builds a request from the frontend's JSON body.
+
+        Raises:
+            ValueError: If the query is missing or a field has an unsupported value.
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object")
+
+        query = str(data.get("query") or "").strip()
+        if not query:
+            raise ValueError("No query provided")
+
+        keywords = data.get("keywords") or []
+        if isinstance(keywords, str):
+            keywords = keywords.split(",")
+        keywords = [str(keyword).strip() for keyword in keywords if str(keyword).strip()]
+
+        report_length = data.get("reportLength", "medium")
+        if report_length not in REPORT_LENGTHS:
+            raise ValueError(f"Unsupported report length: {report_length}")
+
+        output_format = data.get("outputFormat", "markdown")
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+
+        try:
+            number_of_sources = int(data.get("numberOfSources", DEFAULT_SOURCES))
+        except (TypeError, ValueError):
+            raise ValueError("numberOfSources must be a number")
+        number_of_sources = max(1, min(number_of_sources, MAX_SOURCES))
+
+        return cls(query, keywords, data.get("timeRange"), report_length, number_of_sources,
+                   output_format, profile=bool(data.get("profile", False)))
+
+    def queries(self):
+        """The main query, plus one refined query per keyword."""
+        return [self.query] + [f"{self.query} {keyword}" for keyword in self.keywords]
+
+    def dedupe_key(self):
+        """
+        Hash of everything that determines the result, so identical requests (up to
+        case, spacing, keyword order and equivalent length/format names) share it.
+        """
+        normalized = {
+            "query": " ".join(self.query.casefold().split()),
+            "keywords": sorted({" ".join(keyword.casefold().split()) for keyword in self.keywords}),
+            "time_range": str(self.time_range),
+            "length": REPORT_LENGTHS[self.report_length],
+            "sources": self.number_of_sources,
+            "format": OUTPUT_FORMATS[self.output_format],
+        }
+        if self.profile:
+            # A profiled request gets a job of its own, not a share of an unprofiled one
+            normalized["profile"] = True
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def as_dict(self):
+        data = {
+            "query": self.query,
+            "keywords": self.keywords,
+            "timeRange": self.time_range,
+            "reportLength": self.report_length,
+            "numberOfSources": str(self.number_of_sources),
+            "outputFormat": self.output_format,
+        }
+        if self.profile:
+            data["profile"] = True
+        return data
+
+
+class ResearchPipeline:
+    """
+    Runs research requests on the current event loop with shared resources.
+
+    Network stages (search, page fetches, model calls) run concurrently on the loop;
+    CPU-bound stages (text extraction, ranking, rendering) run in worker threads so a
+    large request does not stall the others. Search results and extracted pages are
+    kept in `shared_cache`, and summaries in `cache`; both are SQLite files, so
+    pipelines in several worker processes share them.
+
+    Page fetches and model calls of concurrent jobs are shared out fairly: each job
+    gets slots in proportion to the weight of its priority class, so a 100-source
+    job cannot hold every connection while brief jobs wait.
+    """
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, max_per_host=MAX_CONNECTIONS_PER_HOST,
+                 controller=None, cache=None, shared_cache=None):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.controller = controller
+        self.cache = cache
+        self.shared_cache = shared_cache
+        self.session = None
+        self.fetch_slots = None
+
+    async def start(self):
+        connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.max_per_host)
+        self.session = aiohttp.ClientSession(connector=connector)
+        # Fixed limit (no adaptation); used for its fair sharing between jobs. Made here
+        # rather than in __init__ so its asyncio primitives belong to the running loop
+        self.fetch_slots = AdaptiveConcurrencyController(self.max_connections, self.max_connections,
+                                                         self.max_connections)
+        if self.controller is None:
+            self.controller = default_controller()
+        if self.cache is None:
+            self.cache = SummaryCache()
+        if self.shared_cache is None:
+            self.shared_cache = SharedCache()
+        telemetry.instrument_stages()
+        telemetry.registry.add_collector(self._cache_metrics)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        if self.cache is not None:
+            self.cache.close()
+        if self.shared_cache is not None:
+            self.shared_cache.close()
+
+    def _cache_metrics(self):
+        """Summary cache lookups, which the summarizer counts itself."""
+        return [
+            ("research_cache_requests_total", {"cache": "summary", "result": "hit"}, self.cache.hits),
+            ("research_cache_requests_total", {"cache": "summary", "result": "miss"}, self.cache.misses),
+        ]
+
+    async def search(self, queries):
+        """Searches all queries, answering repeated ones from the shared cache."""
+        cached = await asyncio.gather(*(asyncio.to_thread(self.shared_cache.get, "search", query)
+                                        for query in queries))
+        per_query = dict(zip(queries, cached))
+        missing = [query for query, results in per_query.items() if results is None]
+        telemetry.count("research_cache_requests_total", len(queries) - len(missing), cache="search", result="hit")
+        telemetry.count("research_cache_requests_total", len(missing), cache="search", result="miss")
+
+        async def search_query(query):
+            with telemetry.span("search.query") as span:
+                results = await search_multiple_queries([query], self.session)
+                span.set(query=query, results=len(results))
+                return results
+
+        fresh = await asyncio.gather(*(search_query(query) for query in missing))
+        for query, results in zip(missing, fresh):
+            per_query[query] = results
+            # Empty results usually mean every engine failed; try again next time
+            if results:
+                await asyncio.to_thread(self.shared_cache.set, "search", query, results, SEARCH_TTL)
+
+        seen_urls = set()
+        unique_results = []
+        for query in queries:
+            for result in per_query[query]:
+                if result["url"] not in seen_urls:
+                    seen_urls.add(result["url"])
+                    unique_results.append(result)
+        return unique_results
+
+    async def run(self, request, checkpoints=None, job_id=None, on_event=None):
+        """
+        Runs one research request through every stage.
+
+        Args:
+            request (ResearchRequest): The request to run.
+            checkpoints (JobCheckpoints, optional): Where stage outputs are saved as they
+                complete. Outputs already saved by an earlier, interrupted run are reused,
+                so pages are not fetched and documents not summarized twice.
+            job_id (str, optional): Id reported in the result; a new one is generated otherwise.
+            on_event (callable, optional): Called as `on_event(event, coalesce)` with a
+                progress event dict ('type', 'stage', ...) as the job advances. Events
+                with coalesce=True are counters that supersede earlier ones of the
+                same stage (see research_service.events).
+
+        Returns:
+            dict: The request fields plus 'id', 'timestamp', 'report', 'sources',
+                  'artifact' (path of the rendered report), 'timings' per stage,
+                  'trace' (span count and time per traced stage) and, for profiled
+                  jobs, 'profile' (see research_service.profiling).
+        """
+        job_id = job_id or uuid.uuid4().hex
+        with telemetry.JobTrace(job_id) as trace, logs.log_context(job_id=job_id, stage="search"):
+            try:
+                with telemetry.span("job"):
+                    if profiling.should_profile(request.profile):
+                        async with profiling.JobProfiler(job_id) as profiler:
+                            # A task of its own, created under the profiler, so that its
+                            # samples (and those of tasks it starts) are attributed to it
+                            result = await asyncio.create_task(
+                                self._run(request, checkpoints, job_id, on_event, profiler))
+                        result["profile"] = profiler.summary()
+                    else:
+                        result = await self._run(request, checkpoints, job_id, on_event)
+            finally:
+                if TRACE_JOBS and telemetry.ENABLED:
+                    await asyncio.to_thread(trace.dump)
+        result["trace"] = trace.summary()
+        return result
+
+    async def _run(self, request, checkpoints, job_id, on_event, profiler=None):
+        checkpoints = checkpoints or NoCheckpoints()
+        emit = on_event or _ignore_event
+        weight = slot_weight(job_priority(request))
+        timings = {}
+        started = time.perf_counter()
+
+        def mark(stage, since, **details):
+            now = time.perf_counter()
+            timings[stage] = round(now - since, 3)
+            telemetry.record(stage, since, now)
+            if profiler is not None:
+                profiler.mark(stage)
+            emit({"type": "stage", "stage": stage, "status": "done", "seconds": timings[stage], **details})
+            logger.info("Stage %s done in %.3fs", stage, timings[stage])
+            return now
+
+        # Checkpoints and the shared cache are SQLite files shared with other worker
+        # processes; their calls run in threads so lock waits never stall the loop
+        results = await asyncio.to_thread(checkpoints.get, "search")
+        if results is None:
+            queries = request.queries()
+            emit({"type": "stage", "stage": "search", "status": "started", "queries": queries})
+            results = await self.search(queries)
+            results = results[:request.number_of_sources]
+            await asyncio.to_thread(checkpoints.put, "search", "", results)
+        stage_start = mark("search", started, results=results)
+
+        # Each page is checkpointed as soon as it is fetched and extracted; pages that
+        # could not be fetched are not, so a resumed job tries them again
+        extracted = await asyncio.to_thread(checkpoints.items, "document")
+        fetch_progress = {"type": "progress", "stage": "fetch_extract", "done": 0, "total": len(results)}
+
+        async def fetch_document(result):
+            # Pages already extracted by any worker process are not fetched again
+            document = await asyncio.to_thread(self.shared_cache.get, "page", result["url"])
+            telemetry.count("research_cache_requests_total", cache="page", result="miss" if document is None else "hit")
+            if document is None:
+                async with self.fetch_slots.slot(job_id, weight) as fetch_slot:
+                    with telemetry.span("fetch") as span:
+                        html = await fetch(self.session, result["url"])
+                        span.set(url=result["url"], ok=html is not None)
+                        span.add_bytes(len(html or ""))
+                    fetch_slot.failed = html is None
+                if html is not None:
+                    document = await asyncio.to_thread(profiling.attributed(_extract_document), result, html)
+                    await asyncio.to_thread(self.shared_cache.set, "page", result["url"], document, PAGE_TTL)
+                logger.info("Fetched %s", result["url"],
+                            extra={"event": "fetch", "url": result["url"], "ok": html is not None,
+                                   "bytes": len(html or "")})
+            if document is not None:
+                await asyncio.to_thread(checkpoints.put, "document", result["url"], document)
+                extracted[result["url"]] = document
+            fetch_progress["done"] += 1
+            emit(dict(fetch_progress, url=result["url"], ok=document is not None), True)
+
+        todo = [result for result in results if result["url"] not in extracted]
+        fetch_progress["done"] = len(results) - len(todo)
+        logs.set_stage("fetch_extract")
+        emit({"type": "stage", "stage": "fetch_extract", "status": "started", "urls": len(todo)})
+        await asyncio.gather(*(fetch_document(result) for result in todo))
+        documents = [dict(extracted[result["url"]]) for result in results
+                     if result["url"] in extracted and extracted[result["url"]]["content"]]
+        stage_start = mark("fetch_extract", stage_start, documents=len(documents))
+
+        logs.set_stage("rank")
+        ranked = await asyncio.to_thread(profiling.attributed(rank_documents), documents, request.query)
+        stage_start = mark("rank", stage_start, sources=_source_list(ranked))
+
+        summarized = await asyncio.to_thread(checkpoints.items, "summary")
+        pending = [doc for doc in ranked if doc["url"] not in summarized]
+        summary_progress = {"type": "progress", "stage": "summarize", "done": len(summarized), "total": len(ranked)}
+
+        # Called synchronously by the summarizer; the checkpoint writes are awaited below
+        saves = []
+
+        def save_summary(summary):
+            saves.append(asyncio.create_task(asyncio.to_thread(checkpoints.put, "summary", summary["url"], summary)))
+            summarized[summary["url"]] = summary
+            summary_progress["done"] += 1
+            emit({"type": "summary", "stage": "summarize", **summary})
+            emit(dict(summary_progress), True)
+
+        logs.set_stage("summarize")
+        emit({"type": "stage", "stage": "summarize", "status": "started", "documents": len(pending)})
+
+        await summarize_sources(pending, request.query, self.controller.for_key(job_id, weight), self.cache,
+                                session=self.session, on_summary=save_summary)
+        await asyncio.gather(*saves)
+        # Keep ranking order and carry the scores over for the report
+        summaries = []
+        for doc in ranked:
+            summary = summarized.get(doc["url"])
+            if summary is not None:
+                summary.setdefault("relevance_score", doc["relevance_score"])
+                summaries.append(summary)
+        stage_start = mark("summarize", stage_start, summaries=len(summaries))
+
+        logs.set_stage("report")
+        output_format = OUTPUT_FORMATS[request.output_format]
+        saved = await asyncio.to_thread(checkpoints.get, "report")
+        if saved is not None and os.path.exists(saved["artifact"]):
+            report, artifact = saved["report"], saved["artifact"]
+        else:
+            with telemetry.span("report.generate"):
+                report = await generate_report(summaries, request.query, REPORT_LENGTHS[request.report_length],
+                                               output_format)
+            with telemetry.span("report.render", format=output_format):
+                artifact = await asyncio.to_thread(profiling.attributed(format_report), report, output_format)
+            await asyncio.to_thread(checkpoints.put, "report", "", {"report": report, "artifact": artifact})
+        mark("report", stage_start, findings=len(report["findings"]))
+        timings["total"] = round(time.perf_counter() - started, 3)
+
+        result = request.as_dict()
+        result.update({
+            "id": job_id,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "report": report,
+            "sources": _source_list(ranked),
+            "artifact": artifact,
+            "timings": timings,
+        })
+        return result
+
+
+class NoCheckpoints:
+    """Checkpoint sink for runs that are not resumable: saves nothing."""
+
+    def get(self, stage, key=""):
+        return None
+
+    def put(self, stage, key, value):
+        pass
+
+    def items(self, stage):
+        return {}
+
+
+def _ignore_event(event, coalesce=False):
+    pass
+
+
+def _source_list(ranked):
+    return [{"url": doc["url"], "title": doc["title"], "relevance_score": doc["relevance_score"]}
+            for doc in ranked]
+
+
+def _extract_document(result, html):
+    """Extracts and cleans the main text of a fetched page."""
+    with telemetry.span("extract") as span:
+        span.add_bytes(len(html))
+        text = extract_main_text(html)
+    with telemetry.span("clean") as span:
+        span.add_bytes(len(text))
+        content = clean_text(text)
+    return {"url": result["url"], "title": result.get("title", ""), "content": content}
@@ -0,0 +1,261 @@
+"""
+On-demand profiling of single research jobs.
+
+A profiled job gets a sampling CPU profiler and tracemalloc snapshots at every
+pipeline stage boundary. When it ends, two files tagged with its id are written to
+PROFILE_DIR:
+
+* `<job id>.folded`: sampled stacks in the collapsed format of flamegraph.pl,
+  speedscope and inferno, one line per stack, rooted at `job:<id>;stage:<name>`;
+* `<job id>.memory.json`: per stage, the peak of traced memory and the source lines
+  that allocated the most.
+
+CPU samples are attributed to the job even while other jobs share the process: on
+the event loop by the asyncio task running (tasks created by a profiled job are
+tagged when created), and in worker threads by the job that handed them the work
+(see `attributed`). Memory is traced process-wide, so allocations of jobs running
+at the same time show up in a profiled job's memory report too.
+
+Jobs are profiled when submitted with `"profile": true`, and a fraction
+RESEARCH_PROFILE (0 to 1) of all other jobs is profiled at random.
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+
+PROFILE_DIR = os.getenv("RESEARCH_PROFILE_DIR", os.path.join(".cache", "profiles"))
+
+# Fraction of jobs profiled without being asked to
+PROFILE_RATE = float(os.getenv("RESEARCH_PROFILE", "0"))
+
+# Seconds between two CPU samples
+SAMPLE_INTERVAL = float(os.getenv("RESEARCH_PROFILE_INTERVAL", "0.005"))
+
+# Frames kept per sampled stack, and per allocation traceback
+MAX_STACK_DEPTH = 64
+TRACEMALLOC_FRAMES = 8
+
+# Allocation sites reported per stage
+TOP_ALLOCATIONS = 15
+
+_current_job = contextvars.ContextVar("profiled_job", default=None)
+
+# Task and worker thread -> id of the profiled job it works for
+_task_jobs = weakref.WeakKeyDictionary()
+_thread_jobs = {}
+
+_lock = threading.Lock()
+_active = {}
+_sampler = None
+_tracing_jobs = 0
+_factories = weakref.WeakSet()
+
+
+def should_profile(requested):
+    return bool(requested) or (PROFILE_RATE > 0 and random.random() < PROFILE_RATE)
+
+
+class JobProfiler:
+    """
+    Profiles one job. Use as an async context manager around the job, run the job in
+    a new task created inside it, and call `mark(stage)` as each stage finishes.
+    """
+
+    def __init__(self, job_id, directory=PROFILE_DIR):
+        self.job_id = job_id
+        self.directory = directory
+        self.samples = {}
+        self.sample_count = 0
+        self.stages = []
+        self.memory = []
+        self._snapshot = None
+        self._token = None
+
+    async def __aenter__(self):
+        global _tracing_jobs
+        loop = asyncio.get_running_loop()
+        _install_task_factory(loop)
+        self._token = _current_job.set(self.job_id)
+
+        with _lock:
+            _tracing_jobs += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            _active[self.job_id] = self
+        tracemalloc.reset_peak()
+        self._snapshot = await asyncio.to_thread(_take_snapshot)
+        _start_sampler(loop, threading.get_ident())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        global _tracing_jobs
+        self.mark("finish")
+        with _lock:
+            _active.pop(self.job_id, None)
+            _tracing_jobs -= 1
+            if _tracing_jobs == 0:
+                tracemalloc.stop()
+        _current_job.reset(self._token)
+        await asyncio.to_thread(self.dump)
+        return False
+
+    def mark(self, stage):
+        """
+        Closes the stage that just finished: its samples and allocations get its name.
+        Taking the snapshot pauses the process briefly.
+        """
+        snapshot = _take_snapshot() if tracemalloc.is_tracing() else None
+        current, peak = tracemalloc.get_traced_memory()
+        top = []
+        if snapshot is not None and self._snapshot is not None:
+            for stat in snapshot.compare_to(self._snapshot, "lineno")[:TOP_ALLOCATIONS]:
+                frame = stat.traceback[0]
+                top.append({"line": f"{frame.filename}:{frame.lineno}", "size_diff": stat.size_diff,
+                            "count_diff": stat.count_diff, "size": stat.size})
+        with _lock:
+            self.stages.append(stage)
+        self.memory.append({"stage": stage, "traced_bytes": current, "peak_bytes": peak, "top": top})
+        self._snapshot = snapshot
+        tracemalloc.reset_peak()
+
+    def record(self, stack):
+        """Adds one CPU sample (called by the sampler thread)."""
+        key = (len(self.stages), stack)
+        self.samples[key] = self.samples.get(key, 0) + 1
+        self.sample_count += 1
+
+    def stage_name(self, index):
+        return self.stages[index] if index < len(self.stages) else "finish"
+
+    def summary(self):
+        per_stage = {}
+        for (index, _), count in list(self.samples.items()):
+            stage = self.stage_name(index)
+            per_stage[stage] = per_stage.get(stage, 0) + count
+        return {
+            "cpu_samples": self.sample_count,
+            "sample_interval": SAMPLE_INTERVAL,
+            "samples_per_stage": per_stage,
+            "peak_bytes_per_stage": {entry["stage"]: entry["peak_bytes"] for entry in self.memory},
+            "folded": folded_path(self.job_id, self.directory),
+            "memory": memory_path(self.job_id, self.directory),
+        }
+
+    def dump(self):
+        """Writes the folded stacks and the memory report."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(folded_path(self.job_id, self.directory), "w", encoding="utf-8") as f:
+            for (index, stack), count in sorted(self.samples.items()):
+                f.write(f"job:{self.job_id};stage:{self.stage_name(index)};{stack} {count}\n")
+        with open(memory_path(self.job_id, self.directory), "w", encoding="utf-8") as f:
+            json.dump({"job_id": self.job_id, "stages": self.memory}, f, indent=2)
+
+
+def folded_path(job_id, directory=PROFILE_DIR):
+    return os.path.join(directory, f"{job_id}.folded")
+
+
+def memory_path(job_id, directory=PROFILE_DIR):
+    return os.path.join(directory, f"{job_id}.memory.json")
+
+
+def attributed(func):
+    """
+    Returns `func` wrapped so CPU samples taken while it runs in a worker thread are
+    attributed to the current profiled job; `func` itself if no job is profiled.
+    """
+    job_id = _current_job.get()
+    if job_id is None:
+        return func
+
+    def run(*args, **kwargs):
+        ident = threading.get_ident()
+        _thread_jobs[ident] = job_id
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _thread_jobs.pop(ident, None)
+    return run
+
+
+def _take_snapshot():
+    snapshot = tracemalloc.take_snapshot()
+    return snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),  # the sampler's own stacks
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+
+
+def _install_task_factory(loop):
+    """Tags every task created from a profiled job's context with the job id."""
+    if loop in _factories:
+        return
+    previous = loop.get_task_factory()
+
+    def factory(loop, coro, **kwargs):
+        if previous is not None:
+            task = previous(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        context = kwargs.get("context")
+        job_id = context.get(_current_job) if context is not None else _current_job.get()
+        if job_id is not None:
+            _task_jobs[task] = job_id
+        return task
+
+    loop.set_task_factory(factory)
+    _factories.add(loop)
+
+
+def _start_sampler(loop, loop_thread):
+    global _sampler
+    with _lock:
+        if _sampler is None or not _sampler.is_alive():
+            _sampler = threading.Thread(target=_sample, args=(loop, loop_thread), name="job-profiler",
+                                        daemon=True)
+            _sampler.start()
+
+
+def _sample(loop, loop_thread):
+    global _sampler
+    # The C implementation's map of running task per loop; readable from this thread
+    current_tasks = getattr(asyncio.tasks, "_current_tasks", {})
+    while True:
+        time.sleep(SAMPLE_INTERVAL)
+        samples = []
+        for ident, frame in sys._current_frames().items():
+            if ident == loop_thread:
+                task = current_tasks.get(loop)
+                job_id = _task_jobs.get(task) if task is not None else None
+            else:
+                job_id = _thread_jobs.get(ident)
+            if job_id is not None:
+                samples.append((job_id, _fold(frame)))
+
+        with _lock:
+            if not _active:
+                _sampler = None
+                return
+            # A job whose profiler has already been closed gets no more samples
+            for job_id, stack in samples:
+                profiler = _active.get(job_id)
+                if profiler is not None:
+                    profiler.record(stack)
+
+
+def _fold(frame):
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
@@ -0,0 +1,252 @@
+"""
+Recorded HTTP responses, replayed offline.
+
+A fixture directory holds a `manifest.json` listing responses (URL, status, content
+type and the file holding the body) plus the benchmark queries. `ReplaySession`
+answers `get` calls from the fixtures instead of the network, so search engines,
+search APIs and article pages can be replayed through the unchanged stage code:
+
+    session = ReplaySession(Fixtures.load())
+    results = await search_multiple_queries(["AI in healthcare"], session)
+
+Requests to local addresses (e.g. a stand-in model server) are passed through to a
+real session, if one is given. Fixtures are recorded from the live web with
+
+    python -m research_service.replay record "AI in healthcare" "AI in healthcare diagnostics"
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from urllib.parse import urlencode
+
+import aiohttp
+from yarl import URL
+
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Query parameters left out of fixture keys, so recordings never hold credentials
+SECRET_PARAMS = {"api_key", "key", "token"}
+
+# Hosts served by the passthrough session rather than the fixtures
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "::1"}
+
+# Fixture kind per search host; everything else is recorded as a page
+SEARCH_KINDS = {
+    "duckduckgo.com": "serp:duckduckgo",
+    "html.duckduckgo.com": "serp:duckduckgo",
+    "search.brave.com": "serp:brave",
+    "www.google.com": "serp:google",
+    "serpapi.com": "api:serpapi",
+    "api.bing.microsoft.com": "api:bing",
+}
+
+
+def replay_key(url, params=None):
+    """Identifies a request by host, path and query parameters (in any order, without secrets)."""
+    url = URL(url)
+    if params:
+        url = url.update_query(params)
+    query = sorted((name, value) for name, value in url.query.items() if name not in SECRET_PARAMS)
+    return f"{url.host}{url.path}" + (f"?{urlencode(query)}" if query else "")
+
+
+def fixture_name(key, content_type):
+    """File name of a recorded body: host plus a hash of the key."""
+    extension = "json" if "json" in content_type else "html"
+    host = key.split("/", 1)[0]
+    return f"{host}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}.{extension}"
+
+
+class Fixtures:
+    """Recorded responses of one fixture directory, by request key."""
+
+    def __init__(self, directory, queries, responses):
+        self.directory = directory
+        self.queries = queries
+        self.responses = {replay_key(entry["url"]): entry for entry in responses}
+        self._bodies = {}
+
+    @classmethod
+    def load(cls, directory=FIXTURES_DIR):
+        with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        return cls(directory, manifest.get("queries", []), manifest.get("responses", []))
+
+    def lookup(self, key):
+        """Returns (status, content type, body) of a recorded response, or None."""
+        entry = self.responses.get(key)
+        if entry is None:
+            return None
+        return entry["status"], entry["content_type"], self.body(entry)
+
+    def body(self, entry):
+        body = self._bodies.get(entry["file"])
+        if body is None:
+            with open(os.path.join(self.directory, entry["file"]), encoding="utf-8") as f:
+                body = self._bodies[entry["file"]] = f.read()
+        return body
+
+    def of_kind(self, kind, status=200):
+        """Bodies of all responses of one kind (e.g. 'page' or 'serp:google')."""
+        return [self.body(entry) for entry in self.responses.values()
+                if entry["kind"] == kind and entry["status"] == status]
+
+
+class ReplayResponse:
+    """The parts of aiohttp's ClientResponse the stage modules use."""
+
+    def __init__(self, url, status, content_type, body):
+        self.url = URL(url)
+        self.status = status
+        self.content_type = content_type
+        self.headers = {"Content-Type": content_type}
+        self._body = body
+
+    async def text(self, encoding=None):
+        return self._body
+
+    async def read(self):
+        return self._body.encode("utf-8")
+
+    async def json(self, content_type=None):
+        return json.loads(self._body)
+
+    def release(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class _Recorded:
+    """Async context manager around a coroutine returning a ReplayResponse."""
+
+    def __init__(self, request):
+        self._request = request
+        self._response = None
+
+    async def __aenter__(self):
+        self._response = await self._request
+        return self._response
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._response.release()
+        return False
+
+
+class ReplaySession:
+    """
+    Stand-in for an aiohttp ClientSession that serves `get` from recorded fixtures.
+
+    Requests without a recording get a 404, and are counted in `misses` so a benchmark
+    can tell that its fixtures no longer match what the code requests.
+    """
+
+    def __init__(self, fixtures, passthrough=None):
+        self.fixtures = fixtures
+        self.passthrough = passthrough
+        self.requests = 0
+        self.misses = []
+
+    def get(self, url, params=None, **kwargs):
+        if URL(url).host in LOCAL_HOSTS and self.passthrough is not None:
+            return self.passthrough.get(url, params=params, **kwargs)
+
+        self.requests += 1
+        key = replay_key(url, params)
+        recorded = self.fixtures.lookup(key)
+        if recorded is None:
+            self.misses.append(key)
+            return ReplayResponse(url, 404, "text/html", "")
+        return ReplayResponse(url, *recorded)
+
+    def post(self, url, **kwargs):
+        if self.passthrough is None:
+            raise RuntimeError(f"No passthrough session for POST {url}")
+        return self.passthrough.post(url, **kwargs)
+
+    @property
+    def closed(self):
+        return False
+
+    async def close(self):
+        pass
+
+
+class RecordingSession:
+    """Wraps a real session and saves every `get` response it makes as a fixture."""
+
+    def __init__(self, session):
+        self.session = session
+        self.entries = {}
+
+    def get(self, url, params=None, **kwargs):
+        return _Recorded(self._record(url, params, kwargs))
+
+    async def _record(self, url, params, kwargs):
+        async with self.session.get(url, params=params, **kwargs) as response:
+            body = await response.text(errors="replace")
+            content_type = response.content_type or "text/html"
+            status = response.status
+        key = replay_key(url, params)
+        kind = SEARCH_KINDS.get(URL(url).host, "page")
+        # The key URL: the request URL with its parameters, minus secrets
+        self.entries[key] = {"url": f"https://{key}", "kind": kind, "status": status,
+                             "content_type": content_type, "body": body}
+        return ReplayResponse(url, status, content_type, body)
+
+    def save(self, directory, queries):
+        """Writes the recorded responses and a manifest to `directory`."""
+        os.makedirs(os.path.join(directory, "responses"), exist_ok=True)
+        responses = []
+        for key, entry in self.entries.items():
+            entry = dict(entry)
+            body = entry.pop("body")
+            entry["file"] = f"responses/{fixture_name(key, entry['content_type'])}"
+            with open(os.path.join(directory, entry["file"]), "w", encoding="utf-8", newline="\n") as f:
+                f.write(body)
+            responses.append(entry)
+
+        with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8", newline="\n") as f:
+            json.dump({"queries": queries, "responses": responses}, f, indent=2)
+            f.write("\n")
+        return len(responses)
+
+
+async def record(queries, directory=FIXTURES_DIR, pages=10):
+    """
+    Runs the search stage for `queries` against the live web, fetches the top `pages`
+    results of each, and saves every response as fixtures in `directory`.
+    """
+    from content_extractor import fetch
+    from web_search import search_multiple_queries
+
+    async with aiohttp.ClientSession() as session:
+        recorder = RecordingSession(session)
+        results = []
+        for query in queries:
+            results.extend((await search_multiple_queries([query], recorder))[:pages])
+        urls = list(dict.fromkeys(result["url"] for result in results))
+        await asyncio.gather(*(fetch(recorder, url) for url in urls))
+    return recorder.save(directory, queries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record HTTP fixtures for the offline benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record", help="Record search results and pages from the live web")
+    record_parser.add_argument("queries", nargs="+")
+    record_parser.add_argument("--directory", default=FIXTURES_DIR)
+    record_parser.add_argument("--pages", type=int, default=10, help="Result pages fetched per query")
+    args = parser.parse_args()
+
+    count = asyncio.run(record(args.queries, args.directory, args.pages))
+    print(f"Recorded {count} responses to {args.directory}")
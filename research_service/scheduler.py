@@ -0,0 +1,128 @@
+"""
+Job priorities, cost estimates and admission control.
+
+Every research request is given a priority class from its report length and a cost
+estimate from its size (queries and sources). The job store hands out queued jobs by
+priority (with aging, so large jobs are delayed but never starved) while the total
+cost of running jobs stays under a capacity limit, and inside the pipeline each job
+gets fetch and model slots in proportion to its priority weight. New jobs whose
+estimated wait exceeds the limit of their class are rejected with that estimate.
+"""
+
+import os
+import time
+
+# Priority class per report length (lower runs first)
+PRIORITIES = {
+    "brief": 0,
+    "short": 0,
+    "medium": 1,
+    "detailed": 2,
+    "long": 2,
+    "comprehensive": 3,
+}
+
+# Share of fetch and model slots a job gets relative to others, per priority class
+SLOT_WEIGHTS = {0: 4.0, 1: 2.0, 2: 1.0, 3: 1.0}
+
+# A queued job moves up one priority class for every AGING_SECONDS it waits
+AGING_SECONDS = float(os.getenv("RESEARCH_AGING_SECONDS", "120"))
+
+# Total estimated cost of the jobs running at once, across all worker processes.
+# A job larger than this still runs, but only when nothing else is running.
+MAX_RUNNING_COST = float(os.getenv("RESEARCH_MAX_RUNNING_COST", "400"))
+
+# Longest estimated wait (seconds) a new job of each class is admitted with
+MAX_WAIT = {
+    0: float(os.getenv("RESEARCH_MAX_WAIT_BRIEF", "60")),
+    1: float(os.getenv("RESEARCH_MAX_WAIT", "600")),
+    2: float(os.getenv("RESEARCH_MAX_WAIT", "600")),
+    3: float(os.getenv("RESEARCH_MAX_WAIT", "600")),
+}
+
+# Cost units: one unit is roughly one source fetched, extracted and summarized
+QUERY_COST = 2.0
+LONG_REPORT_FACTOR = 1.25
+
+# Throughput assumed (cost units per second of a running job) until enough jobs have finished
+DEFAULT_THROUGHPUT = 1.0
+
+# Seconds of completed jobs used to measure throughput, and the fewest jobs it is measured from
+THROUGHPUT_WINDOW = 600
+MIN_THROUGHPUT_JOBS = 3
+
+
+def job_priority(request):
+    return PRIORITIES.get(request.report_length, 1)
+
+
+def slot_weight(priority):
+    return SLOT_WEIGHTS.get(priority, 1.0)
+
+
+def estimate_cost(request):
+    """Estimates the work a request takes, in cost units."""
+    cost = len(request.queries()) * QUERY_COST + request.number_of_sources
+    if job_priority(request) >= 2:
+        cost *= LONG_REPORT_FACTOR
+    return round(cost, 2)
+
+
+class Overloaded(Exception):
+    """Raised when a job is not admitted; `retry_after` is a suggested delay in seconds."""
+
+    def __init__(self, estimated_wait, retry_after):
+        super().__init__(f"Service overloaded: estimated wait {estimated_wait:.0f}s")
+        self.estimated_wait = estimated_wait
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Decides whether a new job is admitted, from the backlog in the job store.
+
+    A new job waits only for the work that has to finish before it fits in the
+    running cost limit: the cost queued ahead of it (jobs of the same or a higher
+    priority class) and its own cost, beyond the capacity left free by the running
+    jobs. That work drains at the measured throughput of a running job times the
+    number of jobs running. Since only jobs ahead count, brief reports keep being
+    admitted (and stay fast) while large ones back up.
+    """
+
+    def __init__(self, store, max_wait=None):
+        self.store = store
+        self.max_wait = max_wait or MAX_WAIT
+
+    def estimate_wait(self, priority, cost=0.0):
+        backlog = self.store.backlog(priority)
+        busy = backlog["running_cost"] + backlog["queued_cost"]
+        # A job larger than the limit starts once everything ahead of it has finished
+        to_drain = min(busy, max(0.0, busy + cost - self.store.max_running_cost))
+        if not to_drain:
+            return 0.0
+        return to_drain / (self.throughput() * max(1, backlog["running_jobs"]))
+
+    def throughput(self):
+        """
+        Cost units a running job gets through per second, measured over the jobs
+        completed in the last THROUGHPUT_WINDOW seconds.
+        """
+        done_cost, busy_seconds, jobs = self.store.completed_cost(time.time() - THROUGHPUT_WINDOW)
+        if jobs < MIN_THROUGHPUT_JOBS or busy_seconds <= 0:
+            return DEFAULT_THROUGHPUT
+        return max(done_cost / busy_seconds, 0.01)
+
+    def admit(self, request):
+        """
+        Returns (priority, cost, estimated wait) for a request that is admitted.
+
+        Raises:
+            Overloaded: If the estimated wait is above the limit for its class.
+        """
+        priority = job_priority(request)
+        cost = estimate_cost(request)
+        wait = self.estimate_wait(priority, cost)
+        limit = self.max_wait.get(priority, max(self.max_wait.values()))
+        if wait > limit:
+            raise Overloaded(wait, retry_after=max(1, int(wait - limit)))
+        return priority, cost, wait
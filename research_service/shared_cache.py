@@ -0,0 +1,108 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_CACHE_PATH = os.getenv("RESEARCH_CACHE_PATH", os.path.join(".cache", "research.sqlite3"))
+
+# Default time to live per namespace, in seconds
+SEARCH_TTL = 3600
+PAGE_TTL = 24 * 3600
+
+
+class SharedCache:
+    """
+    Expiring key-value cache backed by SQLite, shared by every process using the
+    same file.
+
+    One cache holds several namespaces (e.g. search results per query, extracted
+    pages per URL). Values are stored as compressed JSON. The database runs in WAL
+    mode so worker processes can read while another one writes. Expired entries are
+    ignored on read and removed, together with the least recently used entries once
+    a namespace exceeds `max_entries`, when new entries are written.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=50000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = {}
+        self.misses = {}
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (namespace, last_used)")
+
+    def get(self, namespace, key):
+        """Returns the cached value, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ? AND expires > ?",
+                (namespace, key, now),
+            ).fetchone()
+            if row is None:
+                self.misses[namespace] = self.misses.get(namespace, 0) + 1
+                return None
+
+            self.hits[namespace] = self.hits.get(namespace, 0) + 1
+            self._conn.execute(
+                "UPDATE entries SET last_used = ? WHERE namespace = ? AND key = ?", (now, namespace, key)
+            )
+        return json.loads(zlib.decompress(row[0]))
+
+    def set(self, namespace, key, value, ttl):
+        value = zlib.compress(json.dumps(value).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, expires, last_used) VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, value, now + ttl, now),
+            )
+            # Counting entries on every write is not free; trim periodically instead
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._evict(namespace, now)
+
+    def stats(self):
+        """Returns hit/miss counters per namespace for this instance."""
+        namespaces = set(self.hits) | set(self.misses)
+        return {
+            namespace: {"hits": self.hits.get(namespace, 0), "misses": self.misses.get(namespace, 0)}
+            for namespace in sorted(namespaces)
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self, namespace, now):
+        self._conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+        entries = self._conn.execute("SELECT COUNT(*) FROM entries WHERE namespace = ?", (namespace,)).fetchone()[0]
+        excess = entries - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key IN "
+                "(SELECT key FROM entries WHERE namespace = ? ORDER BY last_used LIMIT ?)",
+                (namespace, namespace, excess),
+            )
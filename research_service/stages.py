@@ -0,0 +1,28 @@
+"""
+Makes the pipeline stage modules importable.
+
+Each stage lives in its own script directory and imports its siblings by bare module
+name (one directory even has a space in its name), so the directories are put on
+sys.path instead of being imported as packages.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STAGE_DIRS = [
+    ROOT,  # web_search.py
+    os.path.join(ROOT, "content_extraction_and_cleaning"),
+    os.path.join(ROOT, "summarization"),
+    os.path.join(ROOT, "report_generator", "Autonomous agent"),
+]
+
+
+def add_stage_paths():
+    for directory in STAGE_DIRS:
+        if directory not in sys.path:
+            sys.path.append(directory)
+
+
+add_stage_paths()
@@ -0,0 +1,435 @@
+"""
+Per-stage tracing and metrics.
+
+Code under measurement opens spans:
+
+    with telemetry.span("fetch", url=url) as span:
+        html = await fetch(session, url)
+        span.add_bytes(len(html))
+
+Each span feeds a latency histogram and error counter per stage, exposed in the
+Prometheus text format by `render_prometheus`. While a job trace is active (see
+`JobTrace`), spans are also recorded with their timing, and the trace can be written
+out in the Chrome trace-event format (chrome://tracing, Perfetto).
+
+Set RESEARCH_TELEMETRY=0 to disable: `span` then returns a shared no-op object and
+the stage modules are left unwrapped, so the cost is one function call per span.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+
+ENABLED = os.getenv("RESEARCH_TELEMETRY", "1") != "0"
+
+TRACE_DIR = os.getenv("RESEARCH_TRACE_DIR", os.path.join(".cache", "traces"))
+
+# Latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Spans recorded per job trace; later spans are counted but dropped
+MAX_TRACE_SPANS = 20000
+
+METRIC_HELP = {
+    "research_stage_seconds": ("histogram", "Duration of pipeline stage spans."),
+    "research_stage_errors_total": ("counter", "Stage spans that raised an exception."),
+    "research_stage_bytes_total": ("counter", "Bytes processed by stage spans."),
+    "research_cache_requests_total": ("counter", "Cache lookups by cache and result."),
+    "research_search_empty_total": ("counter", "Provider searches that returned no results."),
+    "research_jobs_total": ("counter", "Finished job runs by outcome."),
+    "research_log_dropped_total": ("counter", "Log records dropped because the log queue was full."),
+}
+
+_current_trace = contextvars.ContextVar("research_trace", default=None)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Registry:
+    """
+    Thread-safe counters and histograms keyed by metric name and label values.
+
+    Worker processes send their `snapshot` to the front door, which keeps the newest
+    one per process (`merge`) and renders them summed with its own metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._remote = {}
+        self._collectors = []
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(LATENCY_BUCKETS)
+            histogram.observe(value)
+
+    def add_collector(self, collect):
+        """
+        Registers a callable returning counters kept elsewhere (e.g. cache hit counts
+        of a stage module), as a list of (name, labels dict, value), read at snapshot time.
+        """
+        self._collectors.append(collect)
+
+    def snapshot(self):
+        """Returns this process's counters and histograms as picklable lists."""
+        collected = [((name, tuple(sorted(labels.items()))), value)
+                     for collect in self._collectors for name, labels, value in collect()]
+        with self._lock:
+            return {
+                "counters": list(self._counters.items()) + collected,
+                "histograms": [(key, list(h.counts), h.count, h.sum) for key, h in self._histograms.items()],
+            }
+
+    def merge(self, source, snapshot):
+        """Replaces the metrics last received from `source` (e.g. a worker process id)."""
+        with self._lock:
+            self._remote[source] = snapshot
+
+    def render(self):
+        """Returns all metrics in the Prometheus text exposition format."""
+        local = self.snapshot()
+        with self._lock:
+            snapshots = [local] + list(self._remote.values())
+
+        counters = {}
+        histograms = {}
+        for snapshot in snapshots:
+            for key, value in snapshot["counters"]:
+                counters[key] = counters.get(key, 0) + value
+            for key, counts, count, total in snapshot["histograms"]:
+                merged = histograms.setdefault(key, [[0] * len(LATENCY_BUCKETS), 0, 0.0])
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += count
+                merged[2] += total
+
+        lines = []
+        described = set()
+
+        def describe(name, kind, text):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            describe(name, *METRIC_HELP.get(name, ("counter", name)))
+            lines.append(f"{name}{_labels(labels)} {value}")
+
+        for (name, labels), (counts, count, total) in sorted(histograms.items()):
+            describe(name, *METRIC_HELP.get(name, ("histogram", name)))
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+
+
+class Span:
+    """A timed section of work; see `span`."""
+
+    __slots__ = ("name", "labels", "attributes", "start", "trace")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.attributes = None
+        self.trace = _current_trace.get()
+
+    def set(self, **attributes):
+        """Attaches attributes to the span's trace record (not to the metrics)."""
+        if self.trace is not None:
+            if self.attributes is None:
+                self.attributes = {}
+            self.attributes.update(attributes)
+
+    def add_bytes(self, count):
+        registry.inc("research_stage_bytes_total", count, stage=self.name)
+        self.set(bytes=count)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        registry.observe("research_stage_seconds", duration, stage=self.name, **self.labels)
+        if exc_type is not None:
+            registry.inc("research_stage_errors_total", stage=self.name, error=exc_type.__name__)
+        if self.trace is not None:
+            args = dict(self.labels, **(self.attributes or {}))
+            if exc_type is not None:
+                args["error"] = exc_type.__name__
+            self.trace.record(self.name, self.start, duration, args)
+        return False
+
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+    def add_bytes(self, count):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name, **labels):
+    """
+    Returns a context manager timing one unit of work of stage `name`.
+
+    Keep `labels` low-cardinality (e.g. provider name, never a URL); they become
+    Prometheus labels. Per-item details belong in `Span.set`.
+    """
+    if not ENABLED:
+        return _NOOP_SPAN
+    return Span(name, labels)
+
+
+def count(name, value=1, **labels):
+    if ENABLED:
+        registry.inc(name, value, **labels)
+
+
+def record(name, start, end, **labels):
+    """Records a span timed by the caller, from two `time.perf_counter()` readings."""
+    if not ENABLED:
+        return
+    registry.observe("research_stage_seconds", end - start, stage=name, **labels)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(name, start, end - start, labels)
+
+
+class JobTrace:
+    """
+    Spans of one job, in start order. Use as a context manager around the job: spans
+    opened in that context (including in tasks and threads started from it) are
+    recorded.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.origin = time.perf_counter()
+        self.wall_origin = time.time()
+        self.spans = []
+        self.dropped = 0
+        # Row of the trace view per asyncio task or thread, so concurrent spans of
+        # different tasks do not overlap in one row
+        self._lanes = {}
+        self._token = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self._token = _current_trace.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_trace.reset(self._token)
+        return False
+
+    def record(self, name, start, duration, args):
+        entry = {
+            "name": name,
+            "start": start - self.origin,
+            "duration": duration,
+            "args": args,
+        }
+        with self._lock:
+            entry["lane"] = self._lanes.setdefault(_lane(), len(self._lanes) + 1)
+            if len(self.spans) < MAX_TRACE_SPANS:
+                self.spans.append(entry)
+            else:
+                self.dropped += 1
+
+    def summary(self):
+        """Total time and span count per stage."""
+        totals = {}
+        with self._lock:
+            spans = list(self.spans)
+        for entry in spans:
+            total = totals.setdefault(entry["name"], {"spans": 0, "seconds": 0.0})
+            total["spans"] += 1
+            total["seconds"] = round(total["seconds"] + entry["duration"], 6)
+        return totals
+
+    def to_chrome_trace(self):
+        """Returns the trace in the Chrome trace-event JSON format."""
+        with self._lock:
+            spans = list(self.spans)
+        events = [
+            {
+                "name": entry["name"],
+                "ph": "X",
+                "ts": round(entry["start"] * 1e6, 1),
+                "dur": round(entry["duration"] * 1e6, 1),
+                "pid": os.getpid(),
+                "tid": entry["lane"],
+                "args": entry["args"],
+            }
+            for entry in spans
+        ]
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"job_id": self.job_id, "started": self.wall_origin, "dropped_spans": self.dropped},
+        }
+
+    def dump(self, directory=TRACE_DIR):
+        """Writes the trace to `<directory>/<job id>.json` and returns the path."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.job_id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+        return path
+
+
+def _lane():
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:  # not on an event loop thread
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+def trace_path(job_id, directory=TRACE_DIR):
+    return os.path.join(directory, f"{job_id}.json")
+
+
+def render_prometheus():
+    return registry.render()
+
+
+_instrumented = False
+
+
+def instrument_stages():
+    """
+    Wraps the stage modules' search provider calls, result parsers and model calls
+    (including the wait for a model slot) in spans.
+
+    The stage modules stay free of any telemetry dependency; this is only done when
+    telemetry is enabled.
+    """
+    global _instrumented
+    if not ENABLED or _instrumented:
+        return
+    _instrumented = True
+
+    import summarizer
+    from web_search import WebSearchModule
+
+    for method, provider in (("search_with_serpapi", "serpapi"), ("search_with_bing", "bing"),
+                             ("search_with_scraping", "scraping")):
+        setattr(WebSearchModule, method, _traced_provider(getattr(WebSearchModule, method), provider))
+
+    for method, engine in (("_parse_duckduckgo", "duckduckgo"), ("_parse_brave", "brave"),
+                           ("_parse_google", "google")):
+        setattr(WebSearchModule, method, _traced_parser(getattr(WebSearchModule, method), engine))
+
+    summarizer._call_model = _traced_model_call(summarizer._call_model)
+
+
+def _traced_provider(method, provider):
+    arguments = _argument_reader(method)
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        with span("search.provider", provider=provider) as s:
+            results = await method(*args, **kwargs)
+            s.set(query=arguments(args, kwargs).get("query"), results=len(results))
+            if not results:
+                count("research_search_empty_total", provider=provider)
+            return results
+    return wrapper
+
+
+def _traced_parser(method, engine):
+    arguments = _argument_reader(method)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with span("search.parse", engine=engine) as s:
+            s.add_bytes(len(arguments(args, kwargs).get("html") or ""))
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def _traced_model_call(call_model):
+    arguments = _argument_reader(call_model)
+
+    @functools.wraps(call_model)
+    async def wrapper(*args, **kwargs):
+        with span("llm") as s:
+            s.add_bytes(len(arguments(args, kwargs).get("prompt") or ""))
+            response = await call_model(*args, **kwargs)
+            s.set(response_chars=len(response))
+            return response
+    return wrapper
+
+
+def _argument_reader(function):
+    """
+    Returns a function mapping a call's (args, kwargs) to {parameter name: value}, so
+    wrappers can pass calls through untouched and still read the arguments they trace.
+    """
+    signature = inspect.signature(function)
+
+    def arguments(args, kwargs):
+        try:
+            return signature.bind_partial(*args, **kwargs).arguments
+        except TypeError:
+            return {}
+    return arguments
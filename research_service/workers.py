@@ -0,0 +1,173 @@
+"""
+Multi-process job execution.
+
+A single process cannot spread the CPU-heavy stages (readability extraction,
+cleaning, TF-IDF ranking, PDF rendering) over several cores. In multi-process mode
+the HTTP front door only accepts requests and streams events, while worker
+processes, each with its own event loop and pipeline, claim jobs from the shared job
+store. A process only claims a job when one of its job slots is free, so work goes
+to whichever process has capacity. Search results, extracted pages and summaries are
+cached in SQLite files every process opens, and pipeline events are relayed back to
+the front door through a queue.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+
+from research_service import logs, telemetry
+from research_service.jobs import JobStore, JobWorkerPool
+from research_service.pipeline import ResearchPipeline
+
+# Worker processes started by the front door (0 runs jobs in the front door itself)
+DEFAULT_PROCESSES = int(os.getenv("RESEARCH_PROCESSES", "0"))
+
+# How often the front door checks for (and replaces) worker processes that died
+SUPERVISE_INTERVAL = 5.0
+
+# How often worker processes send their metrics to the front door
+METRICS_INTERVAL = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+class QueueEventSink:
+    """
+    Forwards a worker process's job events to the front door.
+
+    Has the publishing side of EventBus's interface, so a JobWorkerPool can publish
+    to it unchanged.
+    """
+
+    def __init__(self, events_queue):
+        self.events_queue = events_queue
+
+    def publish(self, job_id, event, coalesce=False):
+        self.events_queue.put(("publish", job_id, event, coalesce))
+
+    def publisher(self, job_id):
+        def publish(event, coalesce=False):
+            self.publish(job_id, event, coalesce)
+        return publish
+
+    def close(self, job_id):
+        self.events_queue.put(("close", job_id))
+
+
+def run_worker_process(events_queue, jobs_per_process):
+    """Entry point of a worker process: runs jobs until SIGTERM."""
+    logs.configure()
+    asyncio.run(_serve(events_queue, jobs_per_process))
+
+
+async def _serve(events_queue, jobs_per_process):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):  # e.g. on Windows
+            pass
+
+    pipeline = ResearchPipeline()
+    store = JobStore()
+    await pipeline.start()
+    pool = JobWorkerPool(pipeline, store, workers=jobs_per_process, events=QueueEventSink(events_queue))
+    pool.start()
+    reporter = asyncio.create_task(_report_metrics(events_queue)) if telemetry.ENABLED else None
+    try:
+        await stop.wait()
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        # Jobs in progress are released back to the queue for another process
+        await pool.close()
+        await pipeline.close()
+        store.close()
+
+
+async def _report_metrics(events_queue):
+    while True:
+        await asyncio.sleep(METRICS_INTERVAL)
+        events_queue.put(("metrics", os.getpid(), telemetry.registry.snapshot()))
+
+
+class WorkerProcesses:
+    """
+    Starts and supervises the worker processes of the front door, and relays their
+    events into its EventBus.
+    """
+
+    def __init__(self, events, processes=DEFAULT_PROCESSES, jobs_per_process=4):
+        self.events = events
+        self.processes = processes
+        self.jobs_per_process = jobs_per_process
+        # Spawned rather than forked: the parent already runs an event loop and threads
+        self._context = multiprocessing.get_context("spawn")
+        self._queue = self._context.Queue()
+        self._workers = []
+        self._relay = None
+        self._supervisor = None
+        self._running = False
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        self._running = True
+        self._workers = [self._spawn() for _ in range(self.processes)]
+        self._relay = threading.Thread(target=self._relay_events, args=(loop,), name="event-relay", daemon=True)
+        self._relay.start()
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    async def close(self):
+        self._running = False
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+        for process in self._workers:
+            process.terminate()
+        await asyncio.gather(*(asyncio.to_thread(process.join, 30) for process in self._workers))
+        self._workers = []
+        # The relay notices _running within its one-second poll; it must not be left
+        # reading the queue while the interpreter shuts down
+        if self._relay is not None:
+            await asyncio.to_thread(self._relay.join)
+            self._relay = None
+
+    def _spawn(self):
+        process = self._context.Process(target=run_worker_process, args=(self._queue, self.jobs_per_process),
+                                        name="research-worker", daemon=True)
+        process.start()
+        return process
+
+    async def _supervise(self):
+        while True:
+            await asyncio.sleep(SUPERVISE_INTERVAL)
+            for i, process in enumerate(self._workers):
+                if not process.is_alive():
+                    logger.warning("Worker process %s exited with code %s; restarting it", process.pid,
+                                   process.exitcode)
+                    self._workers[i] = self._spawn()
+
+    def _relay_events(self, loop):
+        while self._running:
+            try:
+                message = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            try:
+                loop.call_soon_threadsafe(self._apply, message)
+            except RuntimeError:  # the front door's loop has shut down
+                return
+
+    def _apply(self, message):
+        if message[0] == "publish":
+            _, job_id, event, coalesce = message
+            self.events.publish(job_id, event, coalesce)
+        elif message[0] == "metrics":
+            # Counters are cumulative per process, so the newest snapshot replaces older ones
+            telemetry.registry.merge(message[1], message[2])
+        else:
+            self.events.close(message[1])
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
+import { API_URL } from '../api';
 
 const ResearchPage = () => {
   const navigate = useNavigate();
@@ -28,7 +29,7 @@ const ResearchPage = () => {
     setIsSearching(value.length > 0);
   };
 
-  const handleStartResearch = () => {
+  const handleStartResearch = async () => {
     const researchData = {
       query: searchQuery,
       timeRange,
@@ -47,6 +48,30 @@ const ResearchPage = () => {
       sources: 0
     };
     setSearchHistory(prev => [newSearchEntry, ...prev.slice(0, 9)]);
+
+    // Queue the job; the output page follows its progress stream
+    try {
+      const response = await fetch(`${API_URL}/jobs`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(researchData)
+      });
+      if (response.ok) {
+        const job = await response.json();
+        researchData.jobId = job.id;
+      } else if (response.status === 429) {
+        const body = await response.json().catch(() => ({}));
+        const retryAfter = response.headers.get('Retry-After') || body.detail?.retry_after || 60;
+        alert(`NOVA is at capacity right now. Please try again in about ${retryAfter} seconds.`);
+        return;
+      } else {
+        console.error('Research service rejected the request:', await response.text());
+      }
+    } catch (error) {
+      console.error('Error submitting research:', error);
+    }
     
     localStorage.setItem('researchData', JSON.stringify(researchData));
     navigate('/output');
@@ -0,0 +1,114 @@
+import re
+from collections import Counter
+
+# Rough average for English text with llama-style tokenizers
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"[a-z]{4,}")
+
+
+def estimate_tokens(text):
+    """Cheap token estimate used for budgeting prompts."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_into_chunks(text, chunk_size=3000, overlap=200):
+    """
+    Splits text into chunks of at most `chunk_size` characters on sentence boundaries.
+
+    Consecutive chunks share up to `overlap` characters of trailing context so a point
+    made across a boundary is not lost. Sentences longer than a chunk are hard-split.
+    """
+    if len(text) <= chunk_size:
+        return [text] if text else []
+
+    sentences = []
+    for sentence in _SENTENCE_END.split(text):
+        while len(sentence) > chunk_size:
+            sentences.append(sentence[:chunk_size])
+            sentence = sentence[chunk_size:]
+        if sentence:
+            sentences.append(sentence)
+
+    chunks = []
+    current = ""
+    for sentence in sentences:
+        if current and len(current) + len(sentence) + 1 > chunk_size:
+            chunks.append(current)
+            tail = current[-overlap:] if overlap else ""
+            # Start the overlap on a word boundary
+            tail = tail[tail.find(" ") + 1:] if " " in tail else ""
+            # Only carry the overlap if it still leaves room for the next sentence
+            current = tail if len(tail) + len(sentence) + 1 <= chunk_size else ""
+        current = f"{current} {sentence}" if current else sentence
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+
+def select_chunks(chunks, token_budget=None, coverage_target=0.9, vocabulary_size=200, chunk_overhead=0):
+    """
+    Picks the chunks worth summarizing, in document order.
+
+    Coverage is measured against the document's most frequent content words: chunks are
+    chosen greedily by how many not-yet-covered words they add, and selection stops once
+    `coverage_target` of those words is covered or no chunk adding words fits the rest
+    of `token_budget` (estimated tokens across all selected chunks, each charged its text
+    plus `chunk_overhead`). A chunk that does not fit is passed over for cheaper ones.
+    No chunk is selected if not even one fits.
+
+    Returns:
+        tuple: (selected chunks, achieved coverage between 0 and 1)
+    """
+    if not chunks:
+        return [], 1.0
+
+    chunk_words = [set(_WORD.findall(chunk.lower())) for chunk in chunks]
+    counts = Counter(word for words in chunk_words for word in words)
+    salient = {word for word, _ in counts.most_common(vocabulary_size)}
+
+    if not salient:
+        selected = list(range(len(chunks)))
+        if token_budget is not None:
+            selected = _within_budget(chunks, selected, token_budget, chunk_overhead)
+        return [chunks[i] for i in selected], 1.0
+
+    covered = set()
+    selected = []
+    spent = 0
+    remaining = set(range(len(chunks)))
+
+    while remaining and len(covered) / len(salient) < coverage_target:
+        best = max(remaining, key=lambda i: (len((chunk_words[i] & salient) - covered), -i))
+        gain = (chunk_words[best] & salient) - covered
+        if not gain:
+            break
+
+        cost = estimate_tokens(chunks[best]) + chunk_overhead
+        if token_budget is not None and spent + cost > token_budget:
+            # Too expensive now and later; a cheaper chunk may still fit
+            remaining.discard(best)
+            continue
+
+        selected.append(best)
+        covered |= gain
+        spent += cost
+        remaining.discard(best)
+
+    selected.sort()
+    return [chunks[i] for i in selected], len(covered) / len(salient)
+
+
+def _within_budget(chunks, indices, token_budget, chunk_overhead=0):
+    kept = []
+    spent = 0
+    for i in indices:
+        cost = estimate_tokens(chunks[i]) + chunk_overhead
+        if spent + cost > token_budget:
+            continue
+        kept.append(i)
+        spent += cost
+    return kept
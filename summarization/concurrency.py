@@ -0,0 +1,265 @@
+import asyncio
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+
+# Controller used by callers that do not pass their own, one per event loop
+_default_controllers = weakref.WeakKeyDictionary()
+
+
+def default_controller():
+    """
+    Returns the controller shared by every caller on the running event loop that does
+    not pass its own, so concurrent `summarize_sources` calls stay under one limit.
+    """
+    loop = asyncio.get_running_loop()
+    controller = _default_controllers.get(loop)
+    if controller is None:
+        controller = _default_controllers[loop] = AdaptiveConcurrencyController()
+    return controller
+
+
+class AdaptiveConcurrencyController:
+    """
+    Limits the number of in-flight LLM requests and adapts the limit using AIMD
+    (additive increase, multiplicative decrease).
+
+    The limit grows by one after a full "window" of healthy requests (one request
+    per slot) and is cut by `decrease_factor` when a request fails or its latency
+    exceeds `latency_tolerance` times the best smoothed latency seen so far.
+    At most one backoff is applied per smoothed round trip so a burst of failures
+    from the same overload does not collapse the limit to the minimum.
+
+    Requests can be tagged with a key (e.g. a job id) and a weight. When slots are
+    scarce, the next free slot goes to the waiting key with the fewest slots in use
+    relative to its weight, so one large job cannot queue ahead of every small one.
+    """
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=32,
+                 decrease_factor=0.5, latency_tolerance=2.0, smoothing=0.2):
+        self.limit = max(min_limit, min(initial_limit, max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+
+        self._condition = asyncio.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        # Per key: slots in use, waiting requests, weight, and when it was last served
+        self._key_in_flight = {}
+        self._key_waiting = {}
+        self._key_weight = {}
+        self._key_served = {}
+        self._grants = 0
+        self._healthy_in_window = 0
+        self._last_decrease = 0.0
+
+        self._latency_ewma = None
+        self._baseline_latency = None
+
+        self._started_at = time.monotonic()
+        self._completed = 0
+        self._errors = 0
+        self._tokens = 0
+        self._max_queue_depth = 0
+        self._recent_latencies = deque(maxlen=4096)
+
+    async def acquire(self, key=None, weight=1.0):
+        """
+        Waits until a slot is free under the current limit and it is `key`'s turn,
+        then takes it.
+        """
+        async with self._condition:
+            self._waiting += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._waiting)
+            self._key_waiting[key] = self._key_waiting.get(key, 0) + 1
+            self._key_weight[key] = weight
+            try:
+                await self._condition.wait_for(lambda: self._in_flight < self.limit and self._next_key() == key)
+            except BaseException:
+                self._stop_waiting(key)
+                self._forget_key(key)
+                # The cancelled request may have been the one whose turn it was
+                self._condition.notify_all()
+                raise
+            self._stop_waiting(key)
+
+            self._in_flight += 1
+            self._key_in_flight[key] = self._key_in_flight.get(key, 0) + 1
+            self._grants += 1
+            self._key_served[key] = self._grants
+            if self._waiting and self._in_flight < self.limit:
+                # Another key may be next for the remaining free slots
+                self._condition.notify_all()
+
+    async def release(self, latency, error=False, tokens=0, key=None, cancelled=False):
+        """
+        Frees a slot and feeds the observed latency/outcome into the AIMD loop. A
+        cancelled request says nothing about the server and only frees its slot.
+        """
+        async with self._condition:
+            self._in_flight -= 1
+            self._key_in_flight[key] -= 1
+            if not self._key_in_flight[key]:
+                del self._key_in_flight[key]
+                self._forget_key(key)
+            if cancelled:
+                self._condition.notify_all()
+                return
+            self._completed += 1
+            self._tokens += tokens
+            self._recent_latencies.append(latency)
+
+            if error:
+                self._errors += 1
+                self._decrease()
+            else:
+                self._observe_latency(latency)
+                if self._is_congested():
+                    self._decrease()
+                else:
+                    self._healthy_in_window += 1
+                    if self._healthy_in_window >= self.limit and self.limit < self.max_limit:
+                        self.limit += 1
+                        self._healthy_in_window = 0
+
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, key=None, weight=1.0):
+        """
+        Async context manager wrapping a single LLM request.
+
+        The yielded `RequestSlot` can be marked as failed (e.g. on a non-200 status)
+        and given the number of generated tokens; exceptions count as failures, except
+        cancellation (a consumer stopped early or the job was cancelled), which is neutral.
+        """
+        await self.acquire(key, weight)
+        request = RequestSlot()
+        start = time.monotonic()
+        cancelled = False
+        try:
+            yield request
+        except (asyncio.CancelledError, GeneratorExit):
+            cancelled = True
+            raise
+        except Exception:
+            request.failed = True
+            raise
+        finally:
+            await self.release(time.monotonic() - start, error=request.failed, tokens=request.tokens, key=key,
+                               cancelled=cancelled)
+
+    def for_key(self, key, weight=1.0):
+        """
+        Returns a view of this controller whose requests are all tagged with `key`,
+        for code that only calls `slot()` and `metrics()` (e.g. `summarize_sources`).
+        """
+        return KeyedController(self, key, weight)
+
+    def metrics(self):
+        """Returns a snapshot of the controller state and throughput counters."""
+        elapsed = max(time.monotonic() - self._started_at, 1e-9)
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queue_depth": self._waiting,
+            "max_queue_depth": self._max_queue_depth,
+            "completed": self._completed,
+            "errors": self._errors,
+            "latency_ewma": self._latency_ewma,
+            "baseline_latency": self._baseline_latency,
+            "requests_per_sec": self._completed / elapsed,
+            "tokens_per_sec": self._tokens / elapsed,
+            **self.latency_percentiles(),
+        }
+
+    def latency_percentiles(self):
+        """Returns p50/p95/p99 of recent request latencies (in seconds, excluding queueing)."""
+        latencies = sorted(self._recent_latencies)
+        if not latencies:
+            return {"p50": None, "p95": None, "p99": None}
+        return {
+            f"p{q}": latencies[min(len(latencies) - 1, int(len(latencies) * q / 100))]
+            for q in (50, 95, 99)
+        }
+
+    def _stop_waiting(self, key):
+        self._waiting -= 1
+        self._key_waiting[key] -= 1
+        if not self._key_waiting[key]:
+            del self._key_waiting[key]
+
+    def _forget_key(self, key):
+        if key not in self._key_waiting and key not in self._key_in_flight:
+            self._key_weight.pop(key, None)
+            self._key_served.pop(key, None)
+
+    def _next_key(self):
+        # Fewest slots in use per unit of weight first; ties go to the key served
+        # longest ago (round robin)
+        return min(
+            self._key_waiting,
+            key=lambda key: (self._key_in_flight.get(key, 0) / self._key_weight[key],
+                             self._key_served.get(key, 0)),
+        )
+
+    def _observe_latency(self, latency):
+        if self._latency_ewma is None:
+            self._latency_ewma = latency
+        else:
+            self._latency_ewma += self.smoothing * (latency - self._latency_ewma)
+
+        if self._baseline_latency is None or self._latency_ewma < self._baseline_latency:
+            self._baseline_latency = self._latency_ewma
+
+    def _is_congested(self):
+        if self._baseline_latency is None:
+            return False
+        return self._latency_ewma > self._baseline_latency * self.latency_tolerance
+
+    def _decrease(self):
+        """
+        Restarts the healthy window and, unless the limit was already cut within the last
+        smoothed latency, multiplies it by `decrease_factor` and nudges the baseline
+        latency towards the current one.
+        """
+        self._healthy_in_window = 0
+
+        now = time.monotonic()
+        cooldown = self._latency_ewma or 0.0
+        if now - self._last_decrease < cooldown:
+            return
+
+        self._last_decrease = now
+        self.limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+
+        # Let the baseline drift up so a slower but stable server is not punished forever
+        if self._baseline_latency is not None and self._latency_ewma is not None:
+            self._baseline_latency += self.smoothing * (self._latency_ewma - self._baseline_latency)
+
+
+class KeyedController:
+    """An `AdaptiveConcurrencyController` whose requests are tagged with one key."""
+
+    def __init__(self, controller, key, weight=1.0):
+        self.controller = controller
+        self.key = key
+        self.weight = weight
+
+    def slot(self):
+        return self.controller.slot(self.key, self.weight)
+
+    def metrics(self):
+        return self.controller.metrics()
+
+
+class RequestSlot:
+    """Outcome of a single request made under an `AdaptiveConcurrencyController`."""
+
+    def __init__(self):
+        self.failed = False
+        self.tokens = 0
@@ -0,0 +1,169 @@
+import re
+
+import numpy as np
+from scipy import sparse
+
+# Summaries produced without the LLM are less trustworthy than generated ones
+EXTRACTIVE_CONFIDENCE = 0.5
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_TERM = re.compile(r"[a-z0-9]{3,}")
+_STOP_WORDS = frozenset("""
+    the and for are but not you all any can had her was one our out has him his how its
+    may new now old see two who did get let put say she too use that with have this will
+    your from they been were said each which their there what about would make like into
+    than then them these some could other more very when also just only over such most
+    after where while being those through because should between
+""".split())
+
+
+def split_sentences(text, min_chars=20):
+    """Splits text into sentences, dropping fragments shorter than `min_chars`."""
+    return [s.strip() for s in _SENTENCE_END.split(text) if len(s.strip()) >= min_chars]
+
+
+def rank_sentences(sentence_lists, topic=None, damping=0.85, max_iterations=50, tolerance=1e-6):
+    """
+    Scores the sentences of many documents at once with TextRank.
+
+    Every document gets its own sentence graph (cosine similarity of TF-IDF sentence
+    vectors), but all graphs are built and iterated together as one sparse matrix:
+    term columns are scoped per document, so sentences of different documents never
+    share a column and the similarity matrix is block diagonal by construction.
+    When a topic is given, the random jump favours sentences mentioning topic terms.
+
+    Args:
+        sentence_lists (list): One list of sentences per document.
+        topic (str, optional): Topic used to bias the ranking.
+
+    Returns:
+        list: One NumPy array of sentence scores per document.
+    """
+    rows = []
+    cols = []
+    vocabulary = {}
+    topic_terms = set(_terms(topic)) if topic else set()
+    topic_hits = []
+    sizes = []
+
+    for doc_id, sentences in enumerate(sentence_lists):
+        sizes.append(len(sentences))
+        for sentence in sentences:
+            terms = set(_terms(sentence))
+            row = len(topic_hits)
+            for term in terms:
+                rows.append(row)
+                cols.append(vocabulary.setdefault((doc_id, term), len(vocabulary)))
+            topic_hits.append(len(terms & topic_terms))
+
+    n = len(topic_hits)
+    if n == 0:
+        return [np.zeros(0) for _ in sentence_lists]
+
+    sizes = np.asarray(sizes)
+    doc_of_sentence = np.repeat(np.arange(len(sizes)), sizes)
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+
+    # IDF within each document: columns are already document-scoped
+    doc_of_column = np.fromiter((doc_id for doc_id, _ in vocabulary), dtype=np.int64, count=len(vocabulary))
+    document_frequency = np.bincount(cols, minlength=len(vocabulary))
+    idf = np.log1p(sizes[doc_of_column] / document_frequency)
+
+    tfidf = sparse.csr_matrix((idf[cols], (rows, cols)), shape=(n, len(vocabulary)))
+    norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    tfidf = sparse.diags(1.0 / norms) @ tfidf
+
+    similarity = (tfidf @ tfidf.T).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    out_weight = np.asarray(similarity.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    out_weight[dangling] = 1.0
+    transition = (sparse.diags(1.0 / out_weight) @ similarity).T.tocsr()
+
+    # Random jump distribution, normalized within each document
+    jump = 1.0 + np.asarray(topic_hits, dtype=float)
+    jump /= np.bincount(doc_of_sentence, weights=jump)[doc_of_sentence]
+
+    scores = jump.copy()
+    for _ in range(max_iterations):
+        # Mass sitting on sentences without neighbours jumps within their own document
+        lost = np.bincount(doc_of_sentence, weights=scores * dangling, minlength=len(sizes))
+        updated = (1 - damping) * jump + damping * (transition @ scores + lost[doc_of_sentence] * jump)
+        converged = np.abs(updated - scores).max() < tolerance
+        scores = updated
+        if converged:
+            break
+
+    return np.split(scores, np.cumsum(sizes)[:-1])
+
+
+def extractive_summaries(texts, topic=None, max_sentences=5, max_chars=None):
+    """
+    Builds extractive summaries for a batch of texts.
+
+    The highest ranked sentences of each text are kept, in their original order, until
+    `max_sentences` sentences or `max_chars` characters are reached (either limit may be
+    None). A summary is never longer than `max_chars`: when even the best sentence does not
+    fit, it is cut short.
+
+    Returns:
+        list: One summary string per text (the text itself if it has no usable sentences).
+    """
+    sentence_lists = [split_sentences(text) for text in texts]
+    all_scores = rank_sentences(sentence_lists, topic)
+
+    summaries = []
+    for text, sentences, scores in zip(texts, sentence_lists, all_scores):
+        if not sentences:
+            summaries.append(text[:max_chars] if max_chars else text)
+            continue
+
+        chosen = []
+        used = 0
+        for index in np.argsort(-scores, kind="stable"):
+            length = len(sentences[index]) + 1
+            if max_chars is not None and used + length > max_chars:
+                if not chosen:
+                    sentences[index] = sentences[index][:max_chars]
+                    chosen.append(index)
+                break
+            chosen.append(index)
+            used += length
+            if max_sentences is not None and len(chosen) >= max_sentences:
+                break
+
+        summaries.append(" ".join(sentences[i] for i in sorted(chosen)))
+
+    return summaries
+
+
+def summarize_extractive(contents, topic, max_sentences=5):
+    """
+    Summarizes documents without an LLM.
+
+    Args:
+        contents (list): A list of dictionaries containing 'content' and 'url' keys.
+        topic (str): The topic used to bias sentence selection.
+
+    Returns:
+        list: A list of dictionaries with 'url', 'summary', and 'confidence_score',
+              matching the output of `summarize_sources`.
+    """
+    docs = [doc for doc in contents if doc.get('content')]
+    summaries = extractive_summaries([doc['content'] for doc in docs], topic, max_sentences)
+    return [
+        {
+            "url": doc.get('url', 'Unknown URL'),
+            "summary": summary,
+            "confidence_score": EXTRACTIVE_CONFIDENCE
+        }
+        for doc, summary in zip(docs, summaries)
+    ]
+
+
+def _terms(text):
+    return [term for term in _TERM.findall(text.lower()) if term not in _STOP_WORDS]
@@ -0,0 +1,155 @@
+import argparse
+import asyncio
+import json
+import random
+import re
+
+from aiohttp import web
+
+_WORDS = (
+    "the research shows that modern systems improve results across many domains while "
+    "costs fall and adoption grows as teams learn to apply new methods to real problems"
+).split()
+
+_DOCUMENT_MARKER = re.compile(r"^\s*Document (\d+):", re.MULTILINE)
+
+
+class FakeOllama:
+    """
+    Offline stand-in for Ollama's `/api/generate` endpoint.
+
+    Each request waits `latency` seconds (time to first token, with `jitter` relative
+    spread), then produces `tokens` tokens at `tokens_per_sec`. At most `parallel`
+    requests are generated at once; the rest queue, like a single model server would.
+    A fraction `error_rate` of requests fail with HTTP 503.
+    Both streaming (NDJSON) and non-streaming responses are supported, as is
+    `"format": "json"` for packed multi-document prompts.
+    """
+
+    def __init__(self, latency=0.2, jitter=0.25, tokens=80, tokens_per_sec=50.0,
+                 error_rate=0.0, parallel=4, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens = tokens
+        self.tokens_per_sec = tokens_per_sec
+        self.error_rate = error_rate
+        self.parallel = parallel
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._slots = None
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_post("/api/generate", self.generate)
+        return app
+
+    async def generate(self, request):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.parallel)
+
+        payload = await request.json()
+        self.requests += 1
+
+        if self._random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"error": "model overloaded"}, status=503)
+
+        async with self._slots:
+            await asyncio.sleep(self._first_token_delay())
+            text = self._response_text(payload)
+
+            if not payload.get("stream", True):
+                await asyncio.sleep(self.tokens / self.tokens_per_sec)
+                return web.json_response(self._final_message(payload, text))
+
+            response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+            await response.prepare(request)
+            for chunk in self._chunks(text):
+                await asyncio.sleep(len(chunk.split()) / self.tokens_per_sec)
+                line = {"model": payload.get("model"), "response": chunk, "done": False}
+                await response.write(json.dumps(line).encode() + b"\n")
+            final = {**self._final_message(payload, ""), "done": True}
+            await response.write(json.dumps(final).encode() + b"\n")
+            await response.write_eof()
+            return response
+
+    def _first_token_delay(self):
+        spread = self.latency * self.jitter
+        return max(0.0, self._random.gauss(self.latency, spread))
+
+    def _response_text(self, payload):
+        words = [self._random.choice(_WORDS) for _ in range(self.tokens)]
+        if payload.get("format") != "json":
+            return " ".join(words) + "."
+
+        # Packed prompt: answer with one summary per numbered document
+        count = len(_DOCUMENT_MARKER.findall(payload.get("prompt", ""))) or 1
+        per_document = max(1, self.tokens // count)
+        summaries = [
+            {"id": i, "summary": " ".join(words[(i - 1) * per_document:i * per_document]) or "summary."}
+            for i in range(1, count + 1)
+        ]
+        return json.dumps({"summaries": summaries})
+
+    def _chunks(self, text, words_per_chunk=4):
+        words = text.split(" ")
+        for i in range(0, len(words), words_per_chunk):
+            yield " ".join(words[i:i + words_per_chunk]) + " "
+
+    def _final_message(self, payload, text):
+        return {
+            "model": payload.get("model"),
+            "response": text,
+            "done": True,
+            "prompt_eval_count": len(payload.get("prompt", "")) // 4,
+            "eval_count": self.tokens,
+        }
+
+
+async def start_server(fake, host="127.0.0.1", port=0):
+    """
+    Starts `fake` on the running event loop.
+
+    Returns:
+        tuple: (AppRunner to clean up, base URL of the `/api/generate` endpoint)
+    """
+    runner = web.AppRunner(fake.make_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}/api/generate"
+
+
+def add_server_arguments(parser):
+    parser.add_argument("--latency-ms", type=float, default=200, help="Mean time to first token")
+    parser.add_argument("--jitter", type=float, default=0.25, help="Relative spread of the latency")
+    parser.add_argument("--tokens", type=int, default=80, help="Tokens generated per response")
+    parser.add_argument("--tokens-per-sec", type=float, default=50, help="Generation speed per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 503")
+    parser.add_argument("--parallel", type=int, default=4, help="Requests the server generates at once")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def fake_from_arguments(args):
+    return FakeOllama(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter,
+        tokens=args.tokens,
+        tokens_per_sec=args.tokens_per_sec,
+        error_rate=args.error_rate,
+        parallel=args.parallel,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline stand-in for the Ollama /api/generate endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    print(f"Fake Ollama listening on http://{args.host}:{args.port}/api/generate")
+    web.run_app(fake_from_arguments(args).make_app(), host=args.host, port=args.port, print=None)
@@ -0,0 +1,98 @@
+import json
+import re
+
+# Documents at or below this length are candidates for sharing a prompt
+SHORT_DOCUMENT_CHARS = 1200
+
+# Characters of document text packed into a single multi-document prompt
+PACKED_PROMPT_CHARS = 6000
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def pack_documents(docs, max_chars=PACKED_PROMPT_CHARS, short_chars=SHORT_DOCUMENT_CHARS, max_docs=8):
+    """
+    Groups documents into batches that share one prompt.
+
+    Short documents are packed first-fit into batches of at most `max_chars` characters
+    and `max_docs` documents; longer documents get a batch of their own.
+
+    Returns:
+        list: Batches as lists of indices into `docs`, in first-appearance order.
+    """
+    batches = []
+    open_batches = []  # [indices, size] for batches that can still take documents
+
+    for i, doc in enumerate(docs):
+        size = len(doc.get('content', ''))
+        if size > short_chars:
+            batches.append([i])
+            continue
+
+        for candidate in open_batches:
+            if candidate[1] + size <= max_chars and len(candidate[0]) < max_docs:
+                candidate[0].append(i)
+                candidate[1] += size
+                break
+        else:
+            candidate = [[i], size]
+            open_batches.append(candidate)
+            batches.append(candidate[0])
+
+    return batches
+
+
+def build_packed_prompt(texts, topic):
+    """Builds one prompt asking for a separate summary of each text as JSON."""
+    documents = "\n\n".join(f"Document {i}:\n{text}" for i, text in enumerate(texts, 1))
+    return f"""
+    Explain each of the following {len(texts)} documents in simple language, focusing on the topic: "{topic}".
+    Provide a concise summary of the key points of every document, each on its own.
+
+    Respond with JSON only, in the form:
+    {{"summaries": [{{"id": 1, "summary": "..."}}, {{"id": 2, "summary": "..."}}]}}
+
+    {documents}
+    """
+
+
+def parse_packed_response(text, expected):
+    """
+    Parses the model's answer to a packed prompt.
+
+    Returns:
+        list: `expected` summaries, ordered by document id.
+
+    Raises:
+        ValueError: If the answer is not valid JSON or does not contain a non-empty
+                    summary for every document.
+    """
+    match = _JSON_OBJECT.search(text or "")
+    if not match:
+        raise ValueError("No JSON object in packed response")
+
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON in packed response: {e}") from e
+
+    items = data.get("summaries") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        raise ValueError("Packed response has no 'summaries' list")
+
+    summaries = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            doc_id = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        summary = str(item.get("summary") or "").strip()
+        if 1 <= doc_id <= expected and summary:
+            summaries[doc_id] = summary
+
+    if len(summaries) != expected:
+        raise ValueError(f"Packed response covers {len(summaries)} of {expected} documents")
+
+    return [summaries[i] for i in range(1, expected + 1)]
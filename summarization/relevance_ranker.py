@@ -1,6 +1,9 @@
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
 
 def rank_documents(contents, query):
     """
@@ -48,7 +51,7 @@ def rank_documents(contents, query):
     except ValueError:
         # Handle cases where documents might be empty or vectorization fails
         # Return original list with 0 scores if something goes wrong
-        print("Warning: Could not vectorize documents. Returning unranked list.")
+        logger.warning("Could not vectorize documents. Returning unranked list.")
         for doc in contents:
             doc['relevance_score'] = 0.0
         return contents
@@ -1,13 +1,39 @@
 import asyncio
 import aiohttp
 import json
+import logging
+import os
+from concurrency import default_controller
+from summary_cache import SummaryCache
+from chunking import CHARS_PER_TOKEN, estimate_tokens, select_chunks, split_into_chunks
+from packing import build_packed_prompt, pack_documents, parse_packed_response
 
 # Default configuration for a local LLM (e.g., Ollama)
 # You can change this to point to a different API if needed.
-OLLAMA_API_URL = "http://localhost:11434/api/generate"
+OLLAMA_API_URL = os.getenv("OLLAMA_API_URL", "http://localhost:11434/api/generate")
 MODEL_NAME = "llama3" # Or "mistral", "gemma", etc.
 
-async def summarize_sources(contents, topic):
+# Bump whenever the prompt wording changes so cached summaries from the old prompt are not reused
+PROMPT_VERSION = 1
+
+# Characters of a document sent to the model in a single prompt
+MAX_INPUT_CHARS = 3000
+
+# Estimated input tokens a single long document may spend on map-reduce chunk summaries
+MAP_REDUCE_TOKEN_BUDGET = 6000
+
+logger = logging.getLogger(__name__)
+
+class ModelStatusError(Exception):
+    """Raised when the model server answers with a non-200 status."""
+
+    def __init__(self, status):
+        super().__init__(f"Status {status}")
+        self.status = status
+
+async def summarize_sources(contents, topic, controller=None, cache=None, map_reduce=False,
+                            chunk_token_budget=MAP_REDUCE_TOKEN_BUDGET, coverage_target=0.9, batch=False,
+                            precompress=False, budget=None, session=None, on_summary=None):
     """
     Summarizes a list of documents relative to a specific topic using an LLM.
 
@@ -15,79 +41,547 @@ async def summarize_sources(contents, topic):
         contents (list): A list of dictionaries containing document data.
                          Must contain 'content' and 'url' keys.
         topic (str): The topic to focus the summary on.
+        controller (AdaptiveConcurrencyController, optional): Limits how many requests
+                         are in flight against the model server. Defaults to the
+                         controller shared by all callers (see `default_controller`).
+        cache (SummaryCache, optional): Persistent summary cache consulted before calling
+                         the model. Successful summaries are written back to it.
+        map_reduce (bool): Summarize documents longer than MAX_INPUT_CHARS chunk by chunk
+                         and combine the partial summaries, instead of truncating them.
+        chunk_token_budget (int): Maximum estimated input tokens spent on the chunks of
+                         one long document in map-reduce mode.
+        coverage_target (float): Fraction of a long document's salient terms that must be
+                         covered by the selected chunks before the rest are skipped.
+        batch (bool): Pack several short documents into one prompt and parse the
+                         per-document summaries back out, falling back to one request
+                         per document if the answer cannot be parsed.
+        precompress (bool): Shrink documents longer than MAX_INPUT_CHARS to their
+                         highest ranked sentences (extractive pre-pass) instead of
+                         truncating them before they are sent to the model.
+        budget (TokenBudget, optional): Job-level token budget. Documents are skipped or
+                         given more or less of their text according to their
+                         'relevance_score', and tokens in/out are accounted per document
+                         (see `TokenBudget.report`).
+        session (aiohttp.ClientSession, optional): Shared session to reuse its connection
+                         pool; a new session is created for this call otherwise.
+        on_summary (callable, optional): Called with each summary record as soon as it
+                         is generated, e.g. to checkpoint it before the rest are done.
 
     Returns:
-        list: A list of dictionaries with 'url', 'summary', and 'confidence_score'.
+        list: A list of dictionaries with 'url', 'summary', and 'confidence_score', plus
+              the document's 'relevance_score' when it has one.
     """
-    summaries = []
+    if controller is None:
+        controller = default_controller()
+
+    if session is None:
+        # Create an async session
+        async with aiohttp.ClientSession() as own_session:
+            return await summarize_sources(contents, topic, controller, cache, map_reduce=map_reduce,
+                                           chunk_token_budget=chunk_token_budget, coverage_target=coverage_target,
+                                           batch=batch, precompress=precompress, budget=budget,
+                                           session=own_session, on_summary=on_summary)
     
-    # Create an async session
-    async with aiohttp.ClientSession() as session:
-        tasks = []
-        for doc in contents:
-            if not doc.get('content'):
-                continue
-                
-            task = _generate_summary(session, doc, topic)
-            tasks.append(task)
-        
-        # Run all summary tasks concurrently
-        results = await asyncio.gather(*tasks)
-        
-        # Filter out any None results (failed summaries)
-        summaries = [res for res in results if res is not None]
+    docs = [doc for doc in contents if doc.get('content')]
+
+    if budget is not None:
+        max_doc_tokens = None if map_reduce else estimate_tokens("x" * MAX_INPUT_CHARS)
+        allocated = budget.allocate(docs, max_doc_tokens)
+        docs = [doc for doc, _ in allocated]
+        usages = [usage for _, usage in allocated]
+    else:
+        usages = [None] * len(docs)
+
+    if precompress:
+        docs = await asyncio.to_thread(_precompress, docs, topic, usages)
+
+    if batch:
+        batches = pack_documents(docs)
+    else:
+        batches = [[i] for i in range(len(docs))]
+
+    tasks = []
+    for indices in batches:
+        if len(indices) == 1:
+            i = indices[0]
+            task = _generate_summary(session, docs[i], topic, controller, cache,
+                                     map_reduce, chunk_token_budget, coverage_target, usages[i])
+        else:
+            task = _generate_packed_summaries(session, [docs[i] for i in indices], topic, controller, cache,
+                                              [usages[i] for i in indices])
+        task = _carry_relevance(task, [docs[i] for i in indices])
+        if on_summary is not None:
+            task = _notify_summaries(task, on_summary)
+        tasks.append(task)
+    
+    # Run all summary tasks concurrently; the controller decides how many actually hit the model
+    results = await asyncio.gather(*tasks)
+
+    # Restore document order across batches
+    ordered = [None] * len(docs)
+    for indices, result in zip(batches, results):
+        if len(indices) == 1:
+            result = [result]
+        for i, summary in zip(indices, result):
+            ordered[i] = summary
+    
+    # Filter out any None results (failed summaries)
+    summaries = [res for res in ordered if res is not None]
+
+    if cache is not None:
+        stats = await asyncio.to_thread(cache.stats)
+        logger.info("Summary cache: %d hits, %d misses (%.0f%% hit rate)",
+                    stats['hits'], stats['misses'], stats['hit_rate'] * 100)
+
+    if budget is not None:
+        report = budget.report()
+        logger.info("Token budget: %d in / %d out of %d budgeted, %d documents skipped",
+                    report['tokens_in'], report['tokens_out'], report['budget'], len(report['skipped']))
         
     return summaries
 
-async def _generate_summary(session, doc, topic):
+async def _carry_relevance(task, docs):
+    result = await task
+    for summary, doc in zip(result if isinstance(result, list) else [result], docs):
+        if summary is not None:
+            _with_relevance(summary, doc)
+    return result
+
+def _with_relevance(summary, doc):
+    """Copies the ranker's score onto a summary record so reports can order findings by it."""
+    if doc.get('relevance_score') is not None:
+        summary['relevance_score'] = doc['relevance_score']
+    return summary
+
+async def _notify_summaries(task, on_summary):
+    result = await task
+    for summary in (result if isinstance(result, list) else [result]):
+        if summary is not None:
+            on_summary(summary)
+    return result
+
+async def _generate_summary(session, doc, topic, controller, cache=None, map_reduce=False,
+                            chunk_token_budget=MAP_REDUCE_TOKEN_BUDGET, coverage_target=0.9, usage=None):
     """
     Helper function to call the LLM API for a single document.
     """
     url = doc.get('url', 'Unknown URL')
-    text = doc.get('content', '')[:3000] # Truncate text to avoid context limit issues
-    
-    prompt = f"""
-    Explain the following text in simple language, focusing on the topic: "{topic}".
-    Provide a concise summary of the key points.
-    
-    Text:
-    {text}
+    content = doc.get('content', '')
+    use_map_reduce = map_reduce and len(content) > MAX_INPUT_CHARS
+    max_chars = MAX_INPUT_CHARS
+
+    if usage is not None:
+        # The job budget decides how much of this document the model gets to read
+        chunk_token_budget = usage.allowance
+        max_chars = min(max_chars, usage.max_chars)
+        use_map_reduce = use_map_reduce and usage.max_chars > MAX_INPUT_CHARS
+
+    if use_map_reduce:
+        text = content
+        prompt_version = f"{PROMPT_VERSION}-map-reduce-{chunk_token_budget}-{coverage_target}"
+    else:
+        text = content[:max_chars] # Truncate text to avoid context limit issues
+        prompt_version = PROMPT_VERSION
+    if usage is not None:
+        # A summary cut short by a job's output cap must not be served to other calls
+        prompt_version = f"{prompt_version}-out-{usage.max_output_tokens}"
+
+    cache_key = None
+    if cache is not None:
+        cache_key = SummaryCache.make_key(text, topic, MODEL_NAME, prompt_version)
+        # The cache file is shared with other processes; waiting for its lock must not stall the loop
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            return {**cached, "url": url}
+
+    try:
+        if use_map_reduce:
+            summary_text = await _map_reduce_summary(session, text, topic, controller,
+                                                     chunk_token_budget, coverage_target, usage)
+        else:
+            summary_text = await _call_model(session, _build_prompt(text, topic), controller, usage=usage)
+
+        # We mock a confidence score here since most simple LLM APIs don't return one directly for generation
+        # In a real production system, you might ask the model to rate its own confidence.
+        confidence = 0.85 
+        
+        result = {
+            "url": url,
+            "summary": summary_text,
+            "confidence_score": confidence
+        }
+
+        if cache_key is not None:
+            await asyncio.to_thread(cache.set, cache_key, result)
+
+        return result
+    except ModelStatusError as e:
+        logger.warning("Failed to summarize %s: %s", url, e)
+        return None
+    except Exception as e:
+        logger.warning("Error summarizing %s: %s; falling back to extractive summary", url, e)
+        return _extractive_fallback(url, content, topic)
+
+def _extractive_fallback(url, content, topic):
+    """Summary record used when the model is unreachable."""
+    # numpy and scipy are only loaded once a fallback or pre-pass needs them
+    from extractive import EXTRACTIVE_CONFIDENCE, extractive_summaries
+
+    return {
+        "url": url,
+        "summary": extractive_summaries([content], topic)[0],
+        "confidence_score": EXTRACTIVE_CONFIDENCE
+    }
+
+def _precompress(docs, topic, usages):
+    """Returns copies of `docs` with long contents reduced to their top-ranked sentences."""
+    from extractive import extractive_summaries
+
+    limits = [
+        MAX_INPUT_CHARS if usage is None else min(MAX_INPUT_CHARS, usage.max_chars)
+        for usage in usages
+    ]
+    long_docs = [i for i, doc in enumerate(docs) if len(doc['content']) > limits[i]]
+    docs = list(docs)
+
+    # Documents sharing a limit are ranked together in one vectorized pass
+    for limit in set(limits[i] for i in long_docs):
+        group = [i for i in long_docs if limits[i] == limit]
+        compressed = extractive_summaries([docs[i]['content'] for i in group], topic,
+                                          max_sentences=None, max_chars=limit)
+        for i, content in zip(group, compressed):
+            docs[i] = {**docs[i], "content": content}
+    return docs
+
+async def _generate_packed_summaries(session, docs, topic, controller, cache=None, usages=None):
     """
-    
+    Summarizes several short documents with a single LLM request.
+
+    Returns one result per document, in order. If the model's answer cannot be parsed,
+    each document is summarized on its own instead. If the server rejects the request
+    (e.g. 429 or 503), the documents get no summary rather than one request each
+    against an overloaded server; if it cannot be reached, extractive summaries.
+    """
+    results = [None] * len(docs)
+    pending = []
+    usages = usages or [None] * len(docs)
+
+    for i, doc in enumerate(docs):
+        max_chars = MAX_INPUT_CHARS if usages[i] is None else min(MAX_INPUT_CHARS, usages[i].max_chars)
+        text = doc.get('content', '')[:max_chars]
+        prompt_version = f"{PROMPT_VERSION}-packed"
+        if usages[i] is not None:
+            prompt_version = f"{prompt_version}-out-{usages[i].max_output_tokens}"
+        cache_key = None
+        if cache is not None:
+            cache_key = SummaryCache.make_key(text, topic, MODEL_NAME, prompt_version)
+            cached = await asyncio.to_thread(cache.get, cache_key)
+            if cached is not None:
+                results[i] = {**cached, "url": doc.get('url', 'Unknown URL')}
+                continue
+        pending.append((i, text, cache_key))
+
+    if len(pending) == 1:
+        i = pending[0][0]
+        results[i] = await _generate_summary(session, docs[i], topic, controller, cache, usage=usages[i])
+        return results
+
+    if pending:
+        try:
+            batch_usage = None
+            if any(usages[i] is not None for i, _, _ in pending):
+                batch_usage = _SharedUsage([usages[i] for i, _, _ in pending])
+            response = await _call_model(session, build_packed_prompt([text for _, text, _ in pending], topic),
+                                         controller, json_format=True, usage=batch_usage)
+        except ModelStatusError as e:
+            logger.warning("Failed to summarize %d packed documents: %s", len(pending), e)
+            return results
+        except Exception as e:
+            logger.warning("Error summarizing %d packed documents: %s; falling back to extractive summaries",
+                           len(pending), e)
+            for i, _, _ in pending:
+                results[i] = _extractive_fallback(docs[i].get('url', 'Unknown URL'), docs[i].get('content', ''), topic)
+            return results
+
+        try:
+            packed = parse_packed_response(response, len(pending))
+        except ValueError as e:
+            logger.warning("Packed summary of %d documents failed (%s); summarizing individually", len(pending), e)
+            singles = await asyncio.gather(
+                *[_generate_summary(session, docs[i], topic, controller, cache, usage=usages[i])
+                  for i, _, _ in pending]
+            )
+            for (i, _, _), result in zip(pending, singles):
+                results[i] = result
+            return results
+
+        for (i, _, cache_key), summary_text in zip(pending, packed):
+            result = {
+                "url": docs[i].get('url', 'Unknown URL'),
+                "summary": summary_text,
+                "confidence_score": 0.85
+            }
+            if cache_key is not None:
+                await asyncio.to_thread(cache.set, cache_key, result)
+            results[i] = result
+
+    return results
+
+async def summarize_sources_stream(contents, topic, controller=None, cache=None, session=None):
+    """
+    Streaming variant of `summarize_sources`.
+
+    Summaries for all documents are generated concurrently and their text chunks are
+    yielded interleaved, as soon as the model produces them.
+
+    Args:
+        contents (list): A list of dictionaries containing 'content' and 'url' keys.
+        topic (str): The topic to focus the summary on.
+        controller (AdaptiveConcurrencyController, optional): Concurrency limit; the
+                         shared default controller if omitted.
+        cache (SummaryCache, optional): Persistent summary cache.
+        session (aiohttp.ClientSession, optional): Shared session to reuse.
+
+    Yields:
+        dict: {'url', 'chunk'} for every piece of generated text, then one
+              {'url', 'summary', 'confidence_score', 'done': True} record per document
+              once its summary is complete, with the document's 'relevance_score' when
+              it has one. A {'url', 'reset': True, 'error'} event means the text
+              streamed so far for that document is void (see `stream_summary`).
+    """
+    if controller is None:
+        controller = default_controller()
+
+    queue = asyncio.Queue()
+    finished = object()
+
+    if session is None:
+        async with aiohttp.ClientSession() as own_session:
+            async for event in summarize_sources_stream(contents, topic, controller, cache, own_session):
+                yield event
+        return
+
+    async def pump(doc):
+        try:
+            async for event in stream_summary(session, doc, topic, controller, cache):
+                await queue.put(event)
+        finally:
+            await queue.put(finished)
+
+    docs = [doc for doc in contents if doc.get('content')]
+    tasks = [asyncio.create_task(pump(doc)) for doc in docs]
+
+    try:
+        remaining = len(tasks)
+        while remaining:
+            event = await queue.get()
+            if event is finished:
+                remaining -= 1
+                continue
+            yield event
+    finally:
+        # The caller may stop consuming early; don't leave generations running
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def stream_summary(session, doc, topic, controller, cache=None):
+    """
+    Streams the summary of a single document from the LLM.
+
+    Yields {'url', 'chunk'} events as tokens arrive, followed by a final
+    {'url', 'summary', 'confidence_score', 'done': True} record. If the model fails,
+    a {'url', 'reset': True, 'error'} event tells the client to discard the chunks
+    received so far before the extractive fallback is streamed in their place.
+    """
+    url = doc.get('url', 'Unknown URL')
+    text = doc.get('content', '')[:MAX_INPUT_CHARS] # Truncate text to avoid context limit issues
+
+    cache_key = None
+    if cache is not None:
+        cache_key = SummaryCache.make_key(text, topic, MODEL_NAME, PROMPT_VERSION)
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            yield {"url": url, "chunk": cached["summary"]}
+            yield _with_relevance({**cached, "url": url, "done": True}, doc)
+            return
+
     payload = {
         "model": MODEL_NAME,
-        "prompt": prompt,
-        "stream": False
+        "prompt": _build_prompt(text, topic),
+        "stream": True
     }
 
+    parts = []
     try:
-        async with session.post(OLLAMA_API_URL, json=payload) as response:
-            if response.status == 200:
-                data = await response.json()
-                summary_text = data.get('response', '').strip()
-                
-                # We mock a confidence score here since most simple LLM APIs don't return one directly for generation
-                # In a real production system, you might ask the model to rate its own confidence.
-                confidence = 0.85 
-                
-                return {
-                    "url": url,
-                    "summary": summary_text,
-                    "confidence_score": confidence
-                }
-            else:
-                print(f"Failed to summarize {url}: Status {response.status}")
-                return None
+        async with controller.slot() as slot, session.post(OLLAMA_API_URL, json=payload) as response:
+            if response.status != 200:
+                slot.failed = True
+                logger.warning("Failed to summarize %s: Status %s", url, response.status)
+                return
+
+            # Ollama streams one JSON object per line
+            async for line in response.content:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                chunk = data.get('response', '')
+                if chunk:
+                    parts.append(chunk)
+                    yield {"url": url, "chunk": chunk}
+                if data.get('done'):
+                    slot.tokens = data.get('eval_count', 0)
+                    break
     except Exception as e:
-        print(f"Error summarizing {url}: {e}")
-        # Fallback for demonstration if API is not running
-        return {
-            "url": url,
-            "summary": "Error: Could not connect to summarization model. Is Ollama running?",
-            "confidence_score": 0.0
-        }
+        logger.warning("Error summarizing %s: %s; falling back to extractive summary", url, e)
+        fallback = _extractive_fallback(url, doc.get('content', ''), topic)
+        yield {"url": url, "reset": True, "error": str(e)}
+        yield {"url": url, "chunk": fallback["summary"]}
+        yield _with_relevance({**fallback, "done": True}, doc)
+        return
+
+    result = {
+        "url": url,
+        "summary": "".join(parts).strip(),
+        "confidence_score": 0.85
+    }
+
+    if cache_key is not None:
+        await asyncio.to_thread(cache.set, cache_key, result)
+
+    yield _with_relevance({**result, "done": True}, doc)
+
+async def _map_reduce_summary(session, text, topic, controller, token_budget, coverage_target, usage=None):
+    """
+    Summarizes a long document by summarizing its chunks in parallel (map) and then
+    combining the partial summaries (reduce).
+
+    With a DocumentUsage, `token_budget` (its allowance) also pays for the extra model
+    tokens the map adds: each chunk summary is generated and read again by the reduce.
+    The final summary's output is reserved by the job's TokenBudget.
+    """
+    chunk_overhead = 0
+    if usage is not None:
+        chunk_overhead = 2 * usage.max_output_tokens
+    chunks = split_into_chunks(text, MAX_INPUT_CHARS)
+    selected, coverage = select_chunks(chunks, token_budget, coverage_target, chunk_overhead=chunk_overhead)
+    if not selected:
+        # Not even one chunk fits the budget: summarize as much text as it pays for,
+        # within the prompt limit
+        chars = min(MAX_INPUT_CHARS, max(token_budget, 1) * CHARS_PER_TOKEN)
+        return await _call_model(session, _build_prompt(text[:chars], topic), controller, usage=usage)
+    logger.info("Map-reduce: summarizing %d/%d chunks (%.0f%% term coverage)", len(selected), len(chunks),
+                coverage * 100)
+
+    results = await asyncio.gather(
+        *[_call_model(session, _build_prompt(chunk, topic), controller, usage=usage) for chunk in selected],
+        return_exceptions=True
+    )
+
+    partials = [res for res in results if isinstance(res, str) and res]
+    if not partials:
+        # Every chunk failed; surface the first error like a single-call failure would
+        raise next((res for res in results if isinstance(res, Exception)), ModelStatusError(500))
+
+    return await _reduce_summaries(session, partials, topic, controller, usage)
+
+async def _reduce_summaries(session, summaries, topic, controller, usage=None):
+    """
+    Combines partial summaries into one, reducing in parallel rounds while they do not
+    fit in a single prompt.
+    """
+    if len(summaries) == 1:
+        return summaries[0]
+
+    # Capping each partial at half a prompt guarantees at least two per group,
+    # so every round at least halves the number of summaries
+    limit = MAX_INPUT_CHARS // 2
+    summaries = [summary[:limit] for summary in summaries]
+
+    while True:
+        groups = []
+        current = []
+        size = 0
+        for summary in summaries:
+            if current and size + len(summary) > MAX_INPUT_CHARS:
+                groups.append(current)
+                current = []
+                size = 0
+            current.append(summary)
+            size += len(summary)
+        groups.append(current)
+
+        if len(groups) == 1:
+            return await _call_model(session, _build_reduce_prompt(groups[0], topic), controller, usage=usage)
+
+        summaries = await asyncio.gather(
+            *[_call_model(session, _build_reduce_prompt(group, topic), controller, usage=usage) for group in groups]
+        )
+        summaries = [summary[:limit] for summary in summaries]
+
+async def _call_model(session, prompt, controller, json_format=False, usage=None):
+    """
+    Sends a single non-streaming generation request under the concurrency controller.
+
+    If a DocumentUsage is given, the output length is capped by it and the reported
+    token counts are recorded on it.
+
+    Returns the generated text. Raises ModelStatusError on a non-200 response.
+    """
+    payload = {
+        "model": MODEL_NAME,
+        "prompt": prompt,
+        "stream": False
+    }
+    if json_format:
+        # Constrain the model to emit valid JSON
+        payload["format"] = "json"
+    if usage is not None:
+        payload["options"] = {"num_predict": usage.max_output_tokens}
+
+    async with controller.slot() as slot, session.post(OLLAMA_API_URL, json=payload) as response:
+        if response.status != 200:
+            slot.failed = True
+            raise ModelStatusError(response.status)
+
+        data = await response.json()
+        slot.tokens = data.get('eval_count', 0)
+        if usage is not None:
+            usage.record(data)
+        return data.get('response', '').strip()
+
+class _SharedUsage:
+    """Splits the token usage of one packed request evenly across its documents."""
+
+    def __init__(self, usages):
+        self.usages = [usage for usage in usages if usage is not None]
+        self.max_output_tokens = sum(usage.max_output_tokens for usage in self.usages)
+
+    def record(self, response):
+        for usage in self.usages:
+            usage.record(response, share=1 / len(self.usages))
+
+def _build_reduce_prompt(summaries, topic):
+    parts = "\n\n".join(f"Part {i}:\n{summary}" for i, summary in enumerate(summaries, 1))
+    return f"""
+    The following are summaries of consecutive parts of one document, focusing on the topic: "{topic}".
+    Combine them into a single concise summary of the key points, without repeating yourself.
+    
+    {parts}
+    """
+
+def _build_prompt(text, topic):
+    return f"""
+    Explain the following text in simple language, focusing on the topic: "{topic}".
+    Provide a concise summary of the key points.
+    
+    Text:
+    {text}
+    """
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
     # Test data
     sample_contents = [
         {
@@ -104,8 +598,17 @@ if __name__ == "__main__":
     
     print(f"Summarizing {len(sample_contents)} documents on topic: '{topic}'...")
     
+    cache = SummaryCache()
+
+    async def main():
+        summaries = await summarize_sources(sample_contents, topic, cache=cache)
+        return summaries, default_controller()
+
     # Run the async function
-    summaries = asyncio.run(summarize_sources(sample_contents, topic))
+    summaries, controller = asyncio.run(main())
     
     print("\n--- Results ---")
     print(json.dumps(summaries, indent=2))
+
+    print("\n--- Concurrency ---")
+    print(json.dumps(controller.metrics(), indent=2))
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", os.path.join(".cache", "summaries.sqlite3"))
+
+
+class SummaryCache:
+    """
+    Persistent cache of LLM summaries backed by SQLite.
+
+    Entries are keyed by a hash of everything that determines the generated text
+    (submitted text, topic, model name and prompt template version), so the same
+    article summarized for the same topic is only generated once. The database runs
+    in WAL mode, which lets several worker processes share one cache file.
+    Once `max_entries` is exceeded, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)")
+        # Running count of entries, so writes do not scan the table; other processes
+        # sharing the file are picked up by the recount in `_evict`
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    @staticmethod
+    def make_key(text, topic, model, prompt_version):
+        """Builds the cache key for a summary request."""
+        digest = hashlib.sha256()
+        for part in (text, topic, model, str(prompt_version)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Returns the cached summary record for `key`, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def set(self, key, record):
+        """Stores a summary record and evicts the oldest entries if over capacity."""
+        value = json.dumps(record)
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM summaries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, value, last_used) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            if exists is None:
+                self._entries += 1
+            if self._entries > self.max_entries:
+                self._evict()
+
+    def stats(self):
+        """Returns hit/miss counters for this instance and the current cache size."""
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self):
+        entries = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        excess = entries - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM summaries WHERE key IN "
+                "(SELECT key FROM summaries ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+        self._entries = entries - max(excess, 0)
@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import summarizer
+from concurrency import AdaptiveConcurrencyController
+from extractive import EXTRACTIVE_CONFIDENCE
+from fake_ollama import add_server_arguments, fake_from_arguments, start_server
+from token_budget import TokenBudget
+
+_VOCABULARY = (
+    "model data system research network learning energy market policy health climate "
+    "analysis performance security language software hardware patients results study "
+    "growth technology science computing training inference cost quality risk"
+).split()
+
+
+def make_documents(count, min_sentences=5, max_sentences=60, seed=0):
+    """Generates synthetic cleaned documents of varying length."""
+    rng = random.Random(seed)
+    docs = []
+    for i in range(count):
+        sentences = [
+            " ".join(rng.choice(_VOCABULARY) for _ in range(rng.randint(8, 20))).capitalize() + "."
+            for _ in range(rng.randint(min_sentences, max_sentences))
+        ]
+        docs.append({
+            "url": f"http://bench.local/{i}",
+            "content": " ".join(sentences),
+            "relevance_score": rng.random(),
+        })
+    return docs
+
+
+async def run_case(docs, topic, max_limit, **options):
+    """Summarizes `docs` once and returns throughput and latency figures."""
+    controller = AdaptiveConcurrencyController(initial_limit=min(4, max_limit), max_limit=max_limit)
+
+    start = time.perf_counter()
+    results = await summarizer.summarize_sources(docs, topic, controller, **options)
+    elapsed = time.perf_counter() - start
+
+    metrics = controller.metrics()
+    fallbacks = sum(1 for res in results if res["confidence_score"] <= EXTRACTIVE_CONFIDENCE)
+    return {
+        "documents": len(docs),
+        "max_limit": max_limit,
+        "final_limit": metrics["limit"],
+        "seconds": elapsed,
+        "docs_per_sec": len(docs) / elapsed,
+        "tokens_per_sec": metrics["tokens_per_sec"],
+        "requests": metrics["completed"],
+        "errors": metrics["errors"],
+        "fallbacks": fallbacks,
+        "dropped": len(docs) - len(results),
+        "p50": metrics["p50"],
+        "p95": metrics["p95"],
+        "p99": metrics["p99"],
+    }
+
+
+def print_table(rows):
+    print(f"{'docs':>5} {'limit':>9} {'secs':>7} {'docs/s':>7} {'tok/s':>8} {'reqs':>5} "
+          f"{'errs':>5} {'fallbk':>6} {'drop':>5} {'p50':>6} {'p95':>6} {'p99':>6}")
+    for row in rows:
+        percentiles = " ".join(
+            f"{row[q]:6.2f}" if row[q] is not None else f"{'-':>6}" for q in ("p50", "p95", "p99")
+        )
+        print(f"{row['documents']:>5} {row['final_limit']:>4}/{row['max_limit']:<4} {row['seconds']:7.2f} "
+              f"{row['docs_per_sec']:7.1f} {row['tokens_per_sec']:8.1f} {row['requests']:>5} "
+              f"{row['errors']:>5} {row['fallbacks']:>6} {row['dropped']:>5} {percentiles}")
+
+
+async def main(args):
+    runner = None
+    if args.url:
+        summarizer.OLLAMA_API_URL = args.url
+    else:
+        fake = fake_from_arguments(args)
+        runner, summarizer.OLLAMA_API_URL = await start_server(fake)
+        print(f"Started stand-in model server at {summarizer.OLLAMA_API_URL}")
+
+    options = {"batch": args.batch, "map_reduce": args.map_reduce, "precompress": args.precompress}
+
+    rows = []
+    try:
+        for count in args.docs:
+            docs = make_documents(count)
+            for max_limit in args.limits:
+                if args.token_budget:
+                    options["budget"] = TokenBudget(args.token_budget)
+                rows.append(await run_case(docs, args.topic, max_limit, **options))
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+
+    print()
+    print_table(rows)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput harness for summarize_sources")
+    parser.add_argument("--docs", type=int, nargs="+", default=[10, 50, 100], help="Document counts to run")
+    parser.add_argument("--limits", type=int, nargs="+", default=[1, 4, 16], help="Max concurrency limits to run")
+    parser.add_argument("--topic", default="technology research")
+    parser.add_argument("--url", help="Use an already running model server instead of the built-in stand-in")
+    parser.add_argument("--batch", action="store_true", help="Enable packed multi-document prompts")
+    parser.add_argument("--map-reduce", action="store_true", help="Enable map-reduce for long documents")
+    parser.add_argument("--precompress", action="store_true", help="Enable the extractive pre-pass")
+    parser.add_argument("--token-budget", type=int, help="Job token budget divided across documents by relevance")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    add_server_arguments(parser)
+
+    asyncio.run(main(parser.parse_args()))
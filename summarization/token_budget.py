@@ -0,0 +1,143 @@
+from chunking import CHARS_PER_TOKEN, estimate_tokens
+
+
+class DocumentUsage:
+    """Token allowance and actual token usage of one document within a job."""
+
+    def __init__(self, url, relevance, allowance, max_output_tokens):
+        self.url = url
+        self.relevance = relevance
+        self.allowance = allowance
+        self.max_output_tokens = max_output_tokens
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.requests = 0
+
+    @property
+    def max_chars(self):
+        """Characters of document text the allowance pays for."""
+        return self.allowance * CHARS_PER_TOKEN
+
+    def record(self, response, share=1.0):
+        """Adds the token counts reported by an Ollama response (or a share of them)."""
+        self.tokens_in += round(response.get('prompt_eval_count', 0) * share)
+        self.tokens_out += round(response.get('eval_count', 0) * share)
+        self.requests += 1
+
+    def as_dict(self):
+        return {
+            "url": self.url,
+            "relevance": self.relevance,
+            "allowance": self.allowance,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "requests": self.requests,
+        }
+
+
+class TokenBudget:
+    """
+    Job-level budget of document text tokens, divided across documents by relevance.
+
+    Documents whose 'relevance_score' (as set by `rank_documents`) is below
+    `min_relevance` are skipped. Each remaining document is charged `max_output_tokens`
+    for its summary and gets `min_doc_tokens` of text (or all it needs, if less); the
+    rest of `total_tokens` is shared in proportion to relevance. A document never
+    receives more than it can use, and what it leaves over is redistributed to the
+    others. If the budget cannot cover the output and the minimum of every document,
+    the least relevant documents are dropped until it can, so the allowances plus the
+    output tokens never exceed `total_tokens`.
+    If any document lacks a relevance score, or none has a positive one (the ranking
+    failed), all documents are weighted equally.
+    """
+
+    def __init__(self, total_tokens, min_relevance=0.05, min_doc_tokens=200, max_output_tokens=256):
+        self.total_tokens = total_tokens
+        self.min_relevance = min_relevance
+        self.min_doc_tokens = min_doc_tokens
+        self.max_output_tokens = max_output_tokens
+        self.documents = {}
+        self.skipped = []
+
+    def allocate(self, docs, max_doc_tokens=None):
+        """
+        Decides which documents are summarized and how many input tokens each may use.
+
+        Args:
+            docs (list): Documents with 'url', 'content' and optionally 'relevance_score'.
+            max_doc_tokens (int, optional): Most tokens a single document can use in one
+                         summary (e.g. the prompt limit when documents are truncated).
+
+        Returns:
+            list: (doc, DocumentUsage) pairs for the documents to summarize, in input order.
+        """
+        scored = all('relevance_score' in doc for doc in docs)
+        relevance = [doc.get('relevance_score', 1.0) if scored else 1.0 for doc in docs]
+        if not any(score > 0 for score in relevance):
+            relevance = [1.0] * len(docs)
+
+        candidates = [i for i, doc in enumerate(docs) if relevance[i] >= self.min_relevance]
+        self.skipped = [docs[i].get('url') for i in range(len(docs)) if i not in set(candidates)]
+
+        needs = {}
+        for i in candidates:
+            need = estimate_tokens(docs[i]['content'])
+            needs[i] = min(need, max_doc_tokens) if max_doc_tokens else need
+
+        # Drop the least relevant documents until every remaining one gets its output
+        # tokens and the minimum of text
+        candidates.sort(key=lambda i: relevance[i], reverse=True)
+        per_doc = self.min_doc_tokens + self.max_output_tokens
+        while candidates and len(candidates) * per_doc > self.total_tokens:
+            self.skipped.append(docs[candidates.pop()].get('url'))
+
+        input_tokens = self.total_tokens - len(candidates) * self.max_output_tokens
+        allowances = self._water_fill(candidates, relevance, needs, input_tokens)
+
+        # Keyed by position: sources may share a URL (or have none)
+        self.documents = {}
+        allocated = []
+        for i in sorted(allowances):
+            usage = DocumentUsage(docs[i].get('url', 'Unknown URL'), relevance[i], allowances[i],
+                                  self.max_output_tokens)
+            self.documents[i] = usage
+            allocated.append((docs[i], usage))
+        return allocated
+
+    def report(self):
+        """Returns per-document and job-level token accounting."""
+        documents = [usage.as_dict() for usage in self.documents.values()]
+        return {
+            "budget": self.total_tokens,
+            "allocated": sum(doc["allowance"] for doc in documents),
+            "reserved_output": len(documents) * self.max_output_tokens,
+            "tokens_in": sum(doc["tokens_in"] for doc in documents),
+            "tokens_out": sum(doc["tokens_out"] for doc in documents),
+            "documents": documents,
+            "skipped": list(self.skipped),
+        }
+
+    def _water_fill(self, candidates, relevance, needs, budget):
+        # The minimum comes off the budget first (the caller made sure it fits), so
+        # raising a small share to it never takes more than the budget holds
+        allowances = {i: min(needs[i], self.min_doc_tokens) for i in candidates}
+        remaining = budget - sum(allowances.values())
+        active = [i for i in candidates if needs[i] > allowances[i]]
+
+        # Documents that need less than their proportional share are fully funded,
+        # and the rest of the budget is re-split among the others
+        while active and remaining > 0:
+            weights = {i: max(relevance[i], 1e-6) for i in active}
+            total_weight = sum(weights.values())
+            share = {i: remaining * weights[i] / total_weight for i in active}
+            satisfied = [i for i in active if needs[i] - allowances[i] <= share[i]]
+            if not satisfied:
+                for i in active:
+                    allowances[i] += int(share[i])
+                break
+            for i in satisfied:
+                remaining -= needs[i] - allowances[i]
+                allowances[i] = needs[i]
+                active.remove(i)
+
+        return allowances
@@ -1,10 +1,26 @@
 import asyncio
+import logging
+import threading
+import time
+import aiohttp
 from flask import Flask, render_template_string, request, jsonify
 from web_search import search_multiple_queries
 import json
 
 app = Flask(__name__)
 
+# One event loop for the whole server, running in a background thread. Request
+# threads submit their searches to it, so every search shares one connection pool
+# instead of creating (and tearing down) a loop and session per request.
+loop = asyncio.new_event_loop()
+threading.Thread(target=loop.run_forever, name="search-loop", daemon=True).start()
+
+
+async def _create_session():
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=100, limit_per_host=8))
+
+session = asyncio.run_coroutine_threadsafe(_create_session(), loop).result()
+
 # HTML template for the web interface
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -370,17 +386,12 @@ def search():
         if not queries:
             return jsonify({'error': 'No queries provided'}), 400
         
-        # Run async search
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        import time
+        # Run the search on the shared event loop
         start_time = time.time()
-        results = loop.run_until_complete(search_multiple_queries(queries))
+        future = asyncio.run_coroutine_threadsafe(search_multiple_queries(queries, session), loop)
+        results = future.result()
         search_time = time.time() - start_time
         
-        loop.close()
-        
         return jsonify({
             'queries_searched': len(queries),
             'total_results': len(results),
@@ -392,6 +403,8 @@ def search():
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
+    # web_search leaves logging configuration to the application
+    logging.basicConfig(level=logging.INFO)
     print("🚀 Starting Web Search Module Demo Server")
     print("🌐 Open http://localhost:8000 in your browser")
     print("🔍 This will visually demonstrate the search functionality")
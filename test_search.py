@@ -1,5 +1,6 @@
 import asyncio
 import json
+import logging
 from web_search import search_multiple_queries
 
 async def demo_search():
@@ -75,6 +76,7 @@ async def mock_search_demo():
     return mock_results
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     print("🚀 Team Member 3 - Web Search Module")
     print("=" * 50)
     
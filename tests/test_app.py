@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from research_service import app
+from research_service.events import EventBus
+from research_service.jobs import JobStore, JobWorkerPool
+from research_service.pipeline import ResearchRequest
+from research_service.scheduler import AdmissionController, Overloaded
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """The app's job store, admission and queue, on a temporary database and without workers."""
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(app, "store", store)
+    monkeypatch.setattr(app, "admission", AdmissionController(store))
+    monkeypatch.setattr(app, "workers", JobWorkerPool(None, store, workers=0, events=EventBus()))
+    yield store
+    store.close()
+
+
+def test_equivalent_requests_share_a_dedupe_key():
+    key = ResearchRequest.from_dict({"query": "Solar  Storage", "keywords": ["cost", "Safety"],
+                                     "reportLength": "brief", "outputFormat": "md"}).dedupe_key()
+    same = ResearchRequest.from_dict({"query": "solar storage", "keywords": "safety, cost",
+                                      "reportLength": "short", "outputFormat": "markdown"})
+    other = ResearchRequest.from_dict({"query": "solar storage", "keywords": "safety, cost",
+                                       "reportLength": "short", "outputFormat": "pdf"})
+    assert same.dedupe_key() == key
+    assert other.dedupe_key() != key
+
+
+def test_identical_requests_join_the_queued_job(service):
+    async def submit_all():
+        first = await app._submit({"query": "solar storage"})
+        second = await app._submit({"query": " Solar storage "})
+        other = await app._submit({"query": "wind power"})
+        return first, second, other
+
+    first, second, other = asyncio.run(submit_all())
+
+    assert first["coalesced"] is False
+    assert second == {"id": first["id"], "status": "queued", "estimated_wait": 0.0, "coalesced": True}
+    assert other["id"] != first["id"] and other["coalesced"] is False
+
+    # A finished job is not joined; the next identical request starts a new one
+    service.complete(first["id"], {"report": {}})
+    assert asyncio.run(app._submit({"query": "solar storage"}))["id"] != first["id"]
+
+
+def test_overloaded_service_answers_429_with_retry_after(service):
+    service.max_running_cost = 10
+    # A large queued job ahead of any new medium report
+    service.submit({"query": "backlog"}, priority=1, cost=1000)
+
+    with pytest.raises(Overloaded) as overloaded:
+        app.admission.admit(ResearchRequest.from_dict({"query": "solar storage"}))
+    assert overloaded.value.estimated_wait > app.admission.max_wait[1]
+
+    with pytest.raises(HTTPException) as rejected:
+        asyncio.run(app._submit({"query": "solar storage"}))
+    assert rejected.value.status_code == 429
+    assert rejected.value.headers == {"Retry-After": str(overloaded.value.retry_after)}
+    assert rejected.value.detail["retry_after"] == overloaded.value.retry_after
+
+    # Brief reports are not queued behind it and are still admitted
+    assert asyncio.run(app._submit({"query": "solar storage", "reportLength": "brief"}))["status"] == "queued"
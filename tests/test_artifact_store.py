@@ -0,0 +1,61 @@
+import os
+import time
+
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+from reporting.artifact_store import ArtifactStore
+
+
+def _report(n):
+    return {"title": f"Report {n}", "findings": ["x" * 100]}
+
+
+def _renderer(renders):
+    def render(path):
+        renders.append(path)
+        with open(path, "w") as f:
+            f.write("x" * 1000)
+    return render
+
+
+def _age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_existing_artifact_is_served_without_rendering(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    renders = []
+    first = store.get_or_render(_report(1), "md", _renderer(renders))
+    second = store.get_or_render(_report(1), "md", _renderer(renders))
+    assert first == second and len(renders) == 1
+    assert store.get_or_render(_report(1), "md", _renderer(renders), version=2) != first
+
+
+def test_least_recently_used_artifacts_are_evicted_over_budget(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=2500, grace=60)
+    renders = []
+    old = store.get_or_render(_report(1), "md", _renderer(renders))
+    used = store.get_or_render(_report(2), "md", _renderer(renders))
+    _age(old, 3600)
+    _age(used, 3600)
+    store.get_or_render(_report(2), "md", _renderer(renders))  # a cache hit marks it as used
+
+    newest = store.get_or_render(_report(3), "md", _renderer(renders))
+
+    assert not os.path.exists(old)
+    assert os.path.exists(used) and os.path.exists(newest)
+
+
+def test_recently_served_artifacts_survive_retention(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=1500, grace=60)
+    renders = []
+    served = store.get_or_render(_report(1), "md", _renderer(renders))
+    newest = store.get_or_render(_report(2), "md", _renderer(renders))
+
+    # Over the size budget, but the first path may still be downloading
+    assert os.path.exists(served) and os.path.exists(newest)
+
+    _age(served, 120)
+    store.enforce_retention()
+    assert not os.path.exists(served)
@@ -0,0 +1,26 @@
+import json
+
+from research_service import bench
+
+
+def _run(timestamp, median, baseline):
+    return {"timestamp": timestamp, "environment": bench._environment_info(), "baseline": baseline,
+            "passed": True, "results": {"case": {"median": median, "peak_bytes": 1000}}}
+
+
+def test_baseline_stays_pinned_while_runs_drift(tmp_path):
+    history = str(tmp_path / "history.jsonl")
+    bench.save_run(_run("first", 1.00, baseline=True), history)
+    # Each run is within the allowed slowdown of the one before it
+    median = 1.00
+    for i in range(5):
+        median *= 1 + bench.MAX_SLOWDOWN * 0.9
+        bench.save_run(_run(f"drift-{i}", median, baseline=False), history)
+
+    baseline = bench.load_baseline(history=history)
+    assert baseline["timestamp"] == "first"
+    latest = json.loads(open(history).read().splitlines()[-1])
+    assert bench.find_regressions(latest["results"], baseline["results"])
+
+    bench.save_run(_run("accepted", median, baseline=True), history)
+    assert bench.load_baseline(history=history)["timestamp"] == "accepted"
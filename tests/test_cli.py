@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("sklearn", "fpdf", "readability", "aiohttp", "fastapi")
+
+
+def _run(code, *args):
+    """Runs `code` in a fresh interpreter; returns its stdout and the heavy modules it loaded."""
+    script = (code + "\nimport json, sys\n"
+              f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)), file=sys.stderr)")
+    completed = subprocess.run([sys.executable, "-c", script, *args], cwd=ROOT, capture_output=True,
+                               text=True, timeout=120)
+    assert completed.returncode == 0, completed.stderr
+    return completed.stdout, json.loads(completed.stderr.strip().splitlines()[-1])
+
+
+def test_help_loads_no_stage_dependencies():
+    stdout, loaded = _run(
+        "import contextlib, io\n"
+        "from research_service import cli\n"
+        "out = io.StringIO()\n"
+        "with contextlib.redirect_stdout(out), contextlib.suppress(SystemExit):\n"
+        "    cli.main(['--help'])\n"
+        "print(out.getvalue())"
+    )
+    assert "summarize" in stdout and "serve" in stdout
+    assert loaded == []
+
+
+def test_a_stage_command_loads_only_its_own_dependencies(tmp_path):
+    documents = tmp_path / "documents.json"
+    documents.write_text(json.dumps([
+        {"url": "https://example.com/a", "title": "A", "content": "Solar storage keeps getting cheaper."},
+        {"url": "https://example.com/b", "title": "B", "content": "Wind farms are built offshore."},
+    ]))
+
+    stdout, loaded = _run(
+        "import sys\n"
+        "from research_service import cli\n"
+        "cli.main(['rank', '--query', 'solar storage', sys.argv[1]])",
+        str(documents),
+    )
+    assert json.loads(stdout)[0]["url"] == "https://example.com/a"
+    assert loaded == ["sklearn"]
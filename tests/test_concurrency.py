@@ -0,0 +1,59 @@
+import asyncio
+
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+import summarizer
+from concurrency import AdaptiveConcurrencyController, default_controller
+from fake_ollama import FakeOllama, start_server
+
+
+def _docs(prefix, n):
+    return [{"url": f"https://example.com/{prefix}/{i}", "content": f"{prefix} document {i}"} for i in range(n)]
+
+
+def test_callers_without_a_controller_share_one_limit():
+    fake = FakeOllama(latency=0.02, jitter=0.0, tokens=5, tokens_per_sec=1000.0)
+
+    async def run():
+        runner, url = await start_server(fake)
+        default_url, summarizer.OLLAMA_API_URL = summarizer.OLLAMA_API_URL, url
+        try:
+            await asyncio.gather(summarizer.summarize_sources(_docs("a", 6), "topic"),
+                                 summarizer.summarize_sources(_docs("b", 6), "topic"))
+            return default_controller().metrics()
+        finally:
+            summarizer.OLLAMA_API_URL = default_url
+            await runner.cleanup()
+
+    metrics = asyncio.run(run())
+    assert metrics["completed"] == 12
+    assert metrics["max_queue_depth"] > 0
+
+
+def test_each_event_loop_gets_its_own_default_controller():
+    async def get():
+        return default_controller()
+
+    first = asyncio.run(get())
+    assert asyncio.run(get()) is not first
+
+
+def test_cancelled_requests_do_not_shrink_the_limit():
+    async def run():
+        controller = AdaptiveConcurrencyController(initial_limit=8)
+
+        async def request():
+            async with controller.slot():
+                await asyncio.sleep(10)
+
+        tasks = [asyncio.create_task(request()) for _ in range(4)]
+        await asyncio.sleep(0.01)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return controller
+
+    controller = asyncio.run(run())
+    assert controller.limit == 8
+    assert controller.metrics()["errors"] == 0
+    assert controller.metrics()["in_flight"] == 0
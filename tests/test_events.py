@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+from research_service.events import EventBus, sse_stream
+
+
+def _progress(done):
+    return {"type": "progress", "stage": "fetch_extract", "done": done, "total": 100}
+
+
+def test_progress_bursts_are_coalesced_between_milestones():
+    async def run():
+        bus = EventBus()
+        publish = bus.publisher("job")
+        batches = []
+
+        async def subscribe():
+            async for batch in bus.subscribe("job"):
+                batches.append(batch)
+
+        subscriber = asyncio.create_task(subscribe())
+        await asyncio.sleep(0)
+        publish({"type": "stage", "stage": "fetch_extract", "status": "started"})
+        for done in range(1, 101):
+            publish(_progress(done), True)
+        publish({"type": "summary", "url": "https://example.com/a"})
+        bus.close("job")
+        await asyncio.wait_for(subscriber, 5)
+        return batches
+
+    batches = asyncio.run(run())
+
+    events = [event for batch in batches for event in batch]
+    assert [event["type"] for event in events] == ["stage", "progress", "summary"]
+    assert events[1]["done"] == 100
+
+
+def test_late_subscribers_catch_up_from_last_event_id():
+    async def run():
+        bus = EventBus()
+        for stage in ("search", "fetch_extract", "rank"):
+            bus.publish("job", {"type": "stage", "stage": stage, "status": "done"})
+        bus.close("job")
+        return b"".join([chunk async for chunk in sse_stream(bus, "job", after=1)])
+
+    stream = asyncio.run(run()).decode("utf-8")
+
+    assert stream.startswith("retry: 2000\n\n")
+    messages = stream.strip().split("\n\n")[1:]
+    assert [message.splitlines()[0] for message in messages] == ["id: 2", "id: 3"]
+    data = json.loads(messages[-1].splitlines()[2][len("data: "):])
+    assert data["stage"] == "rank"
+
+
+def test_reopened_stream_continues_after_a_retry():
+    async def run():
+        bus = EventBus()
+        bus.publish("job", {"type": "job", "status": "failed"})
+        bus.close("job")
+        bus.reopen("job")
+        bus.publish("job", {"type": "job", "status": "queued"})
+        bus.close("job")
+        return [batch async for batch in bus.subscribe("job", after=1)]
+
+    assert [event["status"] for batch in asyncio.run(run()) for event in batch] == ["queued"]
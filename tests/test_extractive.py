@@ -0,0 +1,17 @@
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+from extractive import extractive_summaries
+
+
+def test_summary_without_punctuation_is_cut_to_max_chars():
+    text = " ".join(f"word{i}" for i in range(1000))
+    [summary] = extractive_summaries([text], "word", max_chars=100)
+    assert summary
+    assert len(summary) <= 100
+
+
+def test_summaries_stay_within_max_chars():
+    text = "Solar panels convert sunlight into power. " * 20 + "Wind farms need steady wind and open land."
+    for max_chars in (10, 50, 100, 400):
+        [summary] = extractive_summaries([text], "solar power", max_sentences=None, max_chars=max_chars)
+        assert 0 < len(summary) <= max_chars
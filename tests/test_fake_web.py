@@ -0,0 +1,61 @@
+import asyncio
+
+from research_service import load_driver
+from research_service.fake_web import FakeWeb, SimulatedWebSession, start_server
+
+# No latency, failures or slow hosts unless a test asks for them
+QUIET = dict(latency=0.0, page_kb=2, huge_rate=0.0, error_rate=0.0, not_found_rate=0.0, redirect_rate=0.0,
+             hang_rate=0.0, slow_hosts=0.0, seed=1)
+
+
+async def _get_all(fake, urls):
+    runner, base_url = await start_server(fake)
+    session = SimulatedWebSession(base_url)
+    try:
+        responses = []
+        for url in urls:
+            async with session.get(url) as response:
+                responses.append((response.status, response.headers.get("Retry-After"), await response.text()))
+        return responses
+    finally:
+        await session.close()
+        await runner.cleanup()
+
+
+def test_articles_are_stable_and_hosts_throttle():
+    fake = FakeWeb(**dict(QUIET, host_rate=2.0))
+    urls = ["https://host-1.sim/articles/7"] * 3 + ["https://host-2.sim/articles/7"]
+
+    responses = asyncio.run(_get_all(fake, urls))
+
+    assert [status for status, _, _ in responses] == [200, 200, 429, 200]
+    assert responses[0][2] == responses[1][2] != responses[3][2]
+    assert responses[2][1] == "1"
+    assert fake.stats["throttled"] == 1
+
+
+def test_failures_and_redirects_are_simulated():
+    failing = asyncio.run(_get_all(FakeWeb(**dict(QUIET, error_rate=1.0)), ["https://host-1.sim/a"]))
+    assert failing[0][0] in (500, 503)
+
+    fake = FakeWeb(**dict(QUIET, redirect_rate=1.0))
+    redirected = asyncio.run(_get_all(fake, ["https://host-1.sim/a"]))
+    assert redirected[0][0] == 200 and fake.stats["redirects"] == 1
+
+
+def test_load_driver_reports_each_phase():
+    async def drive():
+        fake = FakeWeb(**QUIET)
+        runner, base_url = await start_server(fake)
+        try:
+            return await load_driver.run(base_url, load_driver.make_queries(3), pages=10, limit=20,
+                                         limit_per_host=4)
+        finally:
+            await runner.cleanup()
+
+    search, fetch = asyncio.run(drive())
+
+    assert search["phase"] == "search" and search["items"] >= 10
+    assert fetch["phase"] == "fetch_extract" and fetch["items"] == 10
+    assert fetch["outcomes"] == {"200": 10}
+    assert fetch["p50"] <= fetch["p99"] <= fetch["max"]
@@ -0,0 +1,48 @@
+import asyncio
+
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+import summarizer
+from fake_ollama import FakeOllama, start_server
+from relevance_ranker import rank_documents
+from reporting.incremental_report import generate_report_incremental
+
+TOPIC = "solar power storage"
+
+DOCUMENTS = [
+    {"url": "https://example.com/solar", "content": "Solar power storage lets homes keep solar power for the night."},
+    {"url": "https://example.com/storage", "content": "Battery storage smooths the output of solar farms."},
+    {"url": "https://example.com/power", "content": "Power grids balance supply and demand every second."},
+    {"url": "https://example.com/wind", "content": "Wind turbines turn faster on exposed hills."},
+    {"url": "https://example.com/bread", "content": "Sourdough bread needs a long, cool rise."},
+]
+
+
+async def _with_fake_model(run):
+    runner, url = await start_server(FakeOllama(latency=0.01, jitter=0.0, tokens=5, tokens_per_sec=1000.0))
+    default_url, summarizer.OLLAMA_API_URL = summarizer.OLLAMA_API_URL, url
+    try:
+        return await run()
+    finally:
+        summarizer.OLLAMA_API_URL = default_url
+        await runner.cleanup()
+
+
+def test_summaries_carry_the_ranking_score():
+    ranked = rank_documents([dict(doc) for doc in DOCUMENTS], TOPIC)
+    summaries = asyncio.run(_with_fake_model(lambda: summarizer.summarize_sources(ranked, TOPIC)))
+
+    assert [s["relevance_score"] for s in summaries] == [doc["relevance_score"] for doc in ranked]
+
+
+def test_incremental_report_keeps_the_most_relevant_findings():
+    ranked = rank_documents([dict(doc) for doc in DOCUMENTS], TOPIC)
+
+    async def run():
+        # The least relevant documents are summarized, and arrive, first
+        stream = summarizer.summarize_sources_stream(list(reversed(ranked)), TOPIC)
+        return await generate_report_incremental(stream, TOPIC, "short")
+
+    report = asyncio.run(_with_fake_model(run))
+
+    assert [f["url"] for f in report["findings"]] == [doc["url"] for doc in ranked[:3]]
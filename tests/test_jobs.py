@@ -0,0 +1,29 @@
+import asyncio
+import time
+
+from research_service.events import EventBus
+from research_service.jobs import FAILED, LOST_JOB_ERROR, JobStore, JobWorkerPool
+
+
+def test_job_lost_on_every_attempt_fails_and_ends_its_stream(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), lease=0.01, max_attempts=1)
+    job_id = store.submit({"query": "poison"})
+    # A worker claims the job and dies without renewing its lease
+    (claimed_id, _), expired = store.claim("dead-worker")
+    assert claimed_id == job_id and expired == []
+    time.sleep(0.02)
+
+    async def run():
+        events = EventBus()
+        pool = JobWorkerPool(None, store, workers=1, poll_interval=0.01, events=events)
+        pool.start()
+        try:
+            batches = [batch async for batch in events.subscribe(job_id)]
+            return batches, await asyncio.wait_for(pool.wait(job_id), 1)
+        finally:
+            await pool.close()
+
+    batches, job = asyncio.run(asyncio.wait_for(run(), 5))
+
+    assert batches[-1][-1]["status"] == FAILED
+    assert job["status"] == FAILED and job["error"] == LOST_JOB_ERROR
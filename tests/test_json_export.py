@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+from reporting import json_export
+from reporting.artifact_store import ArtifactStore
+from reporting.output_controller import format_report
+
+REPORT = {
+    "title": "Research Report: Batteries",
+    "topic": "batteries",
+    "date": "2026-01-01",
+    "introduction": "An introduction.",
+    "findings": [
+        "A plain string finding.",
+        {"summary": "A summarized finding.", "url": "https://example.com/a"},
+    ],
+    "conclusion": "A conclusion.",
+}
+
+
+def _lines(chunks):
+    return [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+
+def test_compact_and_pretty_encode_the_same_data():
+    compact = json_export.dumps(REPORT)
+    pretty = json_export.dumps(REPORT, pretty=True)
+    assert b"\n" not in compact and b", " not in compact
+    assert b"\n  " in pretty
+    assert json.loads(compact) == json.loads(pretty) == REPORT
+
+
+def test_ndjson_has_a_header_then_findings_then_sources():
+    records = _lines(json_export.iter_ndjson(REPORT))
+
+    assert [r["type"] for r in records] == ["report", "finding", "finding", "source"]
+    assert "findings" not in records[0] and records[0]["title"] == REPORT["title"]
+    assert records[1] == {"summary": "A plain string finding.", "type": "finding", "rank": 1}
+    assert records[2]["rank"] == 2
+    assert records[3] == {"url": "https://example.com/a", "type": "source"}
+
+
+def test_ndjson_consumes_findings_lazily():
+    consumed = []
+
+    def findings():
+        for i in range(3):
+            consumed.append(i)
+            yield {"summary": f"finding {i}"}
+
+    lines = json_export.iter_ndjson(REPORT, findings=findings(), sources=[])
+    next(lines)
+    assert consumed == []
+    next(lines)
+    assert consumed == [0]
+    assert len(list(lines)) == 2
+
+
+def test_async_ndjson_streams_findings_as_they_arrive():
+    async def findings():
+        yield "first"
+        yield {"summary": "second"}
+
+    async def collect():
+        return [chunk async for chunk in json_export.aiter_ndjson(REPORT, findings())]
+
+    records = _lines(asyncio.run(collect()))
+    assert [r.get("rank") for r in records] == [None, 1, 2]
+
+
+def test_ndjson_and_compact_formats_are_exported(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    with open(format_report(REPORT, "json-compact", store), "rb") as f:
+        assert f.read() == json_export.dumps(REPORT)
+    with open(format_report(REPORT, "ndjson", store), "rb") as f:
+        assert len(f.read().splitlines()) == 4
@@ -0,0 +1,55 @@
+import csv
+import json
+
+import pytest
+
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+from reporting.artifact_store import ArtifactStore
+from reporting.output_controller import export_all
+from reporting.report_ir import ReportIR
+
+REPORT = {
+    "title": "Research Report: Batteries",
+    "topic": "batteries",
+    "date": "2026-01-01",
+    "introduction": "An introduction.",
+    "findings": [
+        "A plain string finding.",
+        {"summary": "A summarized finding.", "url": "https://example.com/a",
+         "confidence_score": 0.9, "relevance_score": 0.5},
+    ],
+    "conclusion": "A conclusion.",
+}
+
+
+def test_findings_are_normalized_once():
+    ir = ReportIR.from_report(REPORT)
+    assert ir.finding_texts() == ["A plain string finding.", "A summarized finding."]
+    assert ir.findings[0]["url"] is None
+    assert ir.findings[1]["confidence"] == 0.9
+    assert ReportIR.from_report(ir) is ir
+
+
+def test_export_all_writes_every_format(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    paths = export_all(REPORT, formats=("md", "essay", "json", "csv"), store=store)
+
+    assert set(paths) == {"md", "essay", "json", "csv"}
+    with open(paths["md"], encoding="utf-8") as f:
+        assert "([source](https://example.com/a))" in f.read()
+    with open(paths["essay"], encoding="utf-8") as f:
+        assert "Finally, A summarized finding." in f.read()
+    with open(paths["json"], encoding="utf-8") as f:
+        assert json.load(f) == REPORT
+    with open(paths["csv"], encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[2] == ["2", "A summarized finding.", "https://example.com/a", "0.9", "0.5"]
+
+    # A second export is served from the store
+    assert export_all(REPORT, formats=("md", "csv"), store=store) == {"md": paths["md"], "csv": paths["csv"]}
+
+
+def test_export_all_rejects_unknown_formats(tmp_path):
+    with pytest.raises(ValueError, match="docx"):
+        export_all(REPORT, formats=("md", "docx"), store=ArtifactStore(str(tmp_path)))
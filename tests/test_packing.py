@@ -0,0 +1,27 @@
+import asyncio
+
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+import summarizer
+from fake_ollama import FakeOllama, start_server
+from packing import pack_documents
+
+DOCS = [{"url": f"https://example.com/{i}", "content": f"Short note {i} about solar power."} for i in range(4)]
+
+
+def test_rejected_packed_request_is_not_retried_per_document():
+    assert pack_documents(DOCS) == [[0, 1, 2, 3]]
+    fake = FakeOllama(latency=0.0, jitter=0.0, error_rate=1.0)
+
+    async def run():
+        runner, url = await start_server(fake)
+        default_url, summarizer.OLLAMA_API_URL = summarizer.OLLAMA_API_URL, url
+        try:
+            return await summarizer.summarize_sources(DOCS, "solar", batch=True)
+        finally:
+            summarizer.OLLAMA_API_URL = default_url
+            await runner.cleanup()
+
+    summaries = asyncio.run(run())
+    assert fake.requests == 1
+    assert summaries == []
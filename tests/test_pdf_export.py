@@ -0,0 +1,48 @@
+import os
+import re
+
+import fpdf.fpdf
+
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+from reporting import pdf_export
+from reporting.report_generator import build_report
+
+REPORT = build_report("研究", [{"url": "https://example.com", "summary": "исследование δεδομένα " * 40}])
+
+
+def _pdf_body(path):
+    # The creation date is the only part allowed to differ between renders
+    return re.sub(rb"/CreationDate \(D:\d+\)", b"", path.read_bytes())
+
+
+def test_rendering_leaves_other_fpdf_users_alone(tmp_path):
+    stock_font_file = fpdf.fpdf.TTFontFile
+    stock_cache_mode = fpdf.fpdf.FPDF_CACHE_MODE
+
+    pdf_export.render_pdf(REPORT, str(tmp_path / "report.pdf"))
+
+    assert (tmp_path / "report.pdf").read_bytes().startswith(b"%PDF")
+    assert fpdf.fpdf.TTFontFile is stock_font_file
+    assert fpdf.fpdf.FPDF_CACHE_MODE == stock_cache_mode
+
+
+def test_cached_fonts_render_the_same_pdf_as_stock_fpdf(tmp_path, monkeypatch):
+    assert pdf_export.FONT_CACHING, "fpdf is pinned to the version the font caching was written for"
+
+    pdf_export.render_pdf(REPORT, str(tmp_path / "cold.pdf"))
+    pdf_export.render_pdf(REPORT, str(tmp_path / "warm.pdf"))
+    assert pdf_export._CachedSubsetFont._subsets
+    assert any(name.endswith(".pkl") for name in os.listdir(pdf_export.FONT_CACHE_DIR))
+
+    monkeypatch.setattr(pdf_export, "_ReportPDF", fpdf.FPDF)
+    pdf_export.render_pdf(REPORT, str(tmp_path / "stock.pdf"))
+
+    assert _pdf_body(tmp_path / "cold.pdf") == _pdf_body(tmp_path / "stock.pdf")
+    assert _pdf_body(tmp_path / "warm.pdf") == _pdf_body(tmp_path / "stock.pdf")
+
+
+def test_worker_process_renders_the_report(tmp_path):
+    pdf_export.render_pdf_in_worker(REPORT, str(tmp_path / "report.pdf"))
+
+    assert (tmp_path / "report.pdf").read_bytes().startswith(b"%PDF")
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from research_service.fake_web import FakeWeb, SimulatedWebSession, start_server
+from research_service.pipeline import ResearchPipeline, ResearchRequest
+from research_service.shared_cache import SharedCache
+from summary_cache import SummaryCache
+
+
+def test_pipeline_built_outside_a_loop_binds_its_limits_at_start(tmp_path):
+    pipeline = ResearchPipeline(cache=SummaryCache(str(tmp_path / "summaries.sqlite3")),
+                                shared_cache=SharedCache(str(tmp_path / "shared.sqlite3")))
+    assert pipeline.fetch_slots is None
+
+    async def take_fetch_slots():
+        await pipeline.start()
+        try:
+            # More requests than slots, so some have to wait on the controller's condition
+            async def fetch():
+                async with pipeline.fetch_slots.slot("job"):
+                    await asyncio.sleep(0)
+            await asyncio.gather(*(fetch() for _ in range(pipeline.max_connections * 2)))
+            return pipeline.fetch_slots.metrics()["completed"]
+        finally:
+            await pipeline.close()
+
+    assert asyncio.run(take_fetch_slots()) == pipeline.max_connections * 2
+
+
+def test_request_fields_are_validated_and_mapped():
+    request = ResearchRequest.from_dict({"query": " batteries ", "keywords": "cost, safety",
+                                         "numberOfSources": "500", "reportLength": "detailed"})
+    assert request.queries() == ["batteries", "batteries cost", "batteries safety"]
+    assert request.number_of_sources == 100
+
+    with pytest.raises(ValueError, match="No query"):
+        ResearchRequest.from_dict({"query": "  "})
+    with pytest.raises(ValueError, match="output format"):
+        ResearchRequest.from_dict({"query": "batteries", "outputFormat": "docx"})
+
+
+def test_searches_share_the_session_and_the_search_cache(tmp_path):
+    fake = FakeWeb(latency=0.0, error_rate=0.0, hang_rate=0.0, slow_hosts=0.0, seed=1)
+    pipeline = ResearchPipeline(cache=SummaryCache(str(tmp_path / "summaries.sqlite3")),
+                                shared_cache=SharedCache(str(tmp_path / "shared.sqlite3")))
+
+    async def search_twice():
+        runner, url = await start_server(fake)
+        await pipeline.start()
+        await pipeline.session.close()
+        pipeline.session = SimulatedWebSession(url)
+        try:
+            first, second = await asyncio.gather(pipeline.search(["solar storage"]),
+                                                 pipeline.search(["wind power"]))
+            requests = fake.stats["requests"]
+            again = await pipeline.search(["solar storage", "wind power"])
+            return first, second, requests, again
+        finally:
+            await pipeline.close()
+            await runner.cleanup()
+
+    first, second, requests, again = asyncio.run(search_twice())
+
+    assert first and second and requests == 2
+    # Repeated queries are answered from the shared cache, merged without duplicates
+    assert fake.stats["requests"] == 2
+    assert again == first + [result for result in second if result not in first]
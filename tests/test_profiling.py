@@ -0,0 +1,59 @@
+import asyncio
+import json
+import time
+
+from research_service import profiling
+
+
+def _spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def _allocate():
+    return [bytearray(1000) for _ in range(2000)]
+
+
+def _busy_in_thread():
+    _spin(0.1)
+
+
+def _busy_unprofiled():
+    _spin(0.1)
+
+
+def test_profiled_job_writes_folded_stacks_and_memory_report(tmp_path):
+    directory = str(tmp_path)
+
+    async def job(profiler):
+        kept = _allocate()
+        profiler.mark("extract")
+        await asyncio.to_thread(profiling.attributed(_busy_in_thread))
+        profiler.mark("summarize")
+        return len(kept)
+
+    async def run():
+        # Another job running at the same time, not profiled
+        other = asyncio.create_task(asyncio.to_thread(_busy_unprofiled))
+        async with profiling.JobProfiler("job-1", directory) as profiler:
+            await asyncio.create_task(job(profiler))
+        await other
+        return profiler.summary()
+
+    summary = asyncio.run(run())
+
+    with open(profiling.folded_path("job-1", directory), encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines and all(line.startswith("job:job-1;stage:") for line in lines)
+    summarize = [line for line in lines if line.startswith("job:job-1;stage:summarize;")]
+    assert any("_busy_in_thread" in line for line in summarize)
+    assert not any("_busy_unprofiled" in line for line in lines)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == summary["cpu_samples"]
+
+    with open(profiling.memory_path("job-1", directory), encoding="utf-8") as f:
+        memory = json.load(f)
+    assert [stage["stage"] for stage in memory["stages"]] == ["extract", "summarize", "finish"]
+    extract = memory["stages"][0]
+    assert extract["peak_bytes"] > 1_000_000
+    assert any("test_profiling.py" in allocation["line"] for allocation in extract["top"])
@@ -0,0 +1,57 @@
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+import summarizer
+from concurrency import AdaptiveConcurrencyController
+
+DOC = {"url": "https://example.com/solar", "content": "Solar panels convert sunlight into power. " * 200}
+
+
+async def _stream_events(doc):
+    prompts = []
+
+    async def broken_stream(request):
+        prompts.append((await request.json())["prompt"])
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(b'{"response": "Half a model summary"}\n')
+        await response.write(b"not json\n")
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_post("/api/generate", broken_stream)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    default_url, summarizer.OLLAMA_API_URL = summarizer.OLLAMA_API_URL, f"http://127.0.0.1:{port}/api/generate"
+    try:
+        async with aiohttp.ClientSession() as session:
+            events = [event async for event in summarizer.stream_summary(
+                session, doc, "solar power", AdaptiveConcurrencyController())]
+        return events, prompts
+    finally:
+        summarizer.OLLAMA_API_URL = default_url
+        await runner.cleanup()
+
+
+def test_failed_stream_is_reset_before_the_fallback():
+    events, _ = asyncio.run(_stream_events(DOC))
+
+    assert events[0] == {"url": DOC["url"], "chunk": "Half a model summary"}
+    assert events[1]["reset"] and events[1]["error"]
+    assert "chunk" in events[2] and events[-1]["done"]
+    assert events[-1]["summary"] == events[2]["chunk"]
+
+
+def test_stream_prompt_is_limited_to_max_input_chars():
+    _, prompts = asyncio.run(_stream_events(DOC))
+
+    assert DOC["content"][:summarizer.MAX_INPUT_CHARS] in prompts[0]
+    assert DOC["content"][:summarizer.MAX_INPUT_CHARS + 1] not in prompts[0]
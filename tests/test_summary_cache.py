@@ -0,0 +1,57 @@
+import asyncio
+
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+import summarizer
+from fake_ollama import FakeOllama, start_server
+from summary_cache import SummaryCache
+from token_budget import TokenBudget
+
+
+def test_cache_is_bounded_without_counting_on_every_write(tmp_path, monkeypatch):
+    cache = SummaryCache(str(tmp_path / "cache.sqlite3"), max_entries=5)
+    recounts = []
+    evict = cache._evict
+    monkeypatch.setattr(cache, "_evict", lambda: (recounts.append(1), evict()))
+
+    for i in range(5):
+        cache.set(f"key{i}", {"summary": str(i)})
+    for _ in range(10):
+        cache.set("key0", {"summary": "replaced"})
+    assert not recounts
+
+    for i in range(5, 20):
+        cache.set(f"key{i}", {"summary": str(i)})
+    assert cache.stats()["entries"] == 5
+    assert cache.get("key19") == {"summary": "19"}
+    assert cache.get("key1") is None
+
+
+def test_processes_sharing_a_file_stay_bounded(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first, second = SummaryCache(path, max_entries=10), SummaryCache(path, max_entries=10)
+
+    for i in range(30):
+        (first if i % 2 else second).set(f"key{i}", {"summary": str(i)})
+
+    assert first.stats()["entries"] <= 10
+
+
+def test_summaries_cut_short_by_a_budget_are_not_served_unbudgeted(tmp_path):
+    cache = SummaryCache(str(tmp_path / "cache.sqlite3"))
+    docs = [{"url": "https://example.com", "content": "Solar power storage. " * 20, "relevance_score": 0.9}]
+    fake = FakeOllama(latency=0.0, jitter=0.0, tokens=5, tokens_per_sec=1000.0)
+
+    async def run():
+        runner, url = await start_server(fake)
+        default_url, summarizer.OLLAMA_API_URL = summarizer.OLLAMA_API_URL, url
+        try:
+            await summarizer.summarize_sources(docs, "solar", cache=cache, budget=TokenBudget(2000))
+            await summarizer.summarize_sources(docs, "solar", cache=cache)
+        finally:
+            summarizer.OLLAMA_API_URL = default_url
+            await runner.cleanup()
+
+    asyncio.run(run())
+    assert fake.requests == 2
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,32 @@
+import asyncio
+
+from research_service import telemetry
+
+
+def test_traced_model_call_passes_any_signature_through():
+    async def call_model(session, prompt, controller, json_format=False, usage=None, *, retries=0):
+        return f"{prompt}:{json_format}:{usage}:{retries}"
+
+    traced = telemetry._traced_model_call(call_model)
+
+    with telemetry.JobTrace("job") as trace:
+        response = asyncio.run(traced(None, "prompt", None, usage="usage", retries=2, json_format=True))
+
+    assert response == "prompt:True:usage:2"
+    [entry] = trace.spans
+    assert entry["name"] == "llm"
+    assert entry["args"] == {"bytes": len("prompt"), "response_chars": len(response)}
+
+
+def test_traced_provider_reads_the_query_by_name():
+    class Search:
+        async def search(self, query, session, limit=10):
+            return [query] * limit
+
+    traced = telemetry._traced_provider(Search.search, "test")
+
+    with telemetry.JobTrace("job") as trace:
+        results = asyncio.run(traced(Search(), session=None, query="solar", limit=2))
+
+    assert results == ["solar", "solar"]
+    assert trace.spans[0]["args"] == {"provider": "test", "query": "solar", "results": 2}
@@ -0,0 +1,83 @@
+import asyncio
+import itertools
+
+from research_service import stages  # noqa: F401  (puts the stage directories on sys.path)
+
+import summarizer
+from chunking import select_chunks
+from token_budget import DocumentUsage, TokenBudget
+
+
+def _docs(relevances, words=4000):
+    return [{"url": f"https://example.com/{i}", "content": "word " * words, "relevance_score": relevance}
+            for i, relevance in enumerate(relevances)]
+
+
+def test_allocation_stays_within_budget():
+    for total in (500, 1000, 3000, 10000):
+        budget = TokenBudget(total)
+        allocated = budget.allocate(_docs([0.9, 0.1, 0.1, 0.1, 0.06]))
+        spent = sum(usage.allowance + usage.max_output_tokens for _, usage in allocated)
+        assert spent <= total
+        assert all(usage.allowance >= budget.min_doc_tokens for _, usage in allocated)
+
+
+def test_more_relevant_documents_get_more_tokens():
+    allocated = TokenBudget(3000).allocate(_docs([0.9, 0.1, 0.1]))
+    allowances = [usage.allowance for _, usage in allocated]
+    assert allowances[0] > allowances[1]
+
+
+def test_failed_ranking_shares_equally():
+    budget = TokenBudget(5000)
+    allocated = budget.allocate(_docs([0.0, 0.0, 0.0]))
+    assert len(allocated) == 3
+    assert budget.skipped == []
+    assert len({usage.allowance for _, usage in allocated}) == 1
+
+
+def test_selected_chunks_stay_within_budget():
+    topics = ["alpha", "bravo", "charlie", "delta", "echo"]
+    chunks = [f"{topic}word " * 100 for topic in topics]
+    selected, _ = select_chunks(chunks, token_budget=1200, coverage_target=1.0, chunk_overhead=300)
+    assert 1 <= len(selected) < len(chunks)
+    assert sum(len(chunk) // 4 + 1 + 300 for chunk in selected) <= 1200
+    assert select_chunks(chunks, token_budget=100, coverage_target=1.0)[0] == []
+
+
+def test_chunk_selection_passes_over_chunks_it_cannot_afford():
+    # The first chunk covers the most words but costs more than the whole budget
+    words = ["".join(letters) for letters in itertools.product("abcdefgh", repeat=4)][:600]
+    chunks = [" ".join(words), " ".join(words[:20]), " ".join(words[20:40])]
+    selected, coverage = select_chunks(chunks, token_budget=400, coverage_target=1.0, vocabulary_size=600)
+    assert selected == chunks[1:]
+    assert coverage > 0
+
+
+def test_sources_sharing_a_url_keep_their_own_allowance():
+    docs = _docs([0.9, 0.5, 0.5])
+    for doc in docs:
+        doc["url"] = ""
+    budget = TokenBudget(5000)
+    allocated = budget.allocate(docs)
+    report = budget.report()
+    assert len(report["documents"]) == 3
+    assert report["allocated"] == sum(usage.allowance for _, usage in allocated)
+
+
+def test_map_reduce_fallback_prompt_is_capped(monkeypatch):
+    prompts = []
+
+    async def call_model(session, prompt, controller, json_format=False, usage=None):
+        prompts.append(prompt)
+        return "summary"
+
+    monkeypatch.setattr(summarizer, "_call_model", call_model)
+    # Each chunk's output and reduce tokens alone exceed the allowance, so no chunk is affordable
+    usage = DocumentUsage("https://example.com", 0.9, allowance=2000, max_output_tokens=1024)
+    text = "word " * 20000
+    asyncio.run(summarizer._map_reduce_summary(None, text, "topic", None, 2000, 0.9, usage))
+
+    [prompt] = prompts
+    assert text[:summarizer.MAX_INPUT_CHARS] in prompt
+    assert text[:summarizer.MAX_INPUT_CHARS + 1] not in prompt
@@ -0,0 +1,45 @@
+import asyncio
+
+from research_service.events import EventBus
+from research_service.shared_cache import SharedCache
+from research_service.workers import QueueEventSink, WorkerProcesses
+
+
+def test_worker_events_are_relayed_into_the_front_door_bus():
+    async def run():
+        events = EventBus()
+        processes = WorkerProcesses(events, processes=0)
+        processes.start()
+        try:
+            # What a worker process's JobWorkerPool publishes to
+            sink = QueueEventSink(processes._queue)
+            publish = sink.publisher("job")
+            publish({"type": "job", "status": "running"})
+            publish({"type": "progress", "stage": "summarize", "done": 1, "total": 2}, True)
+            sink.publish("job", {"type": "job", "status": "done"})
+            sink.close("job")
+            return [batch async for batch in events.subscribe("job")]
+        finally:
+            await processes.close()
+
+    batches = asyncio.run(asyncio.wait_for(run(), 10))
+
+    events = [event for batch in batches for event in batch]
+    assert [event["type"] for event in events] == ["job", "progress", "job"]
+    assert events[-1]["status"] == "done"
+
+
+def test_cache_entries_are_shared_between_processes_and_expire(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    writer, reader = SharedCache(path), SharedCache(path)
+    try:
+        writer.set("page", "https://example.com/a", {"text": "body"}, ttl=60)
+        writer.set("page", "https://example.com/b", {"text": "gone"}, ttl=-1)
+
+        assert reader.get("page", "https://example.com/a") == {"text": "body"}
+        assert reader.get("page", "https://example.com/b") is None
+        assert reader.get("search", "https://example.com/a") is None
+        assert reader.stats() == {"page": {"hits": 1, "misses": 1}, "search": {"hits": 0, "misses": 1}}
+    finally:
+        writer.close()
+        reader.close()
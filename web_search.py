@@ -7,8 +7,6 @@ from urllib.parse import quote_plus
 import logging
 from bs4 import BeautifulSoup
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class WebSearchModule:
@@ -44,13 +42,13 @@ class WebSearchModule:
                                 'title': result.get('title', '')
                             })
                     
-                    logger.info(f"SerpAPI found {len(results)} results for: {query}")
+                    logger.info("SerpAPI found %d results for: %s", len(results), query)
                     return results
                 else:
-                    logger.error(f"SerpAPI error: {response.status}")
+                    logger.error("SerpAPI error: %s", response.status)
                     return []
         except Exception as e:
-            logger.error(f"SerpAPI exception: {str(e)}")
+            logger.error("SerpAPI exception: %s", e)
             return []
     
     async def search_with_bing(self, query: str, session: aiohttp.ClientSession) -> List[Dict[str, str]]:
@@ -82,13 +80,13 @@ class WebSearchModule:
                                 'title': result.get('name', '')
                             })
                     
-                    logger.info(f"Bing API found {len(results)} results for: {query}")
+                    logger.info("Bing API found %d results for: %s", len(results), query)
                     return results
                 else:
-                    logger.error(f"Bing API error: {response.status}")
+                    logger.error("Bing API error: %s", response.status)
                     return []
         except Exception as e:
-            logger.error(f"Bing API exception: {str(e)}")
+            logger.error("Bing API exception: %s", e)
             return []
     
     async def search_with_scraping(self, query: str, session: aiohttp.ClientSession) -> List[Dict[str, str]]:
@@ -129,16 +127,16 @@ class WebSearchModule:
                         results = engine['parser'](html)
                         
                         if results:
-                            logger.info(f"{engine['name']} found {len(results)} results for: {query}")
+                            logger.info("%s found %d results for: %s", engine['name'], len(results), query)
                             return results
                     else:
-                        logger.warning(f"{engine['name']} returned status: {response.status}")
+                        logger.warning("%s returned status: %s", engine['name'], response.status)
                         
             except Exception as e:
-                logger.warning(f"{engine['name']} failed: {str(e)}")
+                logger.warning("%s failed: %s", engine['name'], e)
                 continue
         
-        logger.error(f"All search engines failed for: {query}")
+        logger.error("All search engines failed for: %s", query)
         return []
     
     def _parse_duckduckgo(self, html: str) -> List[Dict[str, str]]:
@@ -166,7 +164,7 @@ class WebSearchModule:
             
             return results
         except Exception as e:
-            logger.error(f"DuckDuckGo parsing error: {str(e)}")
+            logger.error("DuckDuckGo parsing error: %s", e)
             return []
     
     def _parse_brave(self, html: str) -> List[Dict[str, str]]:
@@ -211,7 +209,7 @@ class WebSearchModule:
             
             return results
         except Exception as e:
-            logger.error(f"Brave parsing error: {str(e)}")
+            logger.error("Brave parsing error: %s", e)
             return []
     
     def _parse_google(self, html: str) -> List[Dict[str, str]]:
@@ -257,34 +255,39 @@ class WebSearchModule:
             
             return results
         except Exception as e:
-            logger.error(f"Google parsing error: {str(e)}")
+            logger.error("Google parsing error: %s", e)
             return []
     
-    async def search_single_query(self, query: str) -> List[Dict[str, str]]:
+    async def search_single_query(self, query: str, session: Optional[aiohttp.ClientSession] = None) -> List[Dict[str, str]]:
         """Search a single query using available methods in order of preference"""
-        async with aiohttp.ClientSession() as session:
-            # Try SerpAPI first
-            if self.serpapi_key:
-                results = await self.search_with_serpapi(query, session)
-                if results:
-                    return results
-            
-            # Try Bing API second
-            if self.bing_api_key:
-                results = await self.search_with_bing(query, session)
-                if results:
-                    return results
-            
-            # Fall back to scraping
-            results = await self.search_with_scraping(query, session)
-            return results
+        if session is None:
+            async with aiohttp.ClientSession() as own_session:
+                return await self.search_single_query(query, own_session)
+
+        # Try SerpAPI first
+        if self.serpapi_key:
+            results = await self.search_with_serpapi(query, session)
+            if results:
+                return results
+        
+        # Try Bing API second
+        if self.bing_api_key:
+            results = await self.search_with_bing(query, session)
+            if results:
+                return results
+        
+        # Fall back to scraping
+        results = await self.search_with_scraping(query, session)
+        return results
 
-async def search_multiple_queries(queries: List[str]) -> List[Dict[str, str]]:
+async def search_multiple_queries(queries: List[str], session: Optional[aiohttp.ClientSession] = None) -> List[Dict[str, str]]:
     """
     Search multiple queries and return combined results
     
     Args:
         queries: List of search queries
+        session: Optional shared aiohttp session (e.g. a long-lived service's
+                 connection pool); a new one is created per query otherwise
         
     Returns:
         List of dictionaries with 'url' and 'title' keys
@@ -293,7 +296,7 @@ async def search_multiple_queries(queries: List[str]) -> List[Dict[str, str]]:
     all_results = []
     
     # Create tasks for concurrent searching
-    tasks = [searcher.search_single_query(query) for query in queries]
+    tasks = [searcher.search_single_query(query, session) for query in queries]
     
     # Execute all searches concurrently
     results_lists = await asyncio.gather(*tasks, return_exceptions=True)
@@ -301,7 +304,7 @@ async def search_multiple_queries(queries: List[str]) -> List[Dict[str, str]]:
     # Combine all results
     for i, results in enumerate(results_lists):
         if isinstance(results, Exception):
-            logger.error(f"Error searching query '{queries[i]}': {str(results)}")
+            logger.error("Error searching query '%s': %s", queries[i], results)
             continue
         
         all_results.extend(results)
@@ -316,11 +319,13 @@ async def search_multiple_queries(queries: List[str]) -> List[Dict[str, str]]:
             seen_urls.add(url)
             unique_results.append(result)
     
-    logger.info(f"Total unique results: {len(unique_results)}")
+    logger.info("Total unique results: %d", len(unique_results))
     return unique_results
 
 # Example usage and testing
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
     async def test_search():
         # Test queries
         test_queries = [